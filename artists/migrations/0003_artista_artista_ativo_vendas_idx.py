@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artists', '0002_alter_artista_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='artista',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['-total_vendas'], name='artista_ativo_vendas_idx'),
+        ),
+    ]
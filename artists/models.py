@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from django.conf import settings
 from django.core.validators import MinValueValidator
 
@@ -64,6 +65,10 @@ class Artista(models.Model):
         verbose_name = "Artista"
         verbose_name_plural = "Artistas"
         ordering = ['-total_vendas']
+        indexes = [
+            # Índice parcial: as listagens só leem artistas ativos
+            models.Index(fields=['-total_vendas'], condition=Q(ativo=True), name='artista_ativo_vendas_idx'),
+        ]
 
     def __str__(self):
         return self.nome_artistico
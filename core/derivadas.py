@@ -0,0 +1,223 @@
+"""
+Derivadas de imagens enviadas (miniaturas em tamanhos fixos + WebP).
+
+Para cada imagem original são geradas, em MEDIA_ROOT/derivadas/, versões
+redimensionadas em cada TAMANHO, no formato original e em WebP:
+
+    produtos/capa.png → derivadas/produtos/capa_pequena.png
+                        derivadas/produtos/capa_pequena.webp
+
+A geração roda num pool de threads, agendada após o commit do save do
+modelo (ver os signals de products, creations e gamification), fora do
+caminho da requisição. Templates e serializers pedem a URL de um tamanho;
+enquanto a derivada não existir, recebem a URL do original.
+
+Quais derivadas de cada original existem fica registrado no cache ao
+gerá-las: montar as URLs não consulta o storage (um round trip por arquivo
+em storages remotos). Só quando o registro não está no cache o storage é
+consultado, e o resultado volta para o cache.
+"""
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+# Nome → caixa máxima (largura, altura); a proporção é mantida
+TAMANHOS = {
+    'mini': (64, 64),
+    'pequena': (300, 300),
+    'media': (800, 800),
+}
+
+PASTA = 'derivadas'
+QUALIDADE_WEBP = 80
+FORMATOS = (None, 'webp')
+
+# Registro incompleto expira: a geração pode ter terminado em outro processo
+TTL_INCOMPLETO = 60
+
+_executor = None
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'DERIVADAS_WORKERS', 2),
+            thread_name_prefix='derivadas',
+        )
+    return _executor
+
+
+def caminho_derivada(nome, tamanho, formato=None):
+    """Caminho (no storage) da derivada de `nome` no tamanho e formato pedidos"""
+    base, ext = os.path.splitext(nome)
+    ext = f'.{formato}' if formato else ext.lower()
+    return f'{PASTA}/{base}_{tamanho}{ext}'
+
+
+def _chave_registro(nome):
+    return f'derivadas:{hashlib.sha1(nome.encode()).hexdigest()}'
+
+
+def _registrar(nome, existentes):
+    completo = len(existentes) == len(TAMANHOS) * len(FORMATOS)
+    cache.set(_chave_registro(nome), existentes, timeout=None if completo else TTL_INCOMPLETO)
+
+
+def existentes(nome):
+    """Conjunto de (tamanho, formato) das derivadas de `nome` já geradas"""
+    registro = cache.get(_chave_registro(nome))
+    if registro is None:
+        registro = {
+            (tamanho, formato)
+            for tamanho in TAMANHOS
+            for formato in FORMATOS
+            if default_storage.exists(caminho_derivada(nome, tamanho, formato))
+        }
+        _registrar(nome, registro)
+    return registro
+
+
+def gerar(nome):
+    """
+    Gera todas as derivadas do arquivo `nome` que ainda não existem.
+
+    Retorna a quantidade de arquivos criados.
+    """
+    from PIL import Image, ImageOps
+
+    geradas = {
+        (tamanho, formato)
+        for tamanho in TAMANHOS
+        for formato in FORMATOS
+        if default_storage.exists(caminho_derivada(nome, tamanho, formato))
+    }
+    pendentes = [
+        (tamanho, formato)
+        for tamanho in TAMANHOS
+        for formato in FORMATOS
+        if (tamanho, formato) not in geradas
+    ]
+    if not pendentes:
+        _registrar(nome, geradas)
+        return 0
+
+    with default_storage.open(nome, 'rb') as arquivo:
+        original = Image.open(arquivo)
+        original = ImageOps.exif_transpose(original)
+        original.load()
+    formato_original = original.format or Image.registered_extensions().get(
+        os.path.splitext(nome)[1].lower(), 'PNG'
+    )
+
+    criados = 0
+    for tamanho, formato in pendentes:
+        imagem = original.copy()
+        imagem.thumbnail(TAMANHOS[tamanho], Image.LANCZOS)
+
+        buffer = BytesIO()
+        if formato == 'webp':
+            imagem.save(buffer, 'WEBP', quality=QUALIDADE_WEBP, method=4)
+        else:
+            if formato_original == 'JPEG' and imagem.mode not in ('RGB', 'L'):
+                imagem = imagem.convert('RGB')
+            imagem.save(buffer, formato_original, optimize=True)
+
+        default_storage.save(caminho_derivada(nome, tamanho, formato), ContentFile(buffer.getvalue()))
+        geradas.add((tamanho, formato))
+        criados += 1
+    _registrar(nome, geradas)
+    return criados
+
+
+def _gerar_seguro(nome, ao_concluir):
+    try:
+        criados = gerar(nome)
+    except Exception:
+        logger.exception("Falha ao gerar derivadas de %s", nome)
+        return
+    # Sem arquivo novo, nada mudou para quem invalida caches
+    if criados and ao_concluir:
+        ao_concluir()
+
+
+def agendar(arquivo, ao_concluir=None):
+    """
+    Agenda a geração das derivadas do arquivo (FieldFile) após o commit.
+
+    ao_concluir é chamado (na thread do pool) quando alguma derivada nova é gravada.
+    """
+    if not arquivo:
+        return
+    nome = arquivo.name
+    transaction.on_commit(lambda: _pool().submit(_gerar_seguro, nome, ao_concluir))
+
+
+def url(arquivo, tamanho='pequena', formato='webp'):
+    """
+    URL da derivada; a do original enquanto ela não tiver sido gerada.
+
+    Aceita o FieldFile ou só o nome do arquivo (ex.: valor anotado numa consulta).
+    """
+    if not arquivo:
+        return ''
+    nome = getattr(arquivo, 'name', arquivo)
+    if (tamanho, formato) in existentes(nome):
+        return default_storage.url(caminho_derivada(nome, tamanho, formato))
+    return default_storage.url(nome)
+
+
+def urls(arquivo, request=None):
+    """
+    {tamanho: {'webp': url, 'original': url}} de todas as derivadas.
+
+    Com `request`, as URLs saem absolutas (como as de FileField/ImageField
+    nos serializers).
+    """
+    if not arquivo:
+        return None
+    nome = getattr(arquivo, 'name', arquivo)
+    registro = existentes(nome)
+
+    def url_derivada(tamanho, formato):
+        if (tamanho, formato) in registro:
+            endereco = default_storage.url(caminho_derivada(nome, tamanho, formato))
+        else:
+            endereco = default_storage.url(nome)
+        return request.build_absolute_uri(endereco) if request else endereco
+
+    return {
+        tamanho: {
+            'webp': url_derivada(tamanho, 'webp'),
+            'original': url_derivada(tamanho, None),
+        }
+        for tamanho in TAMANHOS
+    }
+
+
+def absolutas(imagens, request):
+    """Torna absolutas as URLs de um resultado de urls() montado sem request"""
+    if not imagens:
+        return imagens
+    return {
+        tamanho: {formato: request.build_absolute_uri(endereco) for formato, endereco in formatos.items()}
+        for tamanho, formatos in imagens.items()
+    }
+
+
+class DerivadasField(serializers.ReadOnlyField):
+    """Campo de serializer com as URLs das derivadas de uma imagem (ver urls())"""
+
+    def to_representation(self, value):
+        return urls(value, self.context.get('request'))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from core import derivadas
+from creations.models import Arte, Colecao
+from gamification.models import Badge
+from products.models import Produto
+
+CAMPOS = [
+    (Produto, 'imagem'),
+    (Arte, 'arquivo'),
+    (Colecao, 'imagem_destaque'),
+    (Badge, 'icone'),
+]
+
+
+class Command(BaseCommand):
+    """
+    Gera as derivadas (miniaturas/WebP) das imagens já existentes.
+
+    Só cria os arquivos que faltam; pode ser executado novamente a qualquer momento.
+    """
+    help = 'Gera miniaturas e variantes WebP das imagens enviadas.'
+
+    def handle(self, *args, **options):
+        total = 0
+        for modelo, campo in CAMPOS:
+            nomes = (
+                modelo.objects.exclude(**{campo: ''}).exclude(**{f'{campo}__isnull': True})
+                .values_list(campo, flat=True)
+                .iterator()
+            )
+            for nome in nomes:
+                try:
+                    total += derivadas.gerar(nome)
+                except Exception as e:
+                    self.stderr.write(f'{modelo.__name__} {nome}: {e}')
+        self.stdout.write(self.style.SUCCESS(f'{total} derivada(s) gerada(s).'))
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from artists.models import Artista
+from creations.models import Arte, Colecao
+from products.models import Produto
+
+
+def consultas():
+    """
+    (descrição, queryset, índice esperado) das consultas quentes das views
+    e viewsets, com os mesmos filtros e ordenações.
+    """
+    return [
+        ('artes: listagem/feed', Arte.objects.filter(ativa=True).order_by('-criado_em', '-id')[:20], 'arte_ativa_criado_idx'),
+        ('artes: por artista', Arte.objects.filter(ativa=True, artista_id=1).order_by('-criado_em')[:20], 'arte_ativa_artista_idx'),
+        ('artes: por coleção', Arte.objects.filter(ativa=True, colecao_id=1).order_by('-criado_em')[:20], 'arte_ativa_colecao_idx'),
+        ('artes: contagem por coleção', Arte.objects.filter(colecao_id=1, ativa=True).values('pk'), 'arte_ativa_colecao_idx'),
+        ('coleções: listagem', Colecao.objects.filter(ativa=True).order_by('-criado_em')[:20], 'colecao_ativa_criado_idx'),
+        ('coleções: por artista', Colecao.objects.filter(ativa=True, artista_id=1).order_by('-criado_em')[:20], 'colecao_ativa_artista_idx'),
+        ('produtos: catálogo', Produto.objects.filter(ativo=True).order_by('nome')[:20], 'produto_ativo_nome_idx'),
+        ('produtos: por categoria', Produto.objects.filter(ativo=True, categoria='capinha').order_by('nome')[:20], 'produto_ativo_categoria_idx'),
+        ('artistas: listagem', Artista.objects.filter(ativo=True)[:20], 'artista_ativo_vendas_idx'),
+    ]
+
+
+class Command(BaseCommand):
+    """
+    Confere, pelo plano de execução (EXPLAIN), se as consultas das listagens
+    usam os índices parciais de ativa/ativo.
+
+    No PostgreSQL, o seq scan é desligado durante a verificação: com tabelas
+    pequenas o planejador prefere varrer a tabela, mesmo com o índice
+    disponível. Falha com código de saída diferente de zero se alguma
+    consulta não usar o índice esperado. Com -v 2, mostra os planos.
+    """
+    help = 'Verifica se as consultas das listagens usam os índices parciais.'
+
+    def handle(self, *args, **options):
+        falhas = []
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for descricao, queryset, indice in consultas():
+                plano = queryset.explain()
+                if indice in plano:
+                    self.stdout.write(f'OK     {descricao}: {indice}')
+                else:
+                    falhas.append(descricao)
+                    self.stdout.write(self.style.ERROR(f'FALHA  {descricao}: esperado {indice}'))
+                if options['verbosity'] > 1:
+                    self.stdout.write(plano)
+
+        if falhas:
+            raise CommandError(f'{len(falhas)} consulta(s) sem o índice esperado.')
+        self.stdout.write(self.style.SUCCESS('Todas as consultas usam os índices parciais.'))
@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'django_filters',
+    'core',
     'users',
     'products',
     'artists',
@@ -137,3 +138,39 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Pedidos
+# Mantém o valor_total por delta (UPDATE com F()) nas operações de item.
+# A reconciliação completa roda via `manage.py reconciliar_valor_total`.
+PEDIDO_VALOR_TOTAL_INCREMENTAL = True
+
+# Pedidos concluídos/cancelados mais antigos que isso vão para o arquivo
+# (`manage.py arquivar_pedidos`).
+PEDIDO_ARQUIVAMENTO_DIAS = 180
+
+# Pedidos em 'criado' mais antigos que isso são cancelados por
+# `manage.py expirar_pedidos` (não há estoque a liberar: a reserva é no pagamento).
+PEDIDO_CRIADO_EXPIRA_HORAS = 24
+
+# Renderização de mockups e arquivos de impressão (creations.render)
+# Processos do pool (padrão: um por núcleo)
+RENDER_WORKERS = None
+# Jobs pendentes/em execução por processo web antes de responder 503 (padrão: 4 por worker)
+RENDER_FILA_MAXIMA = None
+# Tempo máximo de cada job, em segundos
+RENDER_TIMEOUT = 60
+
+# Upload em partes do arquivo das artes (creations.uploads)
+# Pasta das partes recebidas; com mais de um servidor web, precisa ser compartilhada
+UPLOAD_ARTE_DIR = BASE_DIR / 'tmp' / 'uploads_arte'
+# Tamanho máximo do arquivo e de cada parte, em bytes
+UPLOAD_ARTE_TAMANHO_MAXIMO = 200 * 1024 * 1024
+UPLOAD_ARTE_PARTE_MAXIMA = 8 * 1024 * 1024
+# Uploads pendentes sem atividade há mais que isso são removidos por
+# `manage.py limpar_uploads_arte`
+UPLOAD_ARTE_EXPIRA_HORAS = 24
+
+# Estoque (products.estoque)
+# Partições do saldo de cada produto: reservas simultâneas do mesmo produto
+# baixam partições diferentes em vez de disputar uma única linha
+ESTOQUE_PARTICOES = 8
@@ -0,0 +1,15 @@
+from django import template
+
+from core import derivadas
+
+register = template.Library()
+
+
+@register.filter
+def miniatura(arquivo, tamanho='pequena'):
+    """
+    URL da miniatura WebP de uma imagem.
+
+    Uso: <img src="{{ produto.imagem|miniatura:'pequena' }}">
+    """
+    return derivadas.url(arquivo, tamanho, 'webp')
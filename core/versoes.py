@@ -0,0 +1,34 @@
+"""
+Versões no cache do Django para invalidação em massa.
+
+Quem guarda entradas no cache inclui a versão atual na chave; incrementar
+a versão invalida todas as entradas de uma vez, sem precisar conhecê-las
+(ver products.cache, creations.facetas, creations.feed e orders.precos).
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+
+def atual(chave):
+    """Versão atual (cria com 1 se ainda não existir ou tiver sido removida)"""
+    versao = cache.get(chave)
+    if versao is None:
+        cache.add(chave, 1, timeout=None)
+        versao = cache.get(chave, 1)
+    return versao
+
+
+def incrementar(chave):
+    """Incrementa a versão e retorna o novo valor"""
+    cache.add(chave, 1, timeout=None)
+    try:
+        return cache.incr(chave)
+    except ValueError:
+        # A chave sumiu entre o add e o incr (evicção)
+        cache.set(chave, 1, timeout=None)
+        return 1
+
+
+def incrementar_apos_commit(chave):
+    """Incrementa após o commit (antes dele, outro worker recachearia o estado antigo)"""
+    transaction.on_commit(lambda: incrementar(chave))
@@ -1,6 +1,9 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Colecao, Arte, Personalizacao
+
+from core import derivadas
+
+from .models import Colecao, Arte, Personalizacao, UploadArte
 
 
 @admin.register(Colecao)
@@ -10,6 +13,7 @@ class ColecaoAdmin(admin.ModelAdmin):
     search_fields = ('nome', 'descricao', 'artista__nome_artistico')
     readonly_fields = ('total_artes_display', 'criado_em')
     date_hierarchy = 'criado_em'
+    list_select_related = ('artista',)
 
     fieldsets = (
         ('Informações Básicas', {
@@ -33,12 +37,13 @@ class ColecaoAdmin(admin.ModelAdmin):
     artista_link.short_description = 'Artista'
 
     def total_artes_display(self, obj):
-        return obj.artes.count()
+        return obj.artes_ativas_count
     total_artes_display.short_description = 'Total de Artes'
 
     def total_artes(self, obj):
-        return obj.artes.count()
+        return obj.artes_ativas_count
     total_artes.short_description = '🎨 Artes'
+    total_artes.admin_order_field = 'artes_ativas_count'
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
@@ -90,7 +95,7 @@ class ArteAdmin(admin.ModelAdmin):
         if obj.arquivo:
             return format_html(
                 '<img src="{}" width="50" height="50" style="object-fit: cover; border-radius: 3px;" />',
-                obj.arquivo.url
+                derivadas.url(obj.arquivo, 'mini')
             )
         return "Sem imagem"
     preview_imagem.short_description = '🖼️'
@@ -99,7 +104,7 @@ class ArteAdmin(admin.ModelAdmin):
         if obj.arquivo:
             return format_html(
                 '<img src="{}" width="300" style="max-width: 100%; border-radius: 5px;" />',
-                obj.arquivo.url
+                derivadas.url(obj.arquivo, 'pequena')
             )
         return "Sem imagem"
     preview_imagem_grande.short_description = 'Pré-visualização'
@@ -118,7 +123,7 @@ class PersonalizacaoAdmin(admin.ModelAdmin):
     list_display = ('id', 'arte_link', 'exibir_texto', 'exibir_cor', 'preco_extra', 'criado_em')
     list_filter = ('arte__artista', 'arte__colecao', 'criado_em')
     search_fields = ('arte__nome', 'texto')
-    readonly_fields = ('cor_preview', 'criado_em', 'resumo_personalizacao')
+    readonly_fields = ('cor_preview', 'criado_em', 'resumo_personalizacao', 'hash_canonico')
     date_hierarchy = 'criado_em'
 
     fieldsets = (
@@ -133,7 +138,7 @@ class PersonalizacaoAdmin(admin.ModelAdmin):
             'description': 'Preço adicional desta personalização'
         }),
         ('Datas', {
-            'fields': ('criado_em',),
+            'fields': ('criado_em', 'hash_canonico'),
             'classes': ('collapse',)
         }),
     )
@@ -194,3 +199,15 @@ class PersonalizacaoAdmin(admin.ModelAdmin):
             if hasattr(request.user, 'artista'):
                 qs = qs.filter(arte__artista=request.user.artista) # type: ignore
         return qs
+
+
+@admin.register(UploadArte)
+class UploadArteAdmin(admin.ModelAdmin):
+    list_display = ('nome_arquivo', 'usuario', 'arte', 'recebido', 'tamanho', 'status', 'atualizado_em')
+    list_filter = ('status',)
+    search_fields = ('nome_arquivo', 'usuario__email')
+    list_select_related = ('usuario', 'arte')
+    readonly_fields = [campo.name for campo in UploadArte._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CreationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'creations'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,197 @@
+"""
+Busca aproximada (tolerante a erros de digitação) por nome de arte,
+coleção e artista.
+
+Os nomes são quebrados em trigramas, como no pg_trgm: texto sem acentos,
+em minúsculas, cada palavra com dois espaços antes e um depois
+('rosa' → '  r', ' ro', 'ros', 'osa', 'sa '). IndiceBusca/TrigramaBusca
+formam um índice invertido trigrama → nomes, mantido pelos signals de
+Arte, Colecao e Artista (ver creations.signals).
+
+A consulta busca, pelo índice de trigrama, só os nomes que compartilham
+algum trigrama com o termo, e ranqueia pela similaridade de Jaccard:
+
+    comuns / (trigramas do termo + trigramas do nome - comuns)
+"""
+import re
+import unicodedata
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Q, Value, When
+from django.db.models.functions import Cast
+from rest_framework.filters import SearchFilter
+
+from artists.models import Artista
+
+from .models import Arte, Colecao, IndiceBusca, TrigramaBusca
+
+# Similaridade mínima (mesmo padrão do pg_trgm)
+LIMIAR = 0.3
+LIMITE_RESULTADOS = 200
+
+# tipo → (modelo, campo com o nome)
+FONTES = {
+    'arte': (Arte, 'nome'),
+    'colecao': (Colecao, 'nome'),
+    'artista': (Artista, 'nome_artistico'),
+}
+
+
+def normalizar(texto):
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return re.sub(r'[^a-z0-9]+', ' ', texto.lower()).strip()
+
+
+def trigramas(texto):
+    resultado = set()
+    for palavra in normalizar(texto).split():
+        palavra = f'  {palavra} '
+        resultado.update(palavra[i:i + 3] for i in range(len(palavra) - 2))
+    return resultado
+
+
+# ----------------------------------------------------------------------------
+# Manutenção do índice
+# ----------------------------------------------------------------------------
+
+def indexar(tipo, objeto_id, texto):
+    """Atualiza o nome indexado do objeto (não faz nada se o nome não mudou)"""
+    texto = texto or ''
+    indice = IndiceBusca.objects.filter(tipo=tipo, objeto_id=objeto_id).first()
+    if indice is not None and indice.texto == texto:
+        return
+
+    conjunto = trigramas(texto)
+    with transaction.atomic():
+        if indice is None:
+            indice = IndiceBusca.objects.create(
+                tipo=tipo, objeto_id=objeto_id, texto=texto, total_trigramas=len(conjunto)
+            )
+        else:
+            indice.texto = texto
+            indice.total_trigramas = len(conjunto)
+            indice.save(update_fields=['texto', 'total_trigramas'])
+            indice.trigramas.all().delete()
+        TrigramaBusca.objects.bulk_create(
+            TrigramaBusca(indice=indice, trigrama=trigrama) for trigrama in conjunto
+        )
+
+
+def desindexar(tipo, objeto_id):
+    IndiceBusca.objects.filter(tipo=tipo, objeto_id=objeto_id).delete()
+
+
+def reindexar(tamanho_lote=1000):
+    """Reconstrói o índice inteiro (após alterações em massa que não disparam signals)"""
+    with transaction.atomic():
+        TrigramaBusca.objects.all().delete()
+        IndiceBusca.objects.all().delete()
+        for tipo, (modelo, campo) in FONTES.items():
+            nomes = modelo.objects.values_list('pk', campo).iterator(chunk_size=tamanho_lote)
+            lote = []
+            for objeto_id, texto in nomes:
+                lote.append((objeto_id, texto or ''))
+                if len(lote) >= tamanho_lote:
+                    _indexar_lote(tipo, lote)
+                    lote = []
+            _indexar_lote(tipo, lote)
+
+
+def _indexar_lote(tipo, nomes):
+    conjuntos = {objeto_id: trigramas(texto) for objeto_id, texto in nomes}
+    indices = IndiceBusca.objects.bulk_create(
+        IndiceBusca(tipo=tipo, objeto_id=objeto_id, texto=texto, total_trigramas=len(conjuntos[objeto_id]))
+        for objeto_id, texto in nomes
+    )
+    if indices and indices[0].pk is None:
+        # Bancos sem RETURNING: recarrega os ids
+        indices = IndiceBusca.objects.filter(tipo=tipo, objeto_id__in=conjuntos)
+    TrigramaBusca.objects.bulk_create(
+        TrigramaBusca(indice=indice, trigrama=trigrama)
+        for indice in indices
+        for trigrama in conjuntos[indice.objeto_id]
+    )
+
+
+# ----------------------------------------------------------------------------
+# Consulta
+# ----------------------------------------------------------------------------
+
+def buscar_similares(termo, tipos=None, limiar=LIMIAR, limite=LIMITE_RESULTADOS):
+    """
+    Retorna [(tipo, objeto_id, similaridade)] dos nomes parecidos com o termo,
+    do mais ao menos similar.
+    """
+    conjunto = trigramas(termo)
+    if not conjunto:
+        return []
+
+    indices = IndiceBusca.objects.filter(trigramas__trigrama__in=conjunto)
+    if tipos:
+        indices = indices.filter(tipo__in=tipos)
+    comuns = Cast(Count('trigramas'), FloatField())
+    resultados = (
+        indices.values('tipo', 'objeto_id', 'total_trigramas')
+        .annotate(
+            similaridade=comuns / (Value(float(len(conjunto))) + F('total_trigramas') - comuns)
+        )
+        .filter(similaridade__gte=limiar)
+        .order_by('-similaridade', 'objeto_id')[:limite]
+    )
+    return [(linha['tipo'], linha['objeto_id'], linha['similaridade']) for linha in resultados]
+
+
+def filtrar_por_similaridade(queryset, termo, campos, ordenar=True):
+    """
+    Filtra e ordena o queryset pela similaridade do termo com os nomes
+    indexados.
+
+    campos: {tipo: caminho no queryset}, ex. {'arte': 'pk',
+    'artista': 'artista_id'}. A relevância de cada linha é a maior
+    similaridade entre os nomes relacionados a ela; com ordenar=True, o
+    resultado sai nessa ordem.
+    """
+    similares = buscar_similares(termo, tipos=list(campos))
+    if not similares:
+        return queryset.none()
+
+    filtro = Q()
+    for tipo, caminho in campos.items():
+        ids = [objeto_id for t, objeto_id, _ in similares if t == tipo]
+        if ids:
+            filtro |= Q(**{f'{caminho}__in': ids})
+
+    # Os When estão em ordem decrescente de similaridade: vale o primeiro que casar
+    relevancia = Case(
+        *[When(**{campos[tipo]: objeto_id}, then=Value(similaridade)) for tipo, objeto_id, similaridade in similares],
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    queryset = queryset.filter(filtro).annotate(relevancia=relevancia)
+    if ordenar:
+        queryset = queryset.order_by('-relevancia', '-pk')
+    return queryset
+
+
+class BuscaFilter(SearchFilter):
+    """
+    SearchFilter com modo de busca aproximada.
+
+    ?search=termo                       → busca padrão (icontains)
+    ?search=termo&modo_busca=aproximada → trigramas, ordenada por relevância
+
+    A view define `campos_busca_aproximada` ({tipo: caminho}, ver
+    filtrar_por_similaridade). Sem ?ordering= explícito, ordena por
+    relevância; por isso deve vir depois do OrderingFilter.
+    """
+    modo_param = 'modo_busca'
+
+    def filter_queryset(self, request, queryset, view):
+        if request.query_params.get(self.modo_param) != 'aproximada':
+            return super().filter_queryset(request, queryset, view)
+        termo = request.query_params.get(self.search_param, '').strip()
+        if not termo:
+            return queryset
+        ordenar = 'ordering' not in request.query_params
+        return filtrar_por_similaridade(queryset, termo, view.campos_busca_aproximada, ordenar=ordenar)
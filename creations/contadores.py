@@ -0,0 +1,69 @@
+"""
+Contador desnormalizado de artes ativas por coleção (Colecao.artes_ativas_count).
+
+Os signals de Arte (ver creations.signals) aplicam deltas com F() quando uma
+arte é criada, removida, ativada/desativada ou muda de coleção. Alterações
+que não passam pelos signals (queryset.update, SQL direto) são corrigidas
+com recontar() / o comando recontar_artes_colecao.
+"""
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Arte, Colecao
+
+
+def ajustar(colecao_id, delta):
+    """Soma delta ao contador da coleção (sem ler a linha antes)"""
+    if colecao_id and delta:
+        Colecao.objects.filter(pk=colecao_id).update(
+            artes_ativas_count=F('artes_ativas_count') + delta
+        )
+
+
+def ao_salvar(anterior, arte):
+    """
+    Aplica a diferença entre o estado anterior da arte ((colecao_id, ativa),
+    ou None se ela acabou de ser criada) e o estado atual.
+    """
+    colecao_antes, ativa_antes = anterior or (None, False)
+    if (colecao_antes, ativa_antes) == (arte.colecao_id, arte.ativa):
+        return
+    if ativa_antes:
+        ajustar(colecao_antes, -1)
+    if arte.ativa:
+        ajustar(arte.colecao_id, +1)
+
+
+def ao_remover(arte):
+    if arte.ativa:
+        ajustar(arte.colecao_id, -1)
+
+
+def contagem_real():
+    """Subquery com a contagem de artes ativas de cada coleção (OuterRef('pk'))"""
+    artes = (
+        Arte.objects.filter(colecao=OuterRef('pk'), ativa=True)
+        .order_by()
+        .values('colecao')
+        .annotate(n=Count('id'))
+        .values('n')
+    )
+    return Coalesce(Subquery(artes), Value(0))
+
+
+def capa_colecao():
+    """Subquery com o arquivo da primeira arte ativa de cada coleção (capa da listagem)"""
+    return Subquery(
+        Arte.objects.filter(colecao=OuterRef('pk'), ativa=True).order_by('pk').values('arquivo')[:1]
+    )
+
+
+def recontar(queryset=None):
+    """Regrava o contador a partir das artes. Retorna quantas coleções estavam divergentes."""
+    if queryset is None:
+        queryset = Colecao.objects.all()
+    divergentes = queryset.annotate(real=contagem_real()).filter(~Q(artes_ativas_count=F('real')))
+    pks = list(divergentes.values_list('pk', flat=True))
+    if pks:
+        Colecao.objects.filter(pk__in=pks).update(artes_ativas_count=contagem_real())
+    return len(pks)
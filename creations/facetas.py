@@ -0,0 +1,63 @@
+"""
+Índice de artistas para os filtros das páginas de coleções e artes.
+
+Lista os artistas com coleções ou artes ativas e quantas de cada um têm.
+O resultado fica no cache do Django sob uma chave versionada; saves e
+deletes de Arte, Colecao e Artista incrementam a versão após o commit
+(ver creations.signals), e a próxima página reconstrói o índice com uma
+única consulta agregada.
+"""
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from artists.models import Artista
+from core import versoes
+
+from .models import Arte, Colecao
+
+CHAVE_VERSAO = 'creations:facetas:artistas:versao'
+TTL = 60 * 60
+
+
+def invalidar():
+    versoes.incrementar_apos_commit(CHAVE_VERSAO)
+
+
+def _contagem(modelo):
+    linhas = (
+        modelo.objects.filter(artista=OuterRef('pk'), ativa=True)
+        .order_by()
+        .values('artista')
+        .annotate(n=Count('id'))
+        .values('n')
+    )
+    return Coalesce(Subquery(linhas, output_field=IntegerField()), Value(0))
+
+
+def _construir():
+    artistas = (
+        Artista.objects.annotate(colecoes_ativas=_contagem(Colecao), artes_ativas=_contagem(Arte))
+        .filter(Q(colecoes_ativas__gt=0) | Q(artes_ativas__gt=0))
+        .order_by('nome_artistico', 'id')
+        .values('id', 'nome_artistico', 'colecoes_ativas', 'artes_ativas')
+    )
+    return list(artistas)
+
+
+def artistas():
+    """[{'id', 'nome_artistico', 'colecoes_ativas', 'artes_ativas'}] dos artistas com conteúdo ativo"""
+    chave = f'creations:facetas:artistas:{versoes.atual(CHAVE_VERSAO)}'
+    resultado = cache.get(chave)
+    if resultado is None:
+        resultado = _construir()
+        cache.set(chave, resultado, timeout=TTL)
+    return resultado
+
+
+def artistas_com_colecoes():
+    return [artista for artista in artistas() if artista['colecoes_ativas']]
+
+
+def artistas_com_artes():
+    return [artista for artista in artistas() if artista['artes_ativas']]
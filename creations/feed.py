@@ -0,0 +1,201 @@
+"""
+Feed "últimas artes" (página inicial).
+
+As FEED_TAMANHO artes ativas mais recentes ficam materializadas no cache,
+já serializadas, em ordem (criado_em, id) decrescente. Quando uma arte é
+criada ou ativada, ela entra no topo da lista, sem reconstruí-la (ver
+creations.signals). Qualquer outra alteração que afete o feed (desativação,
+remoção, renomear arte/coleção/artista) descarta a lista, que é remontada
+na próxima leitura com uma consulta só.
+
+As páginas são servidas como bytes JSON prontos, no cache, numa chave com
+a versão do feed e o host da requisição. A continuação usa um token opaco
+(criado_em, id), e não um OFFSET. Páginas além da parte materializada vêm
+do banco pela mesma condição de keyset.
+
+A lista materializada é montada fora de uma requisição (inclusive após o
+commit), com as URLs de `arquivo` e `imagens` relativas; elas viram
+absolutas na leitura, como nos demais endpoints. As derivadas da arte são geradas em segundo
+plano depois que ela entra no feed; quando ficam prontas, o feed é
+descartado para que `imagens` deixe de apontar para o original.
+"""
+import base64
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.http import HttpResponse
+from django.utils.dateparse import parse_datetime
+from rest_framework.renderers import JSONRenderer
+
+from core import derivadas, versoes
+
+from .models import Arte
+from .serializers import ArteSerializer
+
+FEED_TAMANHO = 200
+LIMITE_PADRAO = 20
+LIMITE_MAXIMO = 50
+
+CHAVE_FEED = 'creations:feed:ultimas'
+CHAVE_VERSAO = 'creations:feed:versao'
+CHAVE_LOCK = 'creations:feed:lock'
+TTL = 60 * 60
+TTL_LOCK = 5
+
+
+def codificar_token(criado_em, pk):
+    valor = f"{criado_em.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(valor.encode()).decode()
+
+
+def decodificar_token(token):
+    """Converte o token em (criado_em, id). Levanta ValueError se for inválido."""
+    try:
+        data, pk = base64.urlsafe_b64decode(token.encode()).decode().split('|')
+        return datetime.fromisoformat(data), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Token de continuação inválido")
+
+
+def limitar(limite):
+    """Converte o limite pedido pelo cliente, limitado a LIMITE_MAXIMO"""
+    if limite in (None, ''):
+        return LIMITE_PADRAO
+    try:
+        limite = int(limite)
+    except (TypeError, ValueError):
+        raise ValueError("limite deve ser um número inteiro")
+    return max(1, min(limite, LIMITE_MAXIMO))
+
+
+def _queryset():
+    return (
+        Arte.objects.filter(ativa=True)
+        .select_related('artista', 'colecao')
+        .order_by('-criado_em', '-id')
+    )
+
+
+def _entrada(arte):
+    """Arte serializada + a chave de ordenação usada pelos tokens"""
+    return {'chave': (arte.criado_em.isoformat(), arte.pk), 'dados': ArteSerializer(arte).data}
+
+
+# ----------------------------------------------------------------------------
+# Manutenção
+# ----------------------------------------------------------------------------
+
+def _materializado():
+    entradas = cache.get(CHAVE_FEED)
+    if entradas is None:
+        entradas = [_entrada(arte) for arte in _queryset()[:FEED_TAMANHO]]
+        cache.set(CHAVE_FEED, entradas, timeout=TTL)
+    return entradas
+
+
+def _descartar():
+    cache.delete(CHAVE_FEED)
+    versoes.incrementar(CHAVE_VERSAO)
+
+
+def _publicar(pk):
+    arte = _queryset().filter(pk=pk).first()
+    if arte is None:
+        return
+    entradas = cache.get(CHAVE_FEED)
+    # Outro processo atualizando ao mesmo tempo: descarta em vez de arriscar perder a arte
+    if entradas is None or not cache.add(CHAVE_LOCK, 1, timeout=TTL_LOCK):
+        _descartar()
+        return
+    try:
+        nova = _entrada(arte)
+        entradas = [entrada for entrada in entradas if entrada['chave'][1] != pk]
+        if entradas and _ordem(nova['chave']) < _ordem(entradas[0]['chave']):
+            # Mais antiga que o topo (ex.: arte antiga reativada): remonta a lista
+            cache.delete(CHAVE_FEED)
+        else:
+            cache.set(CHAVE_FEED, [nova, *entradas][:FEED_TAMANHO], timeout=TTL)
+        versoes.incrementar(CHAVE_VERSAO)
+    finally:
+        cache.delete(CHAVE_LOCK)
+
+
+def publicar(arte):
+    """Coloca a arte (recém-criada ou ativada) no topo do feed, após o commit"""
+    pk = arte.pk
+    transaction.on_commit(lambda: _publicar(pk))
+
+
+def invalidar():
+    """Descarta o feed materializado após o commit"""
+    transaction.on_commit(_descartar)
+
+
+# ----------------------------------------------------------------------------
+# Leitura
+# ----------------------------------------------------------------------------
+
+def _ordem(chave):
+    return parse_datetime(chave[0]), chave[1]
+
+
+def _absoluta(dados, request):
+    if request is None:
+        return dados
+    return {
+        **dados,
+        'arquivo': dados['arquivo'] and request.build_absolute_uri(dados['arquivo']),
+        'imagens': derivadas.absolutas(dados['imagens'], request),
+    }
+
+
+def pagina(token=None, limite=LIMITE_PADRAO, request=None):
+    """
+    Retorna {'results': [...], 'proximo': token ou None}.
+
+    Com `request`, as URLs de `arquivo` e `imagens` saem absolutas.
+
+    Levanta ValueError para tokens inválidos.
+    """
+    posicao = decodificar_token(token) if token else None
+    entradas = _materializado()
+
+    inicio = 0
+    if posicao:
+        inicio = next(
+            (i for i, entrada in enumerate(entradas) if _ordem(entrada['chave']) < posicao),
+            len(entradas),
+        )
+    itens = [entrada['dados'] for entrada in entradas[inicio:inicio + limite + 1]]
+
+    if len(itens) <= limite and len(entradas) >= FEED_TAMANHO:
+        # Além da parte materializada: continua pelo banco a partir do último item
+        if itens:
+            data, pk = _ordem(entradas[inicio + len(itens) - 1]['chave'])
+        else:
+            data, pk = posicao or (None, None)
+        consulta = _queryset()
+        if data is not None:
+            consulta = consulta.filter(Q(criado_em__lt=data) | Q(criado_em=data, id__lt=pk))
+        itens += [ArteSerializer(arte).data for arte in consulta[:limite + 1 - len(itens)]]
+
+    proximo = None
+    if len(itens) > limite:
+        itens = itens[:limite]
+        dados_ultimo = itens[-1]
+        proximo = codificar_token(parse_datetime(dados_ultimo['criado_em']), dados_ultimo['id'])
+    return {'results': [_absoluta(dados, request) for dados in itens], 'proximo': proximo}
+
+
+def resposta_json(request, token, limite):
+    """Página do feed como bytes JSON, do cache ou montada agora"""
+    # As URLs absolutas dependem do host: uma página em cache por host
+    base = request.build_absolute_uri('/')
+    chave = f'creations:feed:pagina:{versoes.atual(CHAVE_VERSAO)}:{base}:{token or ""}:{limite}'
+    conteudo = cache.get(chave)
+    if conteudo is None:
+        conteudo = JSONRenderer().render(pagina(token, limite, request))
+        cache.set(chave, conteudo, timeout=TTL)
+    return HttpResponse(conteudo, content_type='application/json')
@@ -0,0 +1,69 @@
+"""
+Arquivo de impressão de uma arte.
+
+A arte é recortada na proporção da área de impressão da capinha e
+redimensionada para a resolução de impressão (DPI), em RGB sem
+transparência. Como os mockups, os arquivos são endereçados pelo hash da
+entrada (MEDIA_ROOT/impressao/) e gerados uma única vez.
+"""
+import hashlib
+import json
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+PASTA = 'impressao'
+VERSAO = 1
+
+DPI = 300
+# Área de impressão (mm)
+LARGURA_MM, ALTURA_MM = 80, 160
+FUNDO = (255, 255, 255)
+
+
+def _pixels(mm):
+    return round(mm / 25.4 * DPI)
+
+
+def dados(arte):
+    return {'arte': arte.arquivo.name if arte.arquivo else None}
+
+
+def chave(entrada):
+    conteudo = json.dumps([VERSAO, DPI, LARGURA_MM, ALTURA_MM, entrada], sort_keys=True)
+    return hashlib.sha256(conteudo.encode()).hexdigest()
+
+
+def caminho(entrada):
+    hash_ = chave(entrada)
+    return f'{PASTA}/{hash_[:2]}/{hash_}.png'
+
+
+def renderizar(entrada):
+    """Gera o arquivo de impressão (se ainda não existir) e retorna o caminho no storage"""
+    from PIL import Image, ImageOps
+
+    destino = caminho(entrada)
+    if default_storage.exists(destino):
+        return destino
+    if not entrada['arte']:
+        raise ValueError("Arte sem arquivo")
+
+    try:
+        with default_storage.open(entrada['arte'], 'rb') as arquivo:
+            imagem = ImageOps.exif_transpose(Image.open(arquivo))
+            imagem.load()
+    except OSError as e:
+        raise ValueError(f"Não foi possível ler a arte: {e}")
+
+    imagem = ImageOps.fit(imagem.convert('RGBA'), (_pixels(LARGURA_MM), _pixels(ALTURA_MM)), Image.LANCZOS)
+    fundo = Image.new('RGB', imagem.size, FUNDO)
+    fundo.paste(imagem, (0, 0), imagem)
+
+    buffer = BytesIO()
+    fundo.save(buffer, 'PNG', dpi=(DPI, DPI))
+    salvo = default_storage.save(destino, ContentFile(buffer.getvalue()))
+    if salvo != destino:
+        default_storage.delete(salvo)
+    return destino
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from creations.models import Personalizacao
+
+
+class Command(BaseCommand):
+    """
+    Unifica personalizações idênticas criadas antes do hash canônico.
+
+    Para cada linha sem hash_canonico: se já existe a linha canônica, as
+    referências (itens de pedido, itens arquivados etc.) passam a apontar
+    para ela e a duplicada é removida; senão, a linha vira a canônica.
+    A canônica pode ficar compartilhada por pedidos de clientes diferentes:
+    ela nunca é alterada no lugar (ver PersonalizacaoSerializer.update).
+    """
+    help = 'Remove personalizações duplicadas, reapontando as referências para a canônica.'
+
+    def handle(self, *args, **options):
+        relacoes = [
+            campo for campo in Personalizacao._meta.get_fields(include_hidden=True)
+            if (campo.one_to_many or campo.one_to_one) and campo.auto_created
+        ]
+        unificadas = promovidas = 0
+        for duplicada in Personalizacao.objects.filter(hash_canonico__isnull=True).order_by('id').iterator():
+            with transaction.atomic():
+                valor = Personalizacao.calcular_hash(
+                    duplicada.arte_id, duplicada.produto_id, duplicada.texto,
+                    duplicada.fonte, duplicada.cor, duplicada.preco_extra,
+                )
+                canonica = Personalizacao.objects.filter(hash_canonico=valor).first()
+                if canonica is None:
+                    duplicada.save(update_fields=['hash_canonico'])
+                    promovidas += 1
+                    continue
+                for relacao in relacoes:
+                    nome = relacao.field.name
+                    relacao.related_model._base_manager.filter(**{nome: duplicada.pk}).update(**{nome: canonica.pk})
+                duplicada.delete()
+                unificadas += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{unificadas} personalização(ões) unificada(s), {promovidas} marcada(s) como canônica(s).'
+        ))
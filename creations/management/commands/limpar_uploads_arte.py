@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from creations import uploads
+
+
+class Command(BaseCommand):
+    """
+    Remove uploads em partes abandonados (pendentes sem atividade há mais
+    de UPLOAD_ARTE_EXPIRA_HORAS) e os arquivos temporários deles.
+    """
+    help = 'Remove uploads de arte pendentes e expirados.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horas', type=int, default=None, help='Sobrepõe UPLOAD_ARTE_EXPIRA_HORAS')
+
+    def handle(self, *args, **options):
+        total = uploads.limpar(options['horas'])
+        self.stdout.write(self.style.SUCCESS(f'{total} upload(s) removido(s).'))
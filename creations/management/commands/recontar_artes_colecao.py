@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from creations import contadores
+
+
+class Command(BaseCommand):
+    """
+    Recalcula Colecao.artes_ativas_count a partir das artes.
+
+    Necessário depois de alterações em massa em Arte (queryset.update,
+    SQL direto), que não passam pelos signals.
+    """
+    help = 'Corrige o contador de artes ativas das coleções.'
+
+    def handle(self, *args, **options):
+        total = contadores.recontar()
+        if total:
+            self.stdout.write(self.style.SUCCESS(f'{total} coleção(ões) corrigida(s).'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Nenhuma divergência encontrada.'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from creations import busca
+
+
+class Command(BaseCommand):
+    """
+    Reconstrói o índice de trigramas da busca aproximada.
+
+    Necessário depois de alterações em massa (queryset.update, SQL direto)
+    em nomes de artes, coleções ou artistas, que não passam pelos signals.
+    """
+    help = 'Reconstrói o índice de busca aproximada de artes, coleções e artistas.'
+
+    def handle(self, *args, **options):
+        busca.reindexar()
+        self.stdout.write(self.style.SUCCESS('Índice de busca aproximada reconstruído.'))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:20
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def preencher_contador(apps, schema_editor):
+    Colecao = apps.get_model('creations', 'Colecao')
+    Arte = apps.get_model('creations', 'Arte')
+    artes = (
+        Arte.objects.filter(colecao=OuterRef('pk'), ativa=True)
+        .order_by()
+        .values('colecao')
+        .annotate(n=Count('id'))
+        .values('n')
+    )
+    Colecao.objects.update(artes_ativas_count=Coalesce(Subquery(artes), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('creations', '0004_alter_arte_options_alter_colecao_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='colecao',
+            name='artes_ativas_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(preencher_contador, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:24
+
+import hashlib
+import json
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def _hash(p):
+    # Cópia de Personalizacao.calcular_hash no momento desta migração
+    canonico = [
+        p.arte_id,
+        p.produto_id,
+        ' '.join((p.texto or '').split()),
+        (p.fonte or '').strip().lower(),
+        (p.cor or '').strip().lower(),
+        str(Decimal(p.preco_extra or 0).quantize(Decimal('0.01'))),
+    ]
+    return hashlib.sha256(json.dumps(canonico, ensure_ascii=False).encode()).hexdigest()
+
+
+def preencher_hash(apps, schema_editor):
+    """
+    Preenche o hash da linha mais antiga de cada combinação. As duplicadas
+    ficam com NULL até `manage.py deduplicar_personalizacoes` unificá-las.
+    """
+    Personalizacao = apps.get_model('creations', 'Personalizacao')
+    vistos = set()
+    lote = []
+    for personalizacao in Personalizacao.objects.order_by('id').iterator(chunk_size=2000):
+        valor = _hash(personalizacao)
+        if valor in vistos:
+            continue
+        vistos.add(valor)
+        personalizacao.hash_canonico = valor
+        lote.append(personalizacao)
+        if len(lote) >= 1000:
+            Personalizacao.objects.bulk_update(lote, ['hash_canonico'])
+            lote = []
+    Personalizacao.objects.bulk_update(lote, ['hash_canonico'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('creations', '0005_colecao_artes_ativas_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='personalizacao',
+            name='hash_canonico',
+            field=models.CharField(editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.RunPython(preencher_hash, migrations.RunPython.noop),
+    ]
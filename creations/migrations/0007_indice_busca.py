@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def preencher_indice(apps, schema_editor):
+    from creations.busca import trigramas
+
+    IndiceBusca = apps.get_model('creations', 'IndiceBusca')
+    TrigramaBusca = apps.get_model('creations', 'TrigramaBusca')
+    fontes = [
+        ('arte', apps.get_model('creations', 'Arte'), 'nome'),
+        ('colecao', apps.get_model('creations', 'Colecao'), 'nome'),
+        ('artista', apps.get_model('artists', 'Artista'), 'nome_artistico'),
+    ]
+    for tipo, modelo, campo in fontes:
+        for objeto_id, texto in modelo.objects.values_list('pk', campo).iterator():
+            conjunto = trigramas(texto)
+            indice = IndiceBusca.objects.create(
+                tipo=tipo, objeto_id=objeto_id, texto=texto or '', total_trigramas=len(conjunto)
+            )
+            TrigramaBusca.objects.bulk_create(
+                TrigramaBusca(indice=indice, trigrama=trigrama) for trigrama in conjunto
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artists', '0002_alter_artista_options_and_more'),
+        ('creations', '0006_personalizacao_hash_canonico'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndiceBusca',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('arte', 'Arte'), ('colecao', 'Coleção'), ('artista', 'Artista')], max_length=10)),
+                ('objeto_id', models.PositiveIntegerField()),
+                ('texto', models.CharField(max_length=150)),
+                ('total_trigramas', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Índice de Busca',
+                'verbose_name_plural': 'Índice de Busca',
+                'constraints': [models.UniqueConstraint(fields=('tipo', 'objeto_id'), name='indice_busca_tipo_objeto_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TrigramaBusca',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigrama', models.CharField(max_length=3)),
+                ('indice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigramas', to='creations.indicebusca')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['trigrama', 'indice'], name='trigrama_busca_idx')],
+            },
+        ),
+        migrations.RunPython(preencher_indice, migrations.RunPython.noop),
+    ]
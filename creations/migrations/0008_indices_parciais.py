@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artists', '0003_artista_artista_ativo_vendas_idx'),
+        ('creations', '0007_indice_busca'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='arte',
+            options={'ordering': ['-criado_em']},
+        ),
+        migrations.RemoveIndex(
+            model_name='colecao',
+            name='creations_c_artista_9ae786_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='colecao',
+            name='creations_c_criado__ff6100_idx',
+        ),
+        migrations.AddIndex(
+            model_name='arte',
+            index=models.Index(condition=models.Q(('ativa', True)), fields=['criado_em', 'id'], name='arte_ativa_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='arte',
+            index=models.Index(condition=models.Q(('ativa', True)), fields=['artista', 'criado_em'], name='arte_ativa_artista_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='arte',
+            index=models.Index(condition=models.Q(('ativa', True)), fields=['colecao', 'criado_em'], name='arte_ativa_colecao_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='colecao',
+            index=models.Index(condition=models.Q(('ativa', True)), fields=['criado_em'], name='colecao_ativa_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='colecao',
+            index=models.Index(condition=models.Q(('ativa', True)), fields=['artista', 'criado_em'], name='colecao_ativa_artista_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:32
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('creations', '0008_indices_parciais'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadArte',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('dados_arte', models.JSONField(blank=True, default=dict)),
+                ('nome_arquivo', models.CharField(max_length=255)),
+                ('tamanho', models.PositiveBigIntegerField(help_text='Tamanho total do arquivo, em bytes')),
+                ('sha256', models.CharField(help_text='SHA-256 do arquivo completo (hexadecimal)', max_length=64)),
+                ('recebido', models.PositiveBigIntegerField(default=0)),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('concluido', 'Concluído')], default='pendente', max_length=10)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('arte', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to='creations.arte')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads_arte', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Upload de Arte',
+                'verbose_name_plural': 'Uploads de Arte',
+                'indexes': [models.Index(fields=['status', 'atualizado_em'], name='creations_u_status_534aa0_idx')],
+            },
+        ),
+    ]
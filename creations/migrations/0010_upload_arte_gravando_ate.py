@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('creations', '0009_upload_arte'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadarte',
+            name='gravando_ate',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,165 @@
+"""
+Mockup (pré-visualização) de uma personalização aplicada ao produto.
+
+A imagem é composta no servidor: corpo da capinha na cor escolhida (ou a
+foto do produto, quando houver), a arte centralizada e o texto na fonte
+escolhida, tudo recortado no formato do aparelho.
+
+Os arquivos ficam em MEDIA_ROOT/mockups/, com nome igual ao hash do
+conteúdo de entrada (arquivo da arte, texto, fonte, cor e produto): duas
+personalizações idênticas apontam para o mesmo arquivo e só são
+renderizadas uma vez.
+
+A renderização recebe só dados simples (ver dados()), para poder rodar
+em outro processo.
+"""
+import hashlib
+import json
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+PASTA = 'mockups'
+
+# Muda quando o desenho do mockup muda, invalidando os arquivos antigos
+VERSAO = 1
+
+LARGURA, ALTURA = 600, 1200
+RAIO_CANTO = 90
+MARGEM_ARTE = 0.12
+TAMANHO_FONTE = 56
+COR_PADRAO = '#f2f2f2'
+
+
+def dados(personalizacao):
+    """Entradas da renderização como dict serializável"""
+    arte = personalizacao.arte
+    produto = personalizacao.produto
+    return {
+        'arte': arte.arquivo.name if arte and arte.arquivo else None,
+        'texto': personalizacao.texto or '',
+        'fonte': personalizacao.fonte or '',
+        'cor': personalizacao.cor or '',
+        'produto': produto.pk if produto else None,
+        'produto_imagem': produto.imagem.name if produto and produto.imagem else None,
+    }
+
+
+def chave(entrada):
+    """Hash do conteúdo de entrada (identifica o arquivo do mockup)"""
+    conteudo = json.dumps([VERSAO, entrada], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(conteudo.encode()).hexdigest()
+
+
+def caminho(entrada):
+    hash_ = chave(entrada)
+    return f'{PASTA}/{hash_[:2]}/{hash_}.png'
+
+
+def existe(entrada):
+    return default_storage.exists(caminho(entrada))
+
+
+def url(entrada):
+    return default_storage.url(caminho(entrada))
+
+
+def _fonte(nome, tamanho):
+    from PIL import ImageFont
+
+    pasta = getattr(settings, 'MOCKUP_FONTES_DIR', settings.BASE_DIR / 'static' / 'fonts')
+    if nome:
+        base = os.path.basename(nome)
+        for candidato in (os.path.join(pasta, base), os.path.join(pasta, f'{base}.ttf'), base, f'{base}.ttf'):
+            try:
+                return ImageFont.truetype(candidato, tamanho)
+            except OSError:
+                continue
+    return ImageFont.load_default(tamanho)
+
+
+def _cor(valor, padrao=COR_PADRAO):
+    from PIL import ImageColor
+
+    for candidato in (valor, padrao):
+        try:
+            return ImageColor.getrgb(candidato)
+        except (ValueError, AttributeError):
+            continue
+
+
+def _abrir(nome):
+    from PIL import Image, ImageOps
+
+    with default_storage.open(nome, 'rb') as arquivo:
+        imagem = Image.open(arquivo)
+        imagem = ImageOps.exif_transpose(imagem)
+        imagem.load()
+    return imagem.convert('RGBA')
+
+
+def _desenhar(entrada):
+    from PIL import Image, ImageDraw, ImageOps
+
+    mascara = Image.new('L', (LARGURA, ALTURA), 0)
+    ImageDraw.Draw(mascara).rounded_rectangle(
+        (0, 0, LARGURA - 1, ALTURA - 1), radius=RAIO_CANTO, fill=255
+    )
+
+    cor = _cor(entrada['cor'])
+    if entrada['produto_imagem']:
+        base = ImageOps.fit(_abrir(entrada['produto_imagem']), (LARGURA, ALTURA))
+    else:
+        base = Image.new('RGBA', (LARGURA, ALTURA), cor + (255,))
+
+    if entrada['arte']:
+        arte = _abrir(entrada['arte'])
+        limite = int(LARGURA * (1 - 2 * MARGEM_ARTE))
+        arte.thumbnail((limite, limite), Image.LANCZOS)
+        posicao = ((LARGURA - arte.width) // 2, (ALTURA - arte.height) // 2)
+        base.alpha_composite(arte, posicao)
+
+    # Módulo de câmera
+    desenho = ImageDraw.Draw(base)
+    desenho.rounded_rectangle((40, 40, 220, 260), radius=50, fill=(30, 30, 30, 255))
+
+    if entrada['texto']:
+        fonte = _fonte(entrada['fonte'], TAMANHO_FONTE)
+        # Texto em preto ou branco, o que contrastar mais com a cor da capinha
+        luminancia = 0.299 * cor[0] + 0.587 * cor[1] + 0.114 * cor[2]
+        cor_texto = (20, 20, 20, 255) if luminancia > 140 else (245, 245, 245, 255)
+        desenho.text(
+            (LARGURA // 2, ALTURA - 140), entrada['texto'],
+            font=fonte, fill=cor_texto, anchor='mm',
+        )
+
+    mockup = Image.new('RGBA', (LARGURA, ALTURA), (0, 0, 0, 0))
+    mockup.paste(base, (0, 0), mascara)
+    return mockup
+
+
+def renderizar(entrada):
+    """
+    Gera o mockup (se ainda não existir) e retorna o caminho no storage.
+
+    Levanta ValueError se algum arquivo de entrada não puder ser lido.
+    """
+    destino = caminho(entrada)
+    if default_storage.exists(destino):
+        return destino
+
+    try:
+        mockup = _desenhar(entrada)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Não foi possível renderizar o mockup: {e}")
+
+    buffer = BytesIO()
+    mockup.save(buffer, 'PNG', optimize=True)
+    salvo = default_storage.save(destino, ContentFile(buffer.getvalue()))
+    if salvo != destino:
+        # Outro processo gravou o mesmo mockup ao mesmo tempo; o conteúdo é idêntico
+        default_storage.delete(salvo)
+    return destino
@@ -1,5 +1,13 @@
 # pyright: reportRedeclaration=false
+import hashlib
+import json
+import uuid
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Q
 from artists.models import Artista
 
 
@@ -18,14 +26,17 @@ class Colecao(models.Model):
         null=True
     )
     ativa = models.BooleanField(default=True)
+    # Mantido pelos signals de Arte (ver creations.contadores)
+    artes_ativas_count = models.PositiveIntegerField(default=0, editable=False)
     criado_em = models.DateTimeField(auto_now_add=True)
     atualizado_em = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-criado_em']
         indexes = [
-            models.Index(fields=['artista', 'ativa']),
-            models.Index(fields=['criado_em']),
+            # Índices parciais: as listagens só leem coleções ativas
+            models.Index(fields=['criado_em'], condition=Q(ativa=True), name='colecao_ativa_criado_idx'),
+            models.Index(fields=['artista', 'criado_em'], condition=Q(ativa=True), name='colecao_ativa_artista_idx'),
         ]
 
     def __str__(self):
@@ -33,7 +44,7 @@ class Colecao(models.Model):
 
     @property
     def total_artes(self):
-        return self.artes.filter(ativa=True).count() # type: ignore
+        return self.artes_ativas_count
 
 class Arte(models.Model):
     artista = models.ForeignKey(
@@ -55,12 +66,13 @@ class Arte(models.Model):
     criado_em = models.DateTimeField(auto_now_add=True)
     atualizado_em = models.DateTimeField(auto_now=True)
 
-    class Metadata:
+    class Meta:
         ordering = ['-criado_em']
         indexes = [
-            models.Index(fields=['artista', 'ativa']),
-            models.Index(fields=['colecao', 'ativa']),
-            models.Index(fields=['criado_em']),
+            # Índices parciais: as listagens, o feed e os contadores só leem artes ativas
+            models.Index(fields=['criado_em', 'id'], condition=Q(ativa=True), name='arte_ativa_criado_idx'),
+            models.Index(fields=['artista', 'criado_em'], condition=Q(ativa=True), name='arte_ativa_artista_idx'),
+            models.Index(fields=['colecao', 'criado_em'], condition=Q(ativa=True), name='arte_ativa_colecao_idx'),
         ]
 
     def __str__(self):
@@ -99,6 +111,9 @@ class Personalizacao(models.Model):
         decimal_places=2,
         default=0  # type: ignore
     )
+    # Hash da combinação arte/produto/texto/fonte/cor/preço: personalizações
+    # idênticas são a mesma linha (ver PersonalizacaoSerializer.create)
+    hash_canonico = models.CharField(max_length=64, unique=True, null=True, editable=False)
 
     criado_em = models.DateTimeField(auto_now_add=True)
     atualizado_em = models.DateTimeField(auto_now=True)
@@ -109,4 +124,154 @@ class Personalizacao(models.Model):
         verbose_name_plural = "Personalizações"
 
     def __str__(self):
-        return f'Personalização #{self.id}' # type: ignore
\ No newline at end of file
+        return f'Personalização #{self.id}' # type: ignore
+
+    @staticmethod
+    def calcular_hash(arte_id, produto_id, texto='', fonte='', cor='', preco_extra=0):
+        """
+        Hash canônico de uma personalização.
+
+        Normaliza espaços do texto, caixa da fonte e da cor e o preço com duas
+        casas, para que variações irrelevantes caiam no mesmo hash.
+        """
+        canonico = [
+            arte_id,
+            produto_id,
+            ' '.join((texto or '').split()),
+            (fonte or '').strip().lower(),
+            (cor or '').strip().lower(),
+            str(Decimal(preco_extra or 0).quantize(Decimal('0.01'))),
+        ]
+        return hashlib.sha256(json.dumps(canonico, ensure_ascii=False).encode()).hexdigest()
+
+    def atualizar_hash(self):
+        """
+        Recalcula o hash a partir dos campos atuais.
+
+        Duplicadas legadas (sem hash, criadas antes dele e idênticas a uma
+        linha canônica) continuam sem hash até `deduplicar_personalizacoes`:
+        gravar o hash violaria a unicidade.
+        """
+        novo = self.calcular_hash(
+            self.arte_id, self.produto_id, self.texto, self.fonte, self.cor, self.preco_extra  # type: ignore
+        )
+        if novo != self.hash_canonico:
+            legada = (
+                self.pk is not None and self.hash_canonico is None
+                and Personalizacao.objects.filter(hash_canonico=novo).exclude(pk=self.pk).exists()
+            )
+            if not legada:
+                self.hash_canonico = novo
+        return self.hash_canonico
+
+    def referenciada(self):
+        """Se algum item de pedido (inclusive arquivado) aponta para esta personalização"""
+        for relacao in self._meta.get_fields(include_hidden=True):
+            if (relacao.one_to_many or relacao.one_to_one) and relacao.auto_created:
+                if relacao.related_model._base_manager.filter(**{relacao.field.name: self.pk}).exists():
+                    return True
+        return False
+
+    def clean(self):
+        super().clean()
+        hash_canonico = self.atualizar_hash()
+        if hash_canonico is None:
+            return
+        duplicada = Personalizacao.objects.filter(hash_canonico=hash_canonico).exclude(pk=self.pk).first()
+        if duplicada:
+            raise ValidationError(f'Já existe uma personalização idêntica (#{duplicada.pk}).')
+
+    def save(self, *args, **kwargs):
+        self.atualizar_hash()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'hash_canonico' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'hash_canonico']
+        super().save(*args, **kwargs)
+
+class IndiceBusca(models.Model):
+    """
+    Nome indexado para a busca aproximada (ver creations.busca).
+
+    Um registro por arte, coleção ou artista, com os trigramas do nome em
+    TrigramaBusca. Mantido pelos signals de Arte, Colecao e Artista.
+    """
+    TIPO_CHOICES = [
+        ('arte', 'Arte'),
+        ('colecao', 'Coleção'),
+        ('artista', 'Artista'),
+    ]
+
+    tipo = models.CharField(max_length=10, choices=TIPO_CHOICES)
+    objeto_id = models.PositiveIntegerField()
+    texto = models.CharField(max_length=150)
+    total_trigramas = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Índice de Busca'
+        verbose_name_plural = 'Índice de Busca'
+        constraints = [
+            models.UniqueConstraint(fields=['tipo', 'objeto_id'], name='indice_busca_tipo_objeto_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.tipo} #{self.objeto_id}: {self.texto}'
+
+
+class TrigramaBusca(models.Model):
+    """Trigramas de cada nome indexado (índice invertido trigrama → nomes)"""
+    indice = models.ForeignKey(IndiceBusca, on_delete=models.CASCADE, related_name='trigramas')
+    trigrama = models.CharField(max_length=3)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['trigrama', 'indice'], name='trigrama_busca_idx'),
+        ]
+
+
+class UploadArte(models.Model):
+    """
+    Envio em partes (retomável) do arquivo de uma arte (ver creations.uploads).
+
+    Aponta para a arte cujo arquivo será substituído ou, se `arte` estiver
+    vazio, guarda em `dados_arte` os campos da arte criada na conclusão.
+    """
+    STATUS_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('concluido', 'Concluído'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='uploads_arte'
+    )
+    arte = models.ForeignKey(
+        Arte,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='uploads'
+    )
+    # nome/descricao/colecao da arte a criar
+    dados_arte = models.JSONField(default=dict, blank=True)
+    nome_arquivo = models.CharField(max_length=255)
+    tamanho = models.PositiveBigIntegerField(help_text='Tamanho total do arquivo, em bytes')
+    sha256 = models.CharField(max_length=64, help_text='SHA-256 do arquivo completo (hexadecimal)')
+    # Bytes já gravados; a próxima parte começa nesse offset
+    recebido = models.PositiveBigIntegerField(default=0)
+    # Reserva da parte em gravação: até quando o offset `recebido` é de quem o reservou
+    gravando_ate = models.DateTimeField(null=True, blank=True, editable=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pendente')
+    criado_em = models.DateTimeField(auto_now_add=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Upload de Arte'
+        verbose_name_plural = 'Uploads de Arte'
+        indexes = [
+            models.Index(fields=['status', 'atualizado_em']),
+        ]
+
+    def __str__(self):
+        return f'{self.nome_arquivo} ({self.recebido}/{self.tamanho})'
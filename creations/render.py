@@ -0,0 +1,228 @@
+"""
+Fila local de renderização (mockups e arquivos de impressão).
+
+A renderização é trabalho de CPU com Pillow; em vez de rodar na thread da
+requisição, os jobs vão para um ProcessPoolExecutor com um worker por
+núcleo (RENDER_WORKERS). Regras:
+
+- Fila limitada: com RENDER_FILA_MAXIMA jobs pendentes ou em execução no
+  processo, submeter() levanta FilaCheia e a API responde 503 com
+  Retry-After (o cliente tenta de novo mais tarde).
+- Timeout por job (RENDER_TIMEOUT segundos), aplicado dentro do processo
+  filho com SIGALRM; o job termina como 'expirado'.
+- Jobs idênticos são deduplicados: o id é o tipo + hash da entrada, o mesmo
+  que nomeia o arquivo gerado.
+
+O estado de cada job fica no cache do Django (compartilhado entre os
+processos web quando o backend de cache é), e é consultado pelo endpoint
+de status (/renders/<id>/), com long polling opcional. Só os usuários que
+submeteram o job (ou superusuários) consultam o status.
+"""
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.urls import reverse
+
+from . import impressao, mockups
+
+TIPOS = {
+    'mockup': mockups,
+    'impressao': impressao,
+}
+
+PENDENTE = 'pendente'
+EXECUTANDO = 'executando'
+CONCLUIDO = 'concluido'
+ERRO = 'erro'
+EXPIRADO = 'expirado'
+FINAIS = {CONCLUIDO, ERRO, EXPIRADO}
+
+TTL_ESTADO = 60 * 60
+ESPERA_MAXIMA = 20
+INTERVALO_ESPERA = 0.25
+
+
+class FilaCheia(Exception):
+    """A fila de renderização atingiu o limite; tente novamente mais tarde"""
+
+
+class TempoEsgotado(Exception):
+    """O job passou de RENDER_TIMEOUT (não herda de OSError, que os renderizadores tratam)"""
+
+
+_executor = None
+_lock = threading.Lock()
+_em_andamento = {}  # id do job → Future
+
+
+def _workers():
+    return getattr(settings, 'RENDER_WORKERS', None) or os.cpu_count() or 1
+
+
+def _fila_maxima():
+    return getattr(settings, 'RENDER_FILA_MAXIMA', None) or _workers() * 4
+
+
+def _timeout():
+    return getattr(settings, 'RENDER_TIMEOUT', 60)
+
+
+def _inicializar_worker():
+    import django
+    django.setup()
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        # spawn: o processo web tem threads, e fork com threads não é seguro
+        _executor = ProcessPoolExecutor(
+            max_workers=_workers(),
+            mp_context=get_context('spawn'),
+            initializer=_inicializar_worker,
+        )
+    return _executor
+
+
+def _estourou(signum, frame):
+    raise TempoEsgotado("Tempo limite de renderização excedido")
+
+
+def _executar(tipo, entrada, timeout):
+    """Roda no processo filho"""
+    alarme = hasattr(signal, 'SIGALRM')
+    if alarme:
+        signal.signal(signal.SIGALRM, _estourou)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return TIPOS[tipo].renderizar(entrada)
+    finally:
+        if alarme:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+# ----------------------------------------------------------------------------
+# Estado dos jobs
+# ----------------------------------------------------------------------------
+
+def id_job(tipo, entrada):
+    return f'{tipo}-{TIPOS[tipo].chave(entrada)}'
+
+
+def _chave_cache(job_id):
+    return f'creations:render:{job_id}'
+
+
+def _gravar(job_id, status, caminho=None, erro=None):
+    atual = {
+        'id': job_id,
+        'status': status,
+        'caminho': caminho,
+        'erro': erro,
+        'atualizado_em': time.time(),
+    }
+    cache.set(_chave_cache(job_id), atual, timeout=TTL_ESTADO)
+    return atual
+
+
+def _chave_usuarios(job_id):
+    return f'creations:render:{job_id}:usuarios'
+
+
+def _autorizar(job_id, usuario_id):
+    # Jobs são deduplicados entre usuários: guarda todos os que o submeteram
+    usuarios = cache.get(_chave_usuarios(job_id)) or set()
+    if usuario_id not in usuarios:
+        cache.set(_chave_usuarios(job_id), usuarios | {usuario_id}, timeout=TTL_ESTADO)
+
+
+def autorizado(job_id, usuario):
+    """Se o usuário pode consultar o job (submeteu-o ou é superusuário)"""
+    return usuario.is_superuser or usuario.pk in (cache.get(_chave_usuarios(job_id)) or set())
+
+
+def estado(job_id):
+    """Estado do job: {'id', 'status', 'caminho', 'erro', 'atualizado_em'} ou None"""
+    atual = cache.get(_chave_cache(job_id))
+    if atual and atual['status'] == PENDENTE:
+        future = _em_andamento.get(job_id)
+        if future is not None and future.running():
+            atual = {**atual, 'status': EXECUTANDO}
+    return atual
+
+
+def aguardar(job_id, segundos):
+    """Long polling: espera até o job terminar ou o tempo acabar (limitado a ESPERA_MAXIMA)"""
+    limite = time.monotonic() + min(max(segundos, 0), ESPERA_MAXIMA)
+    atual = estado(job_id)
+    while atual and atual['status'] not in FINAIS and time.monotonic() < limite:
+        time.sleep(INTERVALO_ESPERA)
+        atual = estado(job_id)
+    return atual
+
+
+def _concluir(job_id, future):
+    global _executor
+    with _lock:
+        _em_andamento.pop(job_id, None)
+    try:
+        caminho = future.result()
+    except TempoEsgotado as e:
+        _gravar(job_id, EXPIRADO, erro=str(e))
+    except BrokenProcessPool as e:
+        # Um worker morreu (ex.: falta de memória); o próximo job recria o pool
+        with _lock:
+            _executor = None
+        _gravar(job_id, ERRO, erro=f"Worker de renderização encerrado: {e}")
+    except Exception as e:
+        _gravar(job_id, ERRO, erro=str(e))
+    else:
+        _gravar(job_id, CONCLUIDO, caminho=caminho)
+
+
+def submeter(tipo, entrada, usuario_id=None):
+    """
+    Enfileira a renderização e retorna o estado do job.
+
+    Se o arquivo já existe, o job já nasce concluído. Levanta FilaCheia
+    quando o limite de jobs em andamento foi atingido. usuario_id passa a
+    poder consultar o status do job.
+    """
+    job_id = id_job(tipo, entrada)
+    if usuario_id is not None:
+        _autorizar(job_id, usuario_id)
+    destino = TIPOS[tipo].caminho(entrada)
+    if default_storage.exists(destino):
+        return _gravar(job_id, CONCLUIDO, caminho=destino)
+
+    with _lock:
+        if job_id in _em_andamento:
+            # O estado no cache pode ter sido removido (evicção, cache dummy)
+            return estado(job_id) or _gravar(job_id, PENDENTE)
+        if len(_em_andamento) >= _fila_maxima():
+            raise FilaCheia("Fila de renderização cheia")
+        atual = _gravar(job_id, PENDENTE)
+        future = _pool().submit(_executar, tipo, entrada, _timeout())
+        _em_andamento[job_id] = future
+    future.add_done_callback(lambda f: _concluir(job_id, f))
+    return atual
+
+
+def representar(atual, request):
+    """Dict de resposta da API para o estado de um job"""
+    caminho = atual['caminho']
+    return {
+        'id': atual['id'],
+        'status': atual['status'],
+        'url': request.build_absolute_uri(default_storage.url(caminho)) if caminho else None,
+        'erro': atual['erro'],
+        'status_url': request.build_absolute_uri(reverse('render-detail', args=[atual['id']])),
+    }
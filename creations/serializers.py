@@ -1,10 +1,15 @@
 from rest_framework import serializers
-from .models import Colecao, Arte, Personalizacao
+
+from core.derivadas import DerivadasField
+
+from . import uploads
+from .models import Colecao, Arte, Personalizacao, UploadArte
 
 
 class ColecaoSerializer(serializers.ModelSerializer):
-    artista_nome = serializers.CharField(source='artista.nome', read_only=True)
-    total_artes = serializers.SerializerMethodField()
+    artista_nome = serializers.CharField(source='artista.nome_artistico', read_only=True)
+    total_artes = serializers.IntegerField(source='artes_ativas_count', read_only=True)
+    imagens = DerivadasField(source='imagem_destaque')
 
     class Meta:
         model = Colecao
@@ -15,18 +20,18 @@ class ColecaoSerializer(serializers.ModelSerializer):
             'nome',
             'descricao',
             'ativa',
+            'imagem_destaque',
+            'imagens',
             'criado_em',
             'total_artes'
         ]
         read_only_fields = ['id', 'criado_em']
 
-    def get_total_artes(self, obj):
-        return obj.artes.count()
-
 
 class ArteSerializer(serializers.ModelSerializer):
-    artista_nome = serializers.CharField(source='artista.nome', read_only=True)
+    artista_nome = serializers.CharField(source='artista.nome_artistico', read_only=True)
     colecao_nome = serializers.CharField(source='colecao.nome', read_only=True)
+    imagens = DerivadasField(source='arquivo')
 
     class Meta:
         model = Arte
@@ -38,6 +43,7 @@ class ArteSerializer(serializers.ModelSerializer):
             'colecao_nome',
             'nome',
             'arquivo',
+            'imagens',
             'descricao',
             'ativa',
             'criado_em'
@@ -54,13 +60,58 @@ class PersonalizacaoSerializer(serializers.ModelSerializer):
             'id',
             'arte',
             'arte_nome',
+            'produto',
             'texto',
             'fonte',
             'cor',
             'preco_extra',
+            'hash_canonico',
             'criado_em'
         ]
-        read_only_fields = ['id', 'criado_em']
+        read_only_fields = ['id', 'hash_canonico', 'criado_em']
+
+    @staticmethod
+    def _hash(dados, instancia=None):
+        def valor(campo, padrao=''):
+            if campo in dados:
+                return dados[campo]
+            return getattr(instancia, campo) if instancia else padrao
+
+        arte, produto = valor('arte', None), valor('produto', None)
+        return Personalizacao.calcular_hash(
+            arte.pk if arte else None,
+            produto.pk if produto else None,
+            valor('texto'), valor('fonte'), valor('cor'), valor('preco_extra', 0),
+        )
+
+    def create(self, validated_data):
+        """
+        Reaproveita a personalização idêntica, se existir (get-or-create pelo
+        hash canônico). self.criada indica se uma linha nova foi gravada.
+        """
+        personalizacao, self.criada = Personalizacao.objects.get_or_create(
+            hash_canonico=self._hash(validated_data),
+            defaults=validated_data,
+        )
+        return personalizacao
+
+    def update(self, instance, validated_data):
+        """
+        Personalizações são compartilhadas (create devolve a idêntica já
+        existente, de qualquer cliente), então nunca são alteradas no lugar:
+        a alteração vai para a linha do novo hash (get-or-create) e quem usa
+        a original não é afetado. A resposta traz o id dessa linha.
+        """
+        dados = {
+            campo: getattr(instance, campo)
+            for campo in ('arte', 'produto', 'texto', 'fonte', 'cor', 'preco_extra')
+        }
+        dados.update(validated_data)
+        personalizacao, self.criada = Personalizacao.objects.get_or_create(
+            hash_canonico=self._hash(dados),
+            defaults=dados,
+        )
+        return personalizacao
 
 
 class ColecaoDetailSerializer(ColecaoSerializer):
@@ -68,4 +119,78 @@ class ColecaoDetailSerializer(ColecaoSerializer):
     artes = ArteSerializer(many=True, read_only=True)
 
     class Meta(ColecaoSerializer.Meta):
-        fields = ColecaoSerializer.Meta.fields + ['artes']
\ No newline at end of file
+        fields = ColecaoSerializer.Meta.fields + ['artes']
+
+
+class UploadArteSerializer(serializers.ModelSerializer):
+    """
+    Início e estado de um upload em partes (ver creations.uploads).
+
+    Informe `arte` para substituir o arquivo de uma arte existente, ou
+    nome/descricao/colecao para criar a arte quando o upload terminar.
+    """
+    nome = serializers.CharField(max_length=150, write_only=True, required=False)
+    descricao = serializers.CharField(write_only=True, required=False, allow_blank=True)
+    colecao = serializers.PrimaryKeyRelatedField(
+        queryset=Colecao.objects.all(), write_only=True, required=False, allow_null=True
+    )
+    parte_maxima = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadArte
+        fields = [
+            'id',
+            'arte',
+            'nome',
+            'descricao',
+            'colecao',
+            'nome_arquivo',
+            'tamanho',
+            'sha256',
+            'recebido',
+            'status',
+            'parte_maxima',
+            'criado_em'
+        ]
+        read_only_fields = ['id', 'recebido', 'status', 'criado_em']
+
+    def get_parte_maxima(self, obj):
+        return uploads.parte_maxima()
+
+    def validate_sha256(self, valor):
+        return valor.lower()
+
+    def validate(self, attrs):
+        try:
+            uploads.validar_inicio(attrs['nome_arquivo'], attrs['tamanho'], attrs['sha256'])
+        except ValueError as e:
+            raise serializers.ValidationError({'erro': str(e)})
+
+        usuario = self.context['request'].user
+        artista = getattr(usuario, 'perfil_artista', None)
+        arte = attrs.get('arte')
+        if arte is not None:
+            if arte.artista != artista and not usuario.is_superuser:
+                raise serializers.ValidationError({'erro': 'Você só pode enviar arquivos para suas próprias artes'})
+            return attrs
+
+        if artista is None:
+            raise serializers.ValidationError({'erro': 'Usuário não é artista'})
+        if not attrs.get('nome'):
+            raise serializers.ValidationError({'nome': 'Obrigatório para criar a arte.'})
+        colecao = attrs.get('colecao')
+        if colecao is not None and colecao.artista_id != artista.pk:
+            raise serializers.ValidationError({'colecao': 'A coleção não pertence ao artista.'})
+        return attrs
+
+    def create(self, validated_data):
+        nome = validated_data.pop('nome', '')
+        descricao = validated_data.pop('descricao', '')
+        colecao = validated_data.pop('colecao', None)
+        if validated_data.get('arte') is None:
+            validated_data['dados_arte'] = {
+                'nome': nome,
+                'descricao': descricao,
+                'colecao': colecao.pk if colecao else None,
+            }
+        return UploadArte.objects.create(usuario=self.context['request'].user, **validated_data)
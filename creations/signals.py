@@ -0,0 +1,99 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from artists.models import Artista
+from core import derivadas
+
+from . import busca, contadores, facetas, feed
+from .models import Arte, Colecao
+
+
+@receiver(pre_save, sender=Arte)
+def guardar_estado_arte(sender, instance, raw=False, **kwargs):
+    # Estado gravado antes do save, para o contador aplicar só a diferença
+    instance._estado_anterior = None
+    if instance.pk and not raw:
+        instance._estado_anterior = (
+            Arte.objects.filter(pk=instance.pk).values_list('colecao_id', 'ativa').first()
+        )
+
+
+@receiver(post_save, sender=Arte)
+def atualizar_contador_arte(sender, instance, raw=False, **kwargs):
+    if not raw:
+        contadores.ao_salvar(getattr(instance, '_estado_anterior', None), instance)
+
+
+@receiver(post_delete, sender=Arte)
+def descontar_arte_removida(sender, instance, **kwargs):
+    contadores.ao_remover(instance)
+
+
+@receiver(post_save, sender=Arte)
+def gerar_derivadas_arte(sender, instance, **kwargs):
+    # O feed já serializou a arte apontando `imagens` para o original
+    derivadas.agendar(instance.arquivo, ao_concluir=feed.invalidar)
+
+
+@receiver(post_save, sender=Colecao)
+def gerar_derivadas_colecao(sender, instance, **kwargs):
+    derivadas.agendar(instance.imagem_destaque)
+
+
+@receiver([post_save, post_delete], sender=Arte)
+@receiver([post_save, post_delete], sender=Colecao)
+@receiver([post_save, post_delete], sender=Artista)
+def invalidar_facetas_artistas(sender, **kwargs):
+    facetas.invalidar()
+
+
+@receiver(post_save, sender=Arte)
+def indexar_arte(sender, instance, raw=False, **kwargs):
+    if not raw:
+        busca.indexar('arte', instance.pk, instance.nome)
+
+
+@receiver(post_save, sender=Colecao)
+def indexar_colecao(sender, instance, raw=False, **kwargs):
+    if not raw:
+        busca.indexar('colecao', instance.pk, instance.nome)
+
+
+@receiver(post_save, sender=Artista)
+def indexar_artista(sender, instance, raw=False, **kwargs):
+    if not raw:
+        busca.indexar('artista', instance.pk, instance.nome_artistico)
+
+
+@receiver(post_delete, sender=Arte)
+def desindexar_arte(sender, instance, **kwargs):
+    busca.desindexar('arte', instance.pk)
+
+
+@receiver(post_delete, sender=Colecao)
+def desindexar_colecao(sender, instance, **kwargs):
+    busca.desindexar('colecao', instance.pk)
+
+
+@receiver(post_delete, sender=Artista)
+def desindexar_artista(sender, instance, **kwargs):
+    busca.desindexar('artista', instance.pk)
+
+
+@receiver(post_save, sender=Arte)
+def atualizar_feed_arte(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    anterior = getattr(instance, '_estado_anterior', None)
+    if instance.ativa and (anterior is None or not anterior[1]):
+        # Criada ou ativada agora: entra no topo do feed
+        feed.publicar(instance)
+    else:
+        feed.invalidar()
+
+
+@receiver(post_delete, sender=Arte)
+@receiver([post_save, post_delete], sender=Colecao)
+@receiver([post_save, post_delete], sender=Artista)
+def invalidar_feed(sender, **kwargs):
+    feed.invalidar()
@@ -1,3 +1,625 @@
-from django.test import TestCase
+import hashlib
+import io
+import tempfile
+from concurrent.futures import Future
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.db.models import Q
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from artists.models import Artista
+from orders.models import ItemPedido, Pedido
+from products.models import Produto
+from users.models import user as User
+
+from . import busca, contadores, facetas, feed, mockups, uploads
+from . import render as fila_render
+from .models import Arte, Colecao, Personalizacao, UploadArte
+
+
+class PaginasHtmlTests(TestCase):
+    """As páginas HTML de creations renderizam (views + templates)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('ana@example.com', 'senha', nome='Ana')
+        cls.artista = Artista.objects.create(usuario=cls.usuario, nome_artistico='Ana Art')
+        cls.colecao = Colecao.objects.create(artista=cls.artista, nome='Flores')
+        cls.arte = Arte.objects.create(
+            artista=cls.artista, colecao=cls.colecao, nome='Rosa', arquivo='artes/rosa.png'
+        )
+
+    def test_paginas(self):
+        paginas = [
+            '/creations/',
+            '/creations/colecoes/',
+            f'/creations/colecoes/{self.colecao.pk}/',
+            '/creations/artes/',
+            f'/creations/artes/{self.arte.pk}/',
+            '/creations/personalizacoes/',
+        ]
+        for url in paginas:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_personalizacoes_autenticado(self):
+        self.client.force_login(self.usuario)
+        self.assertEqual(self.client.get('/creations/personalizacoes/').status_code, 200)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), UPLOAD_ARTE_DIR=Path(tempfile.mkdtemp()), UPLOAD_ARTE_PARTE_MAXIMA=1024)
+class UploadArteTests(TestCase):
+    """Upload em partes: retomada, offset ocupado e conferência do SHA-256"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('ana@example.com', 'senha', nome='Ana')
+        cls.artista = Artista.objects.create(usuario=cls.usuario, nome_artistico='Ana Art')
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 64), 'red').save(buffer, 'BMP')
+        cls.dados = buffer.getvalue()
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.usuario)
+
+    def iniciar(self, sha256=None):
+        resposta = self.api.post('/creations/api/uploads/', {
+            'nome': 'Rosa',
+            'nome_arquivo': 'rosa.bmp',
+            'tamanho': len(self.dados),
+            'sha256': sha256 or hashlib.sha256(self.dados).hexdigest(),
+        }, format='json')
+        self.assertEqual(resposta.status_code, 201, resposta.content)
+        return UploadArte.objects.get(pk=resposta.json()['id'])
+
+    def enviar(self, upload, offset, parte):
+        return self.api.put(
+            f'/creations/api/uploads/{upload.pk}/parte/?offset={offset}',
+            parte, content_type='application/octet-stream',
+        )
+
+    def enviar_tudo(self, upload):
+        offset = UploadArte.objects.get(pk=upload.pk).recebido
+        while offset < len(self.dados):
+            resposta = self.enviar(upload, offset, self.dados[offset:offset + 1024])
+            self.assertEqual(resposta.status_code, 200, resposta.content)
+            offset = resposta.json()['recebido']
+
+    def concluir(self, upload):
+        return self.api.post(f'/creations/api/uploads/{upload.pk}/concluir/')
+
+    def test_retomada_apos_queda_da_conexao(self):
+        upload = self.iniciar()
+
+        class Caindo(io.BytesIO):
+            def read(self, n=-1):
+                bloco = super().read(n)
+                if not bloco:
+                    raise OSError('conexão caiu')
+                return bloco
+
+        with self.assertRaises(OSError):
+            uploads.receber_parte(upload, 0, Caindo(self.dados[:300]), 1024)
+        upload.refresh_from_db()
+        self.assertEqual(upload.recebido, 300)
+        self.assertIsNone(upload.gravando_ate)
+
+        resposta = self.enviar(upload, 0, self.dados[:1024])
+        self.assertEqual(resposta.status_code, 409)
+        self.assertEqual(resposta.json()['recebido'], 300)
+
+        self.enviar_tudo(upload)
+        resposta = self.concluir(upload)
+        self.assertEqual(resposta.status_code, 200, resposta.content)
+        arte = Arte.objects.get(pk=resposta.json()['arte']['id'])
+        with arte.arquivo.open('rb') as arquivo:
+            self.assertEqual(arquivo.read(), self.dados)
+
+    def test_offset_reservado_por_outra_requisicao(self):
+        upload = self.iniciar()
+        UploadArte.objects.filter(pk=upload.pk).update(
+            gravando_ate=timezone.now() + timedelta(minutes=1)
+        )
+        self.assertEqual(self.enviar(upload, 0, self.dados[:1024]).status_code, 409)
+
+        # Reserva expirada (worker que morreu no meio da parte): o offset pode ser retomado
+        UploadArte.objects.filter(pk=upload.pk).update(
+            gravando_ate=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(self.enviar(upload, 0, self.dados[:1024]).status_code, 200)
+
+    def test_sha256_diferente_recomeca_o_upload(self):
+        upload = self.iniciar(sha256='0' * 64)
+        self.enviar_tudo(upload)
+        resposta = self.concluir(upload)
+        self.assertEqual(resposta.status_code, 400)
+        upload.refresh_from_db()
+        self.assertEqual((upload.recebido, upload.status), (0, 'pendente'))
+        self.assertFalse(uploads.caminho_temporario(upload).exists())
+
+    def test_arquivo_temporario_ausente(self):
+        upload = self.iniciar()
+        self.enviar_tudo(upload)
+        uploads.caminho_temporario(upload).unlink()
+        resposta = self.concluir(upload)
+        self.assertEqual(resposta.status_code, 400)
+        upload.refresh_from_db()
+        self.assertEqual(upload.recebido, 0)
+
+
+class PersonalizacaoTests(TestCase):
+    """Personalizações compartilhadas pelo hash canônico"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dono = User.objects.create_user('ana@example.com', 'senha', nome='Ana')
+        artista = Artista.objects.create(usuario=cls.dono, nome_artistico='Ana Art')
+        cls.arte = Arte.objects.create(artista=artista, nome='Rosa', arquivo='artes/rosa.png')
+        cls.produto = Produto.objects.create(nome='Capinha', preco_base=Decimal('50.00'), estoque=10)
+        cls.cliente_a = User.objects.create_user('a@example.com', 'senha', nome='A')
+        cls.cliente_b = User.objects.create_user('b@example.com', 'senha', nome='B')
+
+    def cliente(self, usuario):
+        api = APIClient()
+        api.force_authenticate(usuario)
+        return api
+
+    def criar(self, usuario, texto='Oi'):
+        return self.cliente(usuario).post('/creations/api/personalizacoes/', {
+            'arte': self.arte.pk, 'produto': self.produto.pk, 'texto': texto,
+        }, format='json')
+
+    def test_identicas_viram_a_mesma_linha(self):
+        primeira = self.criar(self.cliente_a, 'Oi')
+        segunda = self.criar(self.cliente_b, '  Oi ')
+        self.assertEqual((primeira.status_code, segunda.status_code), (201, 200))
+        self.assertEqual(primeira.json()['id'], segunda.json()['id'])
+        self.assertEqual(Personalizacao.objects.count(), 1)
+
+    def test_cliente_nao_altera_nem_remove_a_compartilhada(self):
+        pk = self.criar(self.cliente_a).json()['id']
+        outro = self.cliente(self.cliente_b)
+        url = f'/creations/api/personalizacoes/{pk}/'
+        self.assertEqual(outro.patch(url, {'texto': 'Tchau'}, format='json').status_code, 404)
+        self.assertEqual(outro.delete(url).status_code, 404)
+        self.assertEqual(Personalizacao.objects.get(pk=pk).texto, 'Oi')
+
+    def test_alteracao_vai_para_outra_linha(self):
+        pk = self.criar(self.cliente_a).json()['id']
+        resposta = self.cliente(self.dono).patch(
+            f'/creations/api/personalizacoes/{pk}/', {'texto': 'Tchau'}, format='json'
+        )
+        self.assertEqual(resposta.status_code, 200, resposta.content)
+        self.assertNotEqual(resposta.json()['id'], pk)
+        self.assertEqual(resposta.json()['texto'], 'Tchau')
+        self.assertEqual(Personalizacao.objects.get(pk=pk).texto, 'Oi')
+
+    def test_dono_remove_se_nao_usada(self):
+        pk = self.criar(self.cliente_a).json()['id']
+        resposta = self.cliente(self.dono).delete(f'/creations/api/personalizacoes/{pk}/')
+        self.assertEqual(resposta.status_code, 204)
+        self.assertFalse(Personalizacao.objects.filter(pk=pk).exists())
+
+    def test_usada_em_pedido_nao_e_removida(self):
+        pk = self.criar(self.cliente_a).json()['id']
+        pedido = Pedido.objects.create(usuario=self.cliente_a)
+        ItemPedido.objects.create(
+            pedido=pedido, produto=self.produto, personalizacao_id=pk,
+            quantidade=1, preco_unitario=Decimal('50.00'),
+        )
+        resposta = self.cliente(self.dono).delete(f'/creations/api/personalizacoes/{pk}/')
+        self.assertEqual(resposta.status_code, 400)
+        self.assertTrue(Personalizacao.objects.filter(pk=pk).exists())
+
+
+    def test_deduplicar_legadas(self):
+        canonica = Personalizacao.objects.create(arte=self.arte, produto=self.produto, texto='Oi')
+        # Linhas anteriores ao hash (legadas), uma idêntica à canônica
+        Personalizacao.objects.bulk_create([
+            Personalizacao(arte=self.arte, produto=self.produto, texto=' Oi'),
+            Personalizacao(arte=self.arte, produto=self.produto, texto='Outra'),
+        ])
+        duplicada, unica = Personalizacao.objects.filter(hash_canonico__isnull=True).order_by('pk')
+        pedido = Pedido.objects.create(usuario=self.cliente_a)
+        item = ItemPedido.objects.create(
+            pedido=pedido, produto=self.produto, personalizacao=duplicada,
+            quantidade=1, preco_unitario=Decimal('50.00'),
+        )
+
+        # A legada continua gravável enquanto não é deduplicada
+        duplicada.cor = ''
+        duplicada.save()
+
+        call_command('deduplicar_personalizacoes', stdout=io.StringIO())
+        item.refresh_from_db()
+        self.assertEqual(item.personalizacao_id, canonica.pk)
+        self.assertFalse(Personalizacao.objects.filter(pk=duplicada.pk).exists())
+        unica.refresh_from_db()
+        self.assertIsNotNone(unica.hash_canonico)
+        self.assertFalse(Personalizacao.objects.filter(hash_canonico__isnull=True).exists())
+
+class FeedTests(TestCase):
+    """Feed "últimas artes" paginado por token (creations.feed)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('ana@example.com', 'senha', nome='Ana')
+        cls.artista = Artista.objects.create(usuario=cls.usuario, nome_artistico='Ana Art')
+        Arte.objects.bulk_create(
+            Arte(artista=cls.artista, nome=f'Arte {i}', arquivo=f'artes/{i}.png', ativa=i % 5 != 0)
+            for i in range(30)
+        )
+        # Empates em criado_em: a ordem desempata pelo id
+        Arte.objects.filter(pk__in=Arte.objects.order_by('pk').values('pk')[:10]).update(
+            criado_em=timezone.now() - timedelta(days=1)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.usuario)
+        # As derivadas (arquivos inexistentes aqui) não são geradas nos testes
+        patcher = mock.patch('core.derivadas.agendar')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def percorrer(self, limite):
+        ids, cursor = [], None
+        while True:
+            params = {'limite': limite, **({'cursor': cursor} if cursor else {})}
+            resposta = self.client.get('/creations/api/artes/ultimas/', params, HTTP_ACCEPT='application/json')
+            self.assertEqual(resposta.status_code, 200)
+            dados = resposta.json()
+            ids += [arte['id'] for arte in dados['results']]
+            cursor = dados['proximo']
+            if not cursor:
+                return ids
+
+    def esperado(self):
+        return list(Arte.objects.filter(ativa=True).order_by('-criado_em', '-id').values_list('id', flat=True))
+
+    def test_paginas_cobrem_o_feed_sem_repetir(self):
+        for tamanho in (200, 7):  # com o feed todo materializado e passando do materializado
+            with self.subTest(tamanho=tamanho), mock.patch.object(feed, 'FEED_TAMANHO', tamanho):
+                cache.clear()
+                self.assertEqual(self.percorrer(limite=4), self.esperado())
+
+    def test_nova_arte_e_desativacao(self):
+        self.percorrer(limite=50)
+        with self.captureOnCommitCallbacks(execute=True):
+            nova = Arte.objects.create(artista=self.artista, nome='Nova', arquivo='artes/nova.png')
+        self.assertEqual(self.percorrer(limite=50)[0], nova.pk)
+
+        nova.ativa = False
+        with self.captureOnCommitCallbacks(execute=True):
+            nova.save()
+        self.assertEqual(self.percorrer(limite=50), self.esperado())
+
+    def test_token_invalido(self):
+        resposta = self.client.get('/creations/api/artes/ultimas/', {'cursor': 'invalido'}, HTTP_ACCEPT='application/json')
+        self.assertEqual(resposta.status_code, 400)
+
+
+class ContadorColecaoTests(TestCase):
+    """Contador desnormalizado de artes ativas por coleção (creations.contadores)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        usuario = User.objects.create_user('ana@example.com', 'senha', nome='Ana')
+        cls.artista = Artista.objects.create(usuario=usuario, nome_artistico='Ana Art')
+        cls.flores = Colecao.objects.create(artista=cls.artista, nome='Flores')
+        cls.frutas = Colecao.objects.create(artista=cls.artista, nome='Frutas')
+
+    def setUp(self):
+        patcher = mock.patch('core.derivadas.agendar')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def contagens(self):
+        self.flores.refresh_from_db()
+        self.frutas.refresh_from_db()
+        return self.flores.artes_ativas_count, self.frutas.artes_ativas_count
+
+    def test_criar_desativar_mover_remover(self):
+        rosa = Arte.objects.create(artista=self.artista, colecao=self.flores, nome='Rosa', arquivo='artes/rosa.png')
+        Arte.objects.create(artista=self.artista, colecao=self.flores, nome='Lírio', arquivo='artes/lirio.png')
+        Arte.objects.create(artista=self.artista, colecao=self.flores, nome='Oculta', arquivo='artes/o.png', ativa=False)
+        self.assertEqual(self.contagens(), (2, 0))
+
+        rosa.ativa = False
+        rosa.save()
+        self.assertEqual(self.contagens(), (1, 0))
+
+        rosa.ativa = True
+        rosa.colecao = self.frutas
+        rosa.save()
+        self.assertEqual(self.contagens(), (1, 1))
+
+        rosa.nome = 'Rosa vermelha'
+        rosa.save()
+        self.assertEqual(self.contagens(), (1, 1))
+
+        rosa.delete()
+        self.assertEqual(self.contagens(), (1, 0))
+
+    def test_recontar_corrige_alteracoes_fora_dos_signals(self):
+        Arte.objects.create(artista=self.artista, colecao=self.flores, nome='Rosa', arquivo='artes/rosa.png')
+        Arte.objects.filter(colecao=self.flores).update(colecao=self.frutas)
+        self.assertEqual(self.contagens(), (1, 0))
+
+        saida = io.StringIO()
+        call_command('recontar_artes_colecao', stdout=saida)
+        self.assertEqual(self.contagens(), (0, 1))
+        self.assertIn('2 coleção(ões) corrigida(s)', saida.getvalue())
+
+    def test_listagem_com_capa_sem_consulta_por_colecao(self):
+        Arte.objects.create(artista=self.artista, colecao=self.flores, nome='Rosa', arquivo='artes/rosa.png')
+        Arte.objects.create(artista=self.artista, colecao=self.flores, nome='Lírio', arquivo='artes/lirio.png')
+        colecoes = Colecao.objects.annotate(capa=contadores.capa_colecao()).order_by('nome')
+        with self.assertNumQueries(1):
+            linhas = [(c.nome, c.artes_ativas_count, c.capa) for c in colecoes]
+        self.assertEqual(linhas, [('Flores', 2, 'artes/rosa.png'), ('Frutas', 0, None)])
+
+
+class FacetasArtistasTests(TestCase):
+    """Índice de artistas dos filtros de coleções e artes (creations.facetas)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ana = Artista.objects.create(
+            usuario=User.objects.create_user('ana@example.com', 'senha', nome='Ana'), nome_artistico='Ana Art'
+        )
+        cls.bia = Artista.objects.create(
+            usuario=User.objects.create_user('bia@example.com', 'senha', nome='Bia'), nome_artistico='Bia Art'
+        )
+        Artista.objects.create(
+            usuario=User.objects.create_user('caio@example.com', 'senha', nome='Caio'), nome_artistico='Caio Art'
+        )
+        colecao = Colecao.objects.create(artista=cls.ana, nome='Flores')
+        Arte.objects.create(artista=cls.ana, colecao=colecao, nome='Rosa', arquivo='artes/rosa.png')
+        Arte.objects.create(artista=cls.bia, nome='Sol', arquivo='artes/sol.png')
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch('core.derivadas.agendar')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_so_artistas_com_conteudo_ativo(self):
+        self.assertEqual([a['nome_artistico'] for a in facetas.artistas_com_colecoes()], ['Ana Art'])
+        self.assertEqual([a['nome_artistico'] for a in facetas.artistas_com_artes()], ['Ana Art', 'Bia Art'])
+
+    def test_cache_invalidado_apos_commit(self):
+        facetas.artistas()
+        with self.assertNumQueries(0):
+            facetas.artistas_com_artes()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Arte.objects.filter(artista=self.bia).get().delete()
+        self.assertEqual([a['nome_artistico'] for a in facetas.artistas_com_artes()], ['Ana Art'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Colecao.objects.create(artista=self.bia, nome='Céu')
+        self.assertEqual(
+            [(a['nome_artistico'], a['colecoes_ativas']) for a in facetas.artistas_com_colecoes()],
+            [('Ana Art', 1), ('Bia Art', 1)],
+        )
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class MockupTests(TestCase):
+    """Mockup da personalização com cache por hash do conteúdo (creations.mockups)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('ana@example.com', 'senha', nome='Ana')
+        artista = Artista.objects.create(usuario=cls.usuario, nome_artistico='Ana Art')
+        cls.arte = Arte.objects.create(artista=artista, nome='Rosa', arquivo='artes/rosa.png')
+        cls.produto = Produto.objects.create(nome='Capinha', preco_base=Decimal('50.00'), estoque=10)
+        cls.personalizacao = Personalizacao.objects.create(
+            arte=cls.arte, produto=cls.produto, texto='Oi', cor='#203040'
+        )
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch('core.derivadas.agendar')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        buffer = io.BytesIO()
+        Image.new('RGBA', (300, 300), 'red').save(buffer, 'PNG')
+        if not default_storage.exists('artes/rosa.png'):
+            default_storage.save('artes/rosa.png', ContentFile(buffer.getvalue()))
+
+    def test_mesmo_conteudo_mesmo_arquivo(self):
+        entrada = mockups.dados(self.personalizacao)
+        copia = Personalizacao(arte=self.arte, produto=self.produto, texto='Oi', cor='#203040')
+        self.assertEqual(mockups.caminho(mockups.dados(copia)), mockups.caminho(entrada))
+        copia.texto = 'Olá'
+        self.assertNotEqual(mockups.caminho(mockups.dados(copia)), mockups.caminho(entrada))
+
+    def test_renderiza_uma_vez(self):
+        entrada = mockups.dados(self.personalizacao)
+        caminho = mockups.renderizar(entrada)
+        with default_storage.open(caminho, 'rb') as arquivo:
+            self.assertEqual(Image.open(arquivo).size, (mockups.LARGURA, mockups.ALTURA))
+
+        with mock.patch.object(mockups, '_desenhar') as desenhar:
+            self.assertEqual(mockups.renderizar(entrada), caminho)
+        desenhar.assert_not_called()
+
+    def test_arte_ilegivel(self):
+        entrada = {**mockups.dados(self.personalizacao), 'arte': 'artes/inexistente.png'}
+        with self.assertRaises(ValueError):
+            mockups.renderizar(entrada)
+
+    def test_preview_devolve_o_mockup_em_cache(self):
+        caminho = mockups.renderizar(mockups.dados(self.personalizacao))
+        api = APIClient()
+        api.force_authenticate(self.usuario)
+        resposta = api.get(f'/creations/api/personalizacoes/{self.personalizacao.pk}/preview/')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.json()['status'], fila_render.CONCLUIDO)
+        self.assertTrue(resposta.json()['url'].endswith(caminho))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), RENDER_FILA_MAXIMA=1)
+class FilaRenderTests(TestCase):
+    """Fila de renderização: limite, status restrito a quem submeteu e conclusão (creations.render)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('ana@example.com', 'senha', nome='Ana')
+        cls.outro = User.objects.create_user('bia@example.com', 'senha', nome='Bia')
+        artista = Artista.objects.create(usuario=cls.usuario, nome_artistico='Ana Art')
+        arte = Arte.objects.create(artista=artista, nome='Rosa', arquivo='artes/rosa.png')
+        produto = Produto.objects.create(nome='Capinha', preco_base=Decimal('50.00'), estoque=10)
+        cls.primeira = Personalizacao.objects.create(arte=arte, produto=produto, texto='Oi')
+        cls.segunda = Personalizacao.objects.create(arte=arte, produto=produto, texto='Olá')
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(fila_render._em_andamento.clear)
+        for alvo in ('core.derivadas.agendar', 'creations.render._pool'):
+            patcher = mock.patch(alvo)
+            self.addCleanup(patcher.stop)
+            patcher.start()
+        # Sem processos filhos: os jobs ficam pendentes até o teste concluir o Future
+        self.futuros = []
+        fila_render._pool.return_value.submit.side_effect = self.submeter
+
+    def submeter(self, *args):
+        futuro = Future()
+        self.futuros.append(futuro)
+        return futuro
+
+    def cliente(self, usuario):
+        api = APIClient()
+        api.force_authenticate(usuario)
+        return api
+
+    def preview(self, personalizacao):
+        return self.cliente(self.usuario).get(f'/creations/api/personalizacoes/{personalizacao.pk}/preview/')
+
+    def test_fila_cheia_responde_503(self):
+        self.assertEqual(self.preview(self.primeira).status_code, 202)
+        # O mesmo job não ocupa outra vaga
+        self.assertEqual(self.preview(self.primeira).status_code, 202)
+        self.assertEqual(len(self.futuros), 1)
+
+        resposta = self.preview(self.segunda)
+        self.assertEqual(resposta.status_code, 503)
+        self.assertEqual(resposta['Retry-After'], '5')
+
+    def test_status_so_para_quem_submeteu(self):
+        status_url = self.preview(self.primeira).json()['status_url']
+        self.assertEqual(self.cliente(self.outro).get(status_url).status_code, 404)
+
+        resposta = self.cliente(self.usuario).get(status_url)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.json()['status'], fila_render.PENDENTE)
+
+        self.futuros[0].set_result('mockups/pronto.png')
+        resposta = self.cliente(self.usuario).get(status_url, {'aguardar': 1})
+        self.assertEqual(resposta.json()['status'], fila_render.CONCLUIDO)
+        self.assertTrue(resposta.json()['url'].endswith('mockups/pronto.png'))
+        # A vaga foi liberada
+        self.assertEqual(self.preview(self.segunda).status_code, 202)
+
+    def test_erro_do_renderizador(self):
+        status_url = self.preview(self.primeira).json()['status_url']
+        self.futuros[0].set_exception(ValueError('Não foi possível renderizar o mockup'))
+        resposta = self.cliente(self.usuario).get(status_url).json()
+        self.assertEqual(resposta['status'], fila_render.ERRO)
+        self.assertIn('renderizar', resposta['erro'])
+
+    def test_aguardar_invalido(self):
+        status_url = self.preview(self.primeira).json()['status_url']
+        self.assertEqual(self.cliente(self.usuario).get(status_url, {'aguardar': 'x'}).status_code, 400)
+
+
+class BuscaAproximadaTests(TestCase):
+    """Busca por trigramas em artes, coleções e artistas (creations.busca)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cliente = User.objects.create_user('cliente@example.com', 'senha', nome='Cliente')
+        cls.ana = Artista.objects.create(
+            usuario=User.objects.create_user('ana@example.com', 'senha', nome='Ana'), nome_artistico='Joana Girassol'
+        )
+        cls.flores = Colecao.objects.create(artista=cls.ana, nome='Flores do Cerrado')
+        cls.borboleta = Arte.objects.create(
+            artista=cls.ana, colecao=cls.flores, nome='Borboleta Azul', arquivo='artes/b.png'
+        )
+        cls.coracao = Arte.objects.create(artista=cls.ana, nome='Coração', arquivo='artes/c.png')
+
+    def setUp(self):
+        patcher = mock.patch('core.derivadas.agendar')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.api = APIClient()
+        self.api.force_authenticate(self.cliente)
+
+    def buscar(self, url, termo, **params):
+        resposta = self.api.get(url, {'search': termo, 'modo_busca': 'aproximada', **params})
+        self.assertEqual(resposta.status_code, 200)
+        return [linha['id'] for linha in resposta.json()]
+
+    def test_tolera_erro_de_digitacao_e_acentos(self):
+        self.assertEqual(busca.buscar_similares('borboeta', tipos=['arte'])[0][:2], ('arte', self.borboleta.pk))
+        self.assertEqual(busca.buscar_similares('coracao', tipos=['arte'])[0][:2], ('arte', self.coracao.pk))
+        self.assertEqual(busca.buscar_similares('xyz'), [])
+
+    def test_modo_aproximado_nos_viewsets(self):
+        self.assertEqual(self.buscar('/creations/api/artes/', 'borboeta azul'), [self.borboleta.pk])
+        # Pelo nome da coleção ou do artista
+        self.assertEqual(self.buscar('/creations/api/artes/', 'flores do cerado'), [self.borboleta.pk])
+        self.assertCountEqual(self.buscar('/creations/api/artes/', 'girasol'), [self.borboleta.pk, self.coracao.pk])
+        self.assertEqual(self.buscar('/creations/api/colecoes/', 'floress'), [self.flores.pk])
+        # Sem modo_busca, continua o icontains padrão
+        resposta = self.api.get('/creations/api/artes/', {'search': 'borboeta'})
+        self.assertEqual(resposta.json(), [])
+
+    def test_indice_acompanha_renomeacao_e_remocao(self):
+        self.borboleta.nome = 'Mariposa'
+        self.borboleta.save()
+        self.assertEqual(busca.buscar_similares('borboleta', tipos=['arte']), [])
+        self.assertEqual(busca.buscar_similares('mariposa', tipos=['arte'])[0][1], self.borboleta.pk)
+
+        self.coracao.delete()
+        self.assertEqual(busca.buscar_similares('coração', tipos=['arte']), [])
+
+    def test_reindexar_apos_alteracao_em_massa(self):
+        Arte.objects.filter(pk=self.coracao.pk).update(nome='Estrela')
+        self.assertEqual(busca.buscar_similares('estrela', tipos=['arte']), [])
+        call_command('reindexar_busca_criacoes', stdout=io.StringIO())
+        self.assertEqual(busca.buscar_similares('estrela', tipos=['arte'])[0][1], self.coracao.pk)
+
+
+class IndicesParciaisTests(TestCase):
+    """Consultas das listagens usam os índices parciais de ativa/ativo (comando verificar_indices)"""
+
+    def test_consultas_usam_os_indices(self):
+        saida = io.StringIO()
+        call_command('verificar_indices', stdout=saida)
+        self.assertNotIn('FALHA', saida.getvalue())
+
+    def test_indices_declarados_com_condicao(self):
+        indices = {indice.name: indice for indice in Arte._meta.indexes}
+        for nome in ('arte_ativa_criado_idx', 'arte_ativa_artista_idx', 'arte_ativa_colecao_idx'):
+            self.assertEqual(indices[nome].condition, Q(ativa=True))
+
+    def test_falha_sem_o_indice_esperado(self):
+        consulta = ('artes: sem índice', Arte.objects.filter(nome='Rosa'), 'arte_ativa_criado_idx')
+        with mock.patch('core.management.commands.verificar_indices.consultas', return_value=[consulta]):
+            with self.assertRaises(CommandError):
+                call_command('verificar_indices', stdout=io.StringIO())
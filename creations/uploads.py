@@ -0,0 +1,246 @@
+"""
+Upload em partes (retomável) do arquivo das artes.
+
+Protocolo (ver UploadArteViewSet):
+
+1. POST /uploads/ com nome_arquivo, tamanho, sha256 e a arte (existente)
+   ou os campos da arte nova → id do upload.
+2. PUT /uploads/<id>/parte/?offset=N com os bytes da parte no corpo
+   (application/octet-stream). O offset tem que ser igual ao `recebido`
+   do upload; se a conexão cair no meio, o que chegou fica gravado e
+   GET /uploads/<id>/ diz de onde continuar. O offset é reservado no banco
+   (`gravando_ate`) enquanto a parte é gravada; outra parte no mesmo
+   upload recebe 409 até a gravação terminar.
+3. POST /uploads/<id>/concluir/ confere o SHA-256 e o formato da imagem e
+   grava o arquivo na arte.
+
+As partes são escritas direto em um arquivo temporário em UPLOAD_ARTE_DIR,
+em blocos, sem passar pelo parser de multipart; o hash também é calculado
+em blocos. Nenhum passo carrega o arquivo inteiro na memória.
+"""
+import hashlib
+import os
+import re
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.validators import validate_image_file_extension
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Arte, UploadArte
+
+BLOCO = 64 * 1024
+# Tempo máximo para gravar uma parte antes que o offset possa ser reservado de novo
+TTL_GRAVACAO = 10 * 60
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class OffsetInvalido(ValueError):
+    """A parte não começa onde o upload parou; `recebido` diz onde continuar"""
+
+    def __init__(self, recebido):
+        super().__init__(f"Offset inválido; continue a partir de {recebido}")
+        self.recebido = recebido
+
+
+class UploadOcupado(ValueError):
+    """Outra parte do mesmo upload está sendo gravada"""
+
+
+def tamanho_maximo():
+    return getattr(settings, 'UPLOAD_ARTE_TAMANHO_MAXIMO', 200 * 1024 * 1024)
+
+
+def parte_maxima():
+    return getattr(settings, 'UPLOAD_ARTE_PARTE_MAXIMA', 8 * 1024 * 1024)
+
+
+def caminho_temporario(upload):
+    pasta = Path(getattr(settings, 'UPLOAD_ARTE_DIR', settings.BASE_DIR / 'tmp' / 'uploads_arte'))
+    return pasta / f'{upload.pk}.part'
+
+
+def validar_inicio(nome_arquivo, tamanho, sha256):
+    """Levanta ValueError se os dados do início do upload forem inválidos"""
+    try:
+        validate_image_file_extension(File(None, name=nome_arquivo))
+    except ValidationError:
+        raise ValueError("Extensão de imagem não suportada")
+    if not 0 < tamanho <= tamanho_maximo():
+        raise ValueError(f"tamanho deve estar entre 1 e {tamanho_maximo()} bytes")
+    if not SHA256_RE.match(sha256):
+        raise ValueError("sha256 deve ter 64 dígitos hexadecimais")
+
+
+# ----------------------------------------------------------------------------
+# Partes
+# ----------------------------------------------------------------------------
+
+def receber_parte(upload, offset, stream, tamanho_parte):
+    """
+    Grava `tamanho_parte` bytes lidos de `stream` a partir de `offset`.
+
+    Retorna o novo total recebido. Levanta OffsetInvalido se o offset não
+    for o ponto em que o upload parou, UploadOcupado se outra parte do
+    mesmo upload estiver em andamento, e ValueError para partes vazias,
+    grandes demais ou que passem do tamanho declarado.
+    """
+    if upload.status != 'pendente':
+        raise ValueError("Upload já concluído")
+    if not 0 < tamanho_parte <= parte_maxima():
+        raise ValueError(f"Cada parte deve ter entre 1 e {parte_maxima()} bytes")
+    if offset + tamanho_parte > upload.tamanho:
+        raise ValueError("A parte passa do tamanho declarado do arquivo")
+
+    # Reserva o offset com um UPDATE condicional: só uma requisição (de
+    # qualquer worker) consegue, e a gravação acontece fora de transação
+    agora = timezone.now()
+    reserva = agora + timedelta(seconds=TTL_GRAVACAO)
+    reservado = (
+        UploadArte.objects
+        .filter(pk=upload.pk, status='pendente', recebido=offset)
+        .filter(Q(gravando_ate__isnull=True) | Q(gravando_ate__lt=agora))
+        .update(gravando_ate=reserva)
+    )
+    if not reservado:
+        status, recebido = UploadArte.objects.values_list('status', 'recebido').get(pk=upload.pk)
+        if status != 'pendente':
+            raise ValueError("Upload já concluído")
+        if offset != recebido:
+            raise OffsetInvalido(recebido)
+        raise UploadOcupado("Outra parte deste upload está sendo enviada")
+
+    gravados = 0
+    try:
+        caminho = caminho_temporario(upload)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        with open(caminho, 'r+b' if caminho.exists() else 'wb') as destino:
+            # Descarta sobras de uma parte anterior que não foi registrada
+            destino.seek(offset)
+            destino.truncate()
+            try:
+                while gravados < tamanho_parte:
+                    bloco = stream.read(min(BLOCO, tamanho_parte - gravados))
+                    if not bloco:
+                        break
+                    destino.write(bloco)
+                    gravados += len(bloco)
+            finally:
+                # Conexão interrompida: guarda o que chegou para o cliente retomar
+                destino.flush()
+                os.fsync(destino.fileno())
+    finally:
+        # Registra o avanço e solta a reserva. Se ela expirou e outra parte
+        # reservou o offset, esta gravação não conta (o SHA-256 da conclusão
+        # confere o arquivo montado).
+        registrado = UploadArte.objects.filter(
+            pk=upload.pk, recebido=offset, gravando_ate=reserva,
+        ).update(recebido=offset + gravados, gravando_ate=None, atualizado_em=timezone.now())
+    if not registrado:
+        raise UploadOcupado("A reserva desta parte expirou; consulte o upload e continue")
+    upload.recebido = offset + gravados
+    return upload.recebido
+
+
+# ----------------------------------------------------------------------------
+# Conclusão
+# ----------------------------------------------------------------------------
+
+def _sha256(caminho):
+    resumo = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(BLOCO), b''):
+            resumo.update(bloco)
+    return resumo.hexdigest()
+
+
+def _validar_imagem(caminho):
+    from PIL import Image
+
+    # verify() confere a estrutura do arquivo sem decodificar os pixels
+    try:
+        with Image.open(caminho) as imagem:
+            imagem.verify()
+    except Exception as e:
+        raise ValueError(f"O arquivo enviado não é uma imagem válida: {e}")
+
+
+def _reiniciar(upload):
+    caminho_temporario(upload).unlink(missing_ok=True)
+    upload.recebido = 0
+    upload.save(update_fields=['recebido', 'atualizado_em'])
+
+
+def concluir(upload, artista=None):
+    """
+    Confere o arquivo montado e grava na arte; retorna a arte.
+
+    Sem `upload.arte`, cria a arte com `dados_arte` para o `artista`.
+    Levanta ValueError se o upload estiver incompleto, se o arquivo
+    temporário não existir ou o SHA-256 não conferir (nos dois casos o
+    upload recomeça do zero) ou se a imagem for inválida.
+    """
+    if upload.status != 'pendente':
+        raise ValueError("Upload já concluído")
+    if upload.recebido != upload.tamanho:
+        raise ValueError(f"Upload incompleto: {upload.recebido} de {upload.tamanho} bytes")
+
+    caminho = caminho_temporario(upload)
+    try:
+        confere = _sha256(caminho) == upload.sha256
+    except FileNotFoundError:
+        # Removido pela limpeza, ou gravado em outro servidor sem UPLOAD_ARTE_DIR compartilhado
+        _reiniciar(upload)
+        raise ValueError("Arquivo temporário não encontrado; envie o arquivo novamente")
+    if not confere:
+        _reiniciar(upload)
+        raise ValueError("SHA-256 não confere; envie o arquivo novamente")
+    _validar_imagem(caminho)
+
+    with transaction.atomic():
+        # Marca como concluído antes de gravar: duas conclusões simultâneas não criam duas artes
+        if not UploadArte.objects.filter(pk=upload.pk, status='pendente').update(status='concluido'):
+            raise ValueError("Upload já concluído")
+        arte = upload.arte
+        if arte is None:
+            if artista is None:
+                raise ValueError("Usuário não é artista")
+            dados = upload.dados_arte
+            arte = Arte(
+                artista=artista,
+                nome=dados['nome'],
+                descricao=dados.get('descricao', ''),
+                colecao_id=dados.get('colecao'),
+            )
+        # O storage copia o arquivo em blocos (File.chunks)
+        with open(caminho, 'rb') as arquivo:
+            arte.arquivo.save(os.path.basename(upload.nome_arquivo), File(arquivo), save=True)
+
+        upload.arte = arte
+        upload.status = 'concluido'
+        upload.save(update_fields=['arte', 'status', 'atualizado_em'])
+        transaction.on_commit(lambda: caminho.unlink(missing_ok=True))
+    return arte
+
+
+def cancelar(upload):
+    caminho_temporario(upload).unlink(missing_ok=True)
+    upload.delete()
+
+
+def limpar(horas=None):
+    """Remove uploads pendentes sem atividade há mais de `horas`; retorna quantos"""
+    if horas is None:
+        horas = getattr(settings, 'UPLOAD_ARTE_EXPIRA_HORAS', 24)
+    limite = timezone.now() - timedelta(hours=horas)
+    expirados = UploadArte.objects.filter(status='pendente', atualizado_em__lt=limite)
+    total = 0
+    for upload in expirados.iterator():
+        cancelar(upload)
+        total += 1
+    return total
@@ -4,6 +4,8 @@ from .views import (
     ColecaoViewSet, 
     ArteViewSet, 
     PersonalizacaoViewSet,
+    RenderViewSet,
+    UploadArteViewSet,
     api_root_view,
     colecao_list_view,
     colecao_detail_view,
@@ -16,6 +18,8 @@ router = DefaultRouter()
 router.register(r'colecoes', ColecaoViewSet, basename='colecao')
 router.register(r'artes', ArteViewSet, basename='arte')
 router.register(r'personalizacoes', PersonalizacaoViewSet, basename='personalizacao')
+router.register(r'renders', RenderViewSet, basename='render')
+router.register(r'uploads', UploadArteViewSet, basename='upload-arte')
 
 urlpatterns = [
     # Página inicial (API Root)
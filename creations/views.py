@@ -1,17 +1,23 @@
 from django.shortcuts import render, get_object_or_404
 from django.db.models import Q
-from rest_framework.viewsets import ModelViewSet
+from rest_framework import mixins
+from rest_framework.viewsets import GenericViewSet, ModelViewSet, ViewSet
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Colecao, Arte, Personalizacao
+from . import facetas, feed, impressao, mockups, uploads
+from . import render as fila_render
+from .busca import BuscaFilter
+from .contadores import capa_colecao
+from .models import Colecao, Arte, Personalizacao, UploadArte
 from .serializers import (
     ColecaoSerializer,
     ColecaoDetailSerializer,
     ArteSerializer,
-    PersonalizacaoSerializer
+    PersonalizacaoSerializer,
+    UploadArteSerializer
 )
 
 
@@ -48,11 +54,11 @@ def colecao_list_view(request):
     if artista_id:
         colecoes = colecoes.filter(artista_id=artista_id)
     
-    artistas = [c.artista for c in Colecao.objects.filter(ativa=True)]
-    artistas = list(dict.fromkeys(artistas))  # Remove duplicatas
+    artistas = facetas.artistas_com_colecoes()
     
     return render(request, 'creations/colecao_list.html', {
-        'colecoes': colecoes.prefetch_related('artes'),
+        # Capa e contagem vêm na mesma consulta (sem COUNT/first() por coleção)
+        'colecoes': colecoes.select_related('artista').annotate(capa=capa_colecao()),
         'busca': busca,
         'artistas': artistas,
         'artista_selecionado': artista_id,
@@ -92,8 +98,7 @@ def arte_list_view(request):
         artes = artes.filter(artista_id=artista_id)
     
     colecoes = Colecao.objects.filter(ativa=True)
-    artistas = [a.artista for a in Arte.objects.filter(ativa=True)]
-    artistas = list(dict.fromkeys(artistas))
+    artistas = facetas.artistas_com_artes()
     
     return render(request, 'creations/arte_list.html', {
         'artes': artes,
@@ -157,6 +162,38 @@ def personalizacao_list_view(request):
 # ============================================================================
 
 
+def responder_render(tipo, entrada, request):
+    """Enfileira a renderização e responde 200 (pronto), 202 (em andamento) ou 503 (fila cheia)"""
+    try:
+        atual = fila_render.submeter(tipo, entrada, request.user.pk)
+    except fila_render.FilaCheia as e:
+        return Response({'erro': str(e)}, status=503, headers={'Retry-After': '5'})
+    status = 202 if atual['status'] not in fila_render.FINAIS else 200
+    return Response(fila_render.representar(atual, request), status=status)
+
+
+class RenderViewSet(ViewSet):
+    """
+    Status dos jobs de renderização.
+
+    GET /renders/<id>/?aguardar=N espera até N segundos (máx. 20) pelo fim
+    do job antes de responder (long polling).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def retrieve(self, request, pk=None):
+        try:
+            segundos = float(request.query_params.get('aguardar', 0))
+        except ValueError:
+            return Response({'erro': 'aguardar deve ser um número'}, status=400)
+        if not fila_render.autorizado(pk, request.user):
+            return Response({'erro': 'Job não encontrado'}, status=404)
+        atual = fila_render.aguardar(pk, segundos)
+        if atual is None:
+            return Response({'erro': 'Job não encontrado'}, status=404)
+        return Response(fila_render.representar(atual, request))
+
+
 class ColecaoViewSet(ModelViewSet):
     """
     ViewSet para gerenciar coleções de artes.
@@ -166,9 +203,12 @@ class ColecaoViewSet(ModelViewSet):
     """
     serializer_class = ColecaoSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    # A busca vem depois da ordenação para poder ordenar por relevância
+    filter_backends = [DjangoFilterBackend, OrderingFilter, BuscaFilter]
     filterset_fields = ['ativa', 'artista']
     search_fields = ['nome', 'descricao', 'artista__nome_artistico']
+    # ?modo_busca=aproximada: nome da coleção ou do artista (ver creations.busca)
+    campos_busca_aproximada = {'colecao': 'pk', 'artista': 'artista_id'}
     ordering_fields = ['nome', 'criado_em']
     ordering = ['-criado_em']
 
@@ -177,7 +217,7 @@ class ColecaoViewSet(ModelViewSet):
         Retorna coleções ativas.
         Superar pode ver todas, artista vê apenas suas coleções.
         """
-        qs = Colecao.objects.filter(ativa=True)
+        qs = Colecao.objects.filter(ativa=True).select_related('artista')
         
         if not self.request.user.is_superuser:
             if hasattr(self.request.user, 'artista'):
@@ -246,9 +286,12 @@ class ArteViewSet(ModelViewSet):
     """
     serializer_class = ArteSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    # A busca vem depois da ordenação para poder ordenar por relevância
+    filter_backends = [DjangoFilterBackend, OrderingFilter, BuscaFilter]
     filterset_fields = ['ativa', 'artista', 'colecao']
     search_fields = ['nome', 'descricao', 'artista__nome_artistico', 'colecao__nome']
+    # ?modo_busca=aproximada: nome da arte, do artista ou da coleção (ver creations.busca)
+    campos_busca_aproximada = {'arte': 'pk', 'artista': 'artista_id', 'colecao': 'colecao_id'}
     ordering_fields = ['nome', 'criado_em']
     ordering = ['-criado_em']
 
@@ -339,13 +382,83 @@ class ArteViewSet(ModelViewSet):
             return Response(serializer.data)
         return Response({'erro': 'artista_id é obrigatório'}, status=400)
 
+    @action(detail=True, methods=['get'])
+    def impressao(self, request, pk=None):
+        """Arquivo de impressão da arte (gerado na fila de renderização)."""
+        arte = self.get_object()
+        return responder_render('impressao', impressao.dados(arte), request)
+
     @action(detail=False, methods=['get'])
     def ultimas(self, request):
-        """Retorna as artes criadas mais recentemente."""
-        limite = request.query_params.get('limite', 10)
-        artes = self.get_queryset()[:int(limite)]
-        serializer = self.get_serializer(artes, many=True)
-        return Response(serializer.data)
+        """
+        Feed das artes ativas mais recentes (ver creations.feed).
+
+        ?limite= (máx. 50) e ?cursor= com o token 'proximo' da página anterior.
+        """
+        cursor = request.query_params.get('cursor')
+        try:
+            limite = feed.limitar(request.query_params.get('limite'))
+            if request.accepted_renderer.format == 'json':
+                return feed.resposta_json(request, cursor, limite)
+            return Response(feed.pagina(cursor, limite, request))
+        except ValueError as e:
+            return Response({'erro': str(e)}, status=400)
+
+
+class UploadArteViewSet(mixins.CreateModelMixin,
+                        mixins.RetrieveModelMixin,
+                        mixins.DestroyModelMixin,
+                        GenericViewSet):
+    """
+    Upload em partes (retomável) do arquivo de uma arte (ver creations.uploads).
+
+    POST   /uploads/                   inicia (nome_arquivo, tamanho, sha256 e arte ou nome)
+    PUT    /uploads/<id>/parte/?offset= envia uma parte (corpo = bytes da parte)
+    GET    /uploads/<id>/              estado; `recebido` é o offset da próxima parte
+    POST   /uploads/<id>/concluir/     confere o SHA-256 e grava o arquivo na arte
+    DELETE /uploads/<id>/              cancela
+    """
+    serializer_class = UploadArteSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return UploadArte.objects.filter(usuario=self.request.user)
+
+    def perform_destroy(self, instance):
+        uploads.cancelar(instance)
+
+    @action(detail=True, methods=['put'])
+    def parte(self, request, pk=None):
+        """Grava os bytes do corpo a partir de ?offset= (lidos em blocos, sem parser)."""
+        upload = self.get_object()
+        try:
+            offset = int(request.query_params.get('offset', ''))
+            tamanho = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return Response({'erro': 'offset deve ser um número inteiro'}, status=400)
+        try:
+            uploads.receber_parte(upload, offset, request.stream, tamanho)
+        except uploads.OffsetInvalido as e:
+            return Response({'erro': str(e), 'recebido': e.recebido}, status=409)
+        except uploads.UploadOcupado as e:
+            return Response({'erro': str(e)}, status=409, headers={'Retry-After': '1'})
+        except ValueError as e:
+            return Response({'erro': str(e)}, status=400)
+        return Response(self.get_serializer(upload).data)
+
+    @action(detail=True, methods=['post'])
+    def concluir(self, request, pk=None):
+        """Confere o arquivo montado e grava na arte (criando-a, se for o caso)."""
+        upload = self.get_object()
+        try:
+            arte = uploads.concluir(upload, getattr(request.user, 'perfil_artista', None))
+        except ValueError as e:
+            return Response({'erro': str(e)}, status=400)
+        upload.refresh_from_db()
+        return Response({
+            'upload': self.get_serializer(upload).data,
+            'arte': ArteSerializer(arte, context=self.get_serializer_context()).data,
+        })
 
 
 class PersonalizacaoViewSet(ModelViewSet):
@@ -371,37 +484,43 @@ class PersonalizacaoViewSet(ModelViewSet):
         """
         Retorna personalizações.
         Superusuário vê todas, artista vê apenas de suas artes.
+        Alterar e remover: só o artista dono da arte (ou superusuário).
         """
         qs = Personalizacao.objects.all()
         
         if not self.request.user.is_superuser:
             if hasattr(self.request.user, 'artista'):
                 qs = qs.filter(arte__artista=self.request.user.artista) # type: ignore
+            if self.action in ('update', 'partial_update', 'destroy'):
+                qs = qs.filter(arte__artista__usuario=self.request.user)
         
         return qs
 
+    def create(self, request, *args, **kwargs):
+        """
+        Cria uma personalização para uma arte, ou devolve a idêntica já
+        existente (200 em vez de 201).
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        status = 201 if serializer.criada else 200
+        return Response(serializer.data, status=status, headers=self.get_success_headers(serializer.data))
+
     def perform_create(self, serializer):
         """Cria uma personalização para uma arte."""
         serializer.save()
 
-    def perform_update(self, serializer):
-        """Verifica permissão antes de atualizar."""
-        obj = self.get_object()
-        if obj.arte.artista != self.request.user.artista and not self.request.user.is_superuser:
-            return Response(
-                {'erro': 'Você só pode editar personalizações de suas próprias artes'},
-                status=403
-            )
-        serializer.save()
-
-    def perform_destroy(self, instance):
-        """Verifica permissão antes de deletar."""
-        if instance.arte.artista != self.request.user.artista and not self.request.user.is_superuser: # type: ignore
+    def destroy(self, request, *args, **kwargs):
+        """Remove a personalização, se nenhum pedido a usa."""
+        instance = self.get_object()
+        if instance.referenciada():
             return Response(
-                {'erro': 'Você só pode deletar personalizações de suas próprias artes'},
-                status=403
+                {'erro': 'Personalização usada em pedidos não pode ser removida'},
+                status=400
             )
         instance.delete()
+        return Response(status=204)
 
     @action(detail=False, methods=['get'])
     def por_arte(self, request):
@@ -418,6 +537,17 @@ class PersonalizacaoViewSet(ModelViewSet):
             return Response(serializer.data)
         return Response({'erro': 'arte_id é obrigatório'}, status=400)
 
+    @action(detail=True, methods=['get'])
+    def preview(self, request, pk=None):
+        """
+        Mockup da personalização (renderizado uma vez por conteúdo).
+
+        Se ainda não existe, a renderização é enfileirada e a resposta é 202
+        com a URL de status do job.
+        """
+        personalizacao = self.get_object()
+        return responder_render('mockup', mockups.dados(personalizacao), request)
+
     @action(detail=False, methods=['get'])
     def por_colecao(self, request):
         """Lista personalizações de uma coleção."""
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from core import derivadas
+
+from .models import Badge
+
+
+@receiver(post_save, sender=Badge)
+def gerar_derivadas_badge(sender, instance, **kwargs):
+    derivadas.agendar(instance.icone)
@@ -1,14 +1,17 @@
 from django.contrib import admin
-from .models import Pedido, ItemPedido
+from django.http import StreamingHttpResponse
+from .models import Pedido, ItemPedido, EventoPedido, PedidoArquivado
+from . import exportacao
 
 
 @admin.register(Pedido)
 class PedidoAdmin(admin.ModelAdmin):
     """Admin para gerenciar Pedidos"""
-    list_display = ('id', 'usuario', 'artista', 'status_pedido', 'valor_total', 'data_pedido')
+    list_display = ('id', 'usuario', 'artista', 'status_pedido', 'valor_total', 'quantidade_itens', 'data_pedido')
     list_filter = ('status_pedido', 'data_pedido', 'artista')
     search_fields = ('usuario__nome', 'usuario__email', 'artista__nome_artistico')
     readonly_fields = ('id', 'data_pedido', 'data_pagamento', 'data_producao', 'data_impressao', 'data_envio', 'data_conclusao')
+    actions = ['exportar_csv']
     
     fieldsets = (
         ('Informações do Pedido', {
@@ -28,6 +31,15 @@ class PedidoAdmin(admin.ModelAdmin):
         }),
     )
 
+    @admin.action(description='Exportar pedidos selecionados (CSV)')
+    def exportar_csv(self, request, queryset):
+        response = StreamingHttpResponse(
+            exportacao.gerar(queryset, 'csv'),
+            content_type=exportacao.FORMATOS['csv'],
+        )
+        response['Content-Disposition'] = 'attachment; filename="pedidos.csv"'
+        return response
+
 
 @admin.register(ItemPedido)
 class ItemPedidoAdmin(admin.ModelAdmin):
@@ -35,4 +47,28 @@ class ItemPedidoAdmin(admin.ModelAdmin):
     list_display = ('id', 'pedido', 'produto', 'quantidade', 'preco_unitario', 'subtotal')
     search_fields = ('pedido__id', 'produto__nome')
     list_filter = ('produto', 'criado_em')
-    readonly_fields = ('subtotal', 'criado_em', 'atualizado_em')
\ No newline at end of file
+    readonly_fields = ('subtotal', 'criado_em', 'atualizado_em')
+
+
+@admin.register(EventoPedido)
+class EventoPedidoAdmin(admin.ModelAdmin):
+    """Admin (somente leitura) do outbox de eventos de pedido"""
+    list_display = ('id', 'pedido_id', 'status_anterior', 'status_novo', 'criado_em', 'processado_em', 'tentativas')
+    list_filter = ('status_novo', 'processado_em')
+    search_fields = ('pedido_id',)
+    readonly_fields = ('pedido_id', 'status_anterior', 'status_novo', 'criado_em', 'processado_em', 'tentativas', 'erro')
+
+
+
+@admin.register(PedidoArquivado)
+class PedidoArquivadoAdmin(admin.ModelAdmin):
+    """Consulta de pedidos arquivados (somente leitura)"""
+    list_display = ('id', 'usuario_id', 'artista_id', 'status_pedido', 'valor_total', 'data_pedido', 'arquivado_em')
+    list_filter = ('status_pedido',)
+    search_fields = ('id',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,107 @@
+"""
+Arquivamento de pedidos concluídos e cancelados.
+
+Move pedidos antigos (e seus itens) para PedidoArquivado/ItemPedidoArquivado
+em lotes, cada um na sua transação, para manter pequenas as tabelas usadas
+pelas listagens e pelo admin. O detalhe do pedido faz fallback para o
+arquivo (ver buscar_pedido_arquivado).
+
+Ao arquivar:
+- o Payment vinculado perde a FK (pedido=None) e seu id fica em
+  PedidoArquivado.pagamento_id;
+- a entrada da fila de impressão, já encerrada, é removida junto com o pedido.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from payments.models import Payment
+
+from .models import Pedido, ItemPedido, PedidoArquivado, ItemPedidoArquivado
+
+STATUS_ARQUIVAVEIS = ['concluido', 'cancelado']
+
+
+def dias_para_arquivar():
+    """Idade mínima (dias) para arquivar. Controlado por settings.PEDIDO_ARQUIVAMENTO_DIAS"""
+    return getattr(settings, 'PEDIDO_ARQUIVAMENTO_DIAS', 180)
+
+
+def pedidos_arquivaveis(dias=None):
+    if dias is None:
+        dias = dias_para_arquivar()
+    limite = timezone.now() - timedelta(days=dias)
+    return Pedido.objects.filter(
+        status_pedido__in=STATUS_ARQUIVAVEIS,
+        data_pedido__lt=limite,
+    )
+
+
+def _campos_copiados(modelo):
+    """Colunas do modelo de arquivo que existem com o mesmo nome no original"""
+    ignorados = {'arquivado_em', 'pagamento_id'}
+    return [f.attname for f in modelo._meta.concrete_fields if f.attname not in ignorados]
+
+
+@transaction.atomic
+def arquivar_lote(ids):
+    """Copia os pedidos e itens informados para o arquivo e os remove das tabelas quentes"""
+    pedidos = Pedido.objects.select_for_update().filter(
+        pk__in=ids,
+        status_pedido__in=STATUS_ARQUIVAVEIS,
+    )
+    pagamentos = dict(
+        Payment.objects.filter(pedido_id__in=ids).values_list('pedido_id', 'id')
+    )
+
+    campos_pedido = _campos_copiados(PedidoArquivado)
+    arquivados = [
+        PedidoArquivado(pagamento_id=pagamentos.get(linha['id']), **linha)
+        for linha in pedidos.values(*campos_pedido)
+    ]
+    ids = [p.id for p in arquivados]
+    if not ids:
+        return 0
+
+    campos_item = _campos_copiados(ItemPedidoArquivado)
+    itens = [
+        ItemPedidoArquivado(**linha)
+        for linha in ItemPedido.objects.filter(pedido_id__in=ids).values(*campos_item)
+    ]
+
+    PedidoArquivado.objects.bulk_create(arquivados)
+    ItemPedidoArquivado.objects.bulk_create(itens)
+
+    Payment.objects.filter(pedido_id__in=ids).update(pedido=None)
+    ItemPedido.objects.filter(pedido_id__in=ids).delete()
+    Pedido.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def arquivar_pedidos(dias=None, tamanho_lote=500, max_lotes=None):
+    """
+    Arquiva os pedidos elegíveis em lotes de tamanho_lote.
+
+    Retorna o total de pedidos arquivados.
+    """
+    total = 0
+    lotes = 0
+    while max_lotes is None or lotes < max_lotes:
+        ids = list(
+            pedidos_arquivaveis(dias).order_by('id').values_list('id', flat=True)[:tamanho_lote]
+        )
+        if not ids:
+            break
+        total += arquivar_lote(ids)
+        lotes += 1
+    return total
+
+
+def buscar_pedido_arquivado(pk, usuario=None):
+    """Retorna o PedidoArquivado (com itens pré-carregados) ou None"""
+    queryset = PedidoArquivado.objects.select_related('usuario', 'artista', 'impressora')
+    if usuario is not None:
+        queryset = queryset.filter(usuario=usuario)
+    return queryset.prefetch_related('itens__produto').filter(pk=pk).first()
@@ -0,0 +1,85 @@
+"""
+Consumo do outbox de eventos de pedido (EventoPedido).
+
+Os apps interessados registram handlers por status de destino:
+
+    from orders.eventos import handler
+
+    @handler('pago')
+    def entrar_na_fila(evento):
+        ...
+
+O worker (`manage.py processar_eventos_pedido`) chama processar_lote()
+repetidamente; cada evento é entregue a todos os handlers do seu status.
+"""
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EventoPedido
+
+logger = logging.getLogger(__name__)
+
+# Depois de tantas falhas o evento deixa de ser reprocessado automaticamente
+MAX_TENTATIVAS = 5
+
+_handlers = defaultdict(list)
+
+
+def handler(*status):
+    """Registra a função como handler dos eventos com os status informados ('*' = todos)"""
+    def decorator(func):
+        for s in status or ('*',):
+            _handlers[s].append(func)
+        return func
+    return decorator
+
+
+def handlers_para(evento):
+    return _handlers[evento.status_novo] + _handlers['*']
+
+
+def processar_lote(tamanho=100):
+    """
+    Processa um lote de eventos pendentes, em ordem de criação.
+
+    Os eventos são travados com SKIP LOCKED (onde o banco suporta), então
+    vários workers podem consumir a fila ao mesmo tempo. Falhas de handler
+    incrementam `tentativas` e guardam o erro sem bloquear o restante do lote.
+
+    Retorna a tupla (processados, falhas) do lote.
+    """
+    with transaction.atomic():
+        eventos = list(
+            EventoPedido.objects.select_for_update(skip_locked=True)
+            .filter(processado_em__isnull=True, tentativas__lt=MAX_TENTATIVAS)
+            .order_by('id')[:tamanho]
+        )
+        if not eventos:
+            return 0, 0
+
+        processados = []
+        falhas = []
+        for evento in eventos:
+            try:
+                with transaction.atomic():
+                    for func in handlers_para(evento):
+                        func(evento)
+            except Exception as e:
+                logger.exception("Falha ao processar evento #%s", evento.id)
+                evento.tentativas += 1
+                evento.erro = str(e)
+                falhas.append(evento)
+            else:
+                evento.processado_em = timezone.now()
+                evento.erro = ''
+                processados.append(evento)
+
+        if processados:
+            EventoPedido.objects.bulk_update(processados, ['processado_em', 'erro'])
+        if falhas:
+            EventoPedido.objects.bulk_update(falhas, ['tentativas', 'erro'])
+
+    return len(processados), len(falhas)
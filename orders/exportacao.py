@@ -0,0 +1,107 @@
+"""
+Exportação em streaming de pedidos com seus itens.
+
+Cada linha é um item (pedidos sem itens saem com as colunas de item vazias).
+As linhas são lidas com .values().iterator(), em blocos e sem instanciar
+modelos, e escritas uma a uma: a memória fica constante para qualquer volume.
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Pedido
+
+# Linhas buscadas por ida ao banco (cursor no servidor onde suportado)
+TAMANHO_BLOCO = 2000
+
+COLUNAS = [
+    ('pedido_id', 'id'),
+    ('data_pedido', 'data_pedido'),
+    ('status_pedido', 'status_pedido'),
+    ('usuario_id', 'usuario_id'),
+    ('usuario_email', 'usuario__email'),
+    ('artista_id', 'artista_id'),
+    ('valor_total', 'valor_total'),
+    ('forma_pagamento', 'forma_pagamento'),
+    ('status_pagamento', 'status_pagamento'),
+    ('item_id', 'itens__id'),
+    ('produto_id', 'itens__produto_id'),
+    ('produto_nome', 'itens__produto__nome'),
+    ('personalizacao_id', 'itens__personalizacao_id'),
+    ('personalizacao_texto', 'itens__personalizacao__texto'),
+    ('quantidade', 'itens__quantidade'),
+    ('preco_unitario', 'itens__preco_unitario'),
+    ('subtotal', 'itens__subtotal'),
+]
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _inicio_do_dia(data):
+    return timezone.make_aware(datetime.combine(data, time.min))
+
+
+def filtrar_pedidos(queryset=None, inicio=None, fim=None, status=None):
+    """
+    Aplica os filtros de período (datas inclusivas, 'AAAA-MM-DD') e status.
+
+    Levanta ValueError para datas inválidas.
+    """
+    if queryset is None:
+        queryset = Pedido.objects.all()
+
+    if inicio:
+        data = parse_date(inicio)
+        if data is None:
+            raise ValueError(f"Data inicial inválida: {inicio}")
+        queryset = queryset.filter(data_pedido__gte=_inicio_do_dia(data))
+    if fim:
+        data = parse_date(fim)
+        if data is None:
+            raise ValueError(f"Data final inválida: {fim}")
+        queryset = queryset.filter(data_pedido__lt=_inicio_do_dia(data + timedelta(days=1)))
+    if status:
+        queryset = queryset.filter(status_pedido__in=status)
+    return queryset
+
+
+def linhas(queryset):
+    """Gera dicts (coluna → valor) de cada item, lendo o banco em blocos"""
+    campos = [campo for _, campo in COLUNAS]
+    valores = queryset.order_by('id', 'itens__id').values_list(*campos)
+    for linha in valores.iterator(chunk_size=TAMANHO_BLOCO):
+        yield dict(zip((nome for nome, _ in COLUNAS), linha))
+
+
+class _Eco:
+    """Buffer falso para o csv.writer devolver a linha em vez de gravá-la"""
+    def write(self, valor):
+        return valor
+
+
+def gerar_csv(queryset):
+    writer = csv.writer(_Eco())
+    yield writer.writerow([nome for nome, _ in COLUNAS])
+    for linha in linhas(queryset):
+        yield writer.writerow(linha.values())
+
+
+def gerar_ndjson(queryset):
+    for linha in linhas(queryset):
+        yield json.dumps(linha, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def gerar(queryset, formato):
+    """Retorna o gerador de conteúdo do formato pedido ('csv' ou 'ndjson')"""
+    if formato == 'csv':
+        return gerar_csv(queryset)
+    if formato == 'ndjson':
+        return gerar_ndjson(queryset)
+    raise ValueError(f"Formato não suportado: {formato}. Opções: {list(FORMATOS)}")
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from orders.arquivamento import arquivar_pedidos, dias_para_arquivar
+
+
+class Command(BaseCommand):
+    """
+    Move pedidos concluídos/cancelados antigos para as tabelas de arquivo.
+
+    Cada lote roda na sua própria transação; o comando pode ser interrompido
+    e executado de novo sem perda.
+    """
+    help = 'Arquiva pedidos concluídos e cancelados mais antigos que --dias.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=None,
+                            help='Idade mínima em dias (padrão: settings.PEDIDO_ARQUIVAMENTO_DIAS).')
+        parser.add_argument('--lote', type=int, default=500, help='Pedidos por transação.')
+        parser.add_argument('--max-lotes', type=int, default=None, help='Limita o número de lotes.')
+
+    def handle(self, *args, **options):
+        dias = options['dias'] if options['dias'] is not None else dias_para_arquivar()
+        total = arquivar_pedidos(dias=dias, tamanho_lote=options['lote'], max_lotes=options['max_lotes'])
+        self.stdout.write(self.style.SUCCESS(f'{total} pedido(s) arquivado(s) (mais antigos que {dias} dias).'))
@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from orders.models import Pedido
+from orders.services import PedidoService
+
+
+class Command(BaseCommand):
+    """
+    Cancela pedidos parados em 'criado' há mais de --horas.
+
+    Usa a transição em lote do PedidoService, que registra os eventos no
+    outbox. Não devolve estoque: a reserva só é feita no pagamento, então
+    pedidos em 'criado' não têm nada reservado.
+    """
+    help = "Cancela pedidos em 'criado' mais antigos que --horas."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horas', type=int, default=None,
+                            help='Idade mínima (padrão: settings.PEDIDO_CRIADO_EXPIRA_HORAS).')
+        parser.add_argument('--lote', type=int, default=500, help='Pedidos por transação.')
+
+    def handle(self, *args, **options):
+        horas = options['horas']
+        if horas is None:
+            horas = getattr(settings, 'PEDIDO_CRIADO_EXPIRA_HORAS', 24)
+        limite = timezone.now() - timedelta(hours=horas)
+
+        total = 0
+        while True:
+            ids = list(
+                Pedido.objects.filter(status_pedido='criado', data_pedido__lt=limite)
+                .order_by('id')
+                .values_list('id', flat=True)[:options['lote']]
+            )
+            if not ids:
+                break
+            resultado = PedidoService.transicionar_em_lote(ids, 'cancelado')
+            total += len(resultado['transicionados'])
+            if not resultado['transicionados']:
+                break
+
+        self.stdout.write(self.style.SUCCESS(f'{total} pedido(s) expirado(s).'))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from orders import exportacao
+
+
+class Command(BaseCommand):
+    """
+    Exporta pedidos e itens em CSV ou NDJSON.
+
+    Escreve linha a linha (na saída padrão ou em --saida), com a mesma
+    leitura em blocos do endpoint de exportação.
+    """
+    help = 'Exporta pedidos com seus itens (CSV/NDJSON) filtrando por período e status.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--formato', choices=list(exportacao.FORMATOS), default='csv')
+        parser.add_argument('--inicio', help='Data inicial (AAAA-MM-DD), inclusiva.')
+        parser.add_argument('--fim', help='Data final (AAAA-MM-DD), inclusiva.')
+        parser.add_argument('--status', nargs='*', default=None, help='Status dos pedidos.')
+        parser.add_argument('--saida', help='Arquivo de destino (padrão: saída padrão).')
+
+    def handle(self, *args, **options):
+        try:
+            queryset = exportacao.filtrar_pedidos(
+                inicio=options['inicio'],
+                fim=options['fim'],
+                status=options['status'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        conteudo = exportacao.gerar(queryset, options['formato'])
+        if options['saida']:
+            with open(options['saida'], 'w', encoding='utf-8', newline='') as arquivo:
+                arquivo.writelines(conteudo)
+        else:
+            for trecho in conteudo:
+                self.stdout.write(trecho, ending='')
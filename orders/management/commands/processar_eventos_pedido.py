@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from orders.eventos import processar_lote
+
+
+class Command(BaseCommand):
+    """
+    Worker local do outbox de eventos de pedido.
+
+    Sem --continuo, esvazia a fila e termina (útil em cron). Com --continuo,
+    fica aguardando novos eventos, dormindo --intervalo segundos quando a
+    fila está vazia. Um lote só com falhas também encerra a rodada, para não
+    reprocessar o mesmo erro em sequência.
+    """
+    help = 'Consome os eventos pendentes do ciclo de vida dos pedidos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=100, help='Eventos por transação.')
+        parser.add_argument('--continuo', action='store_true', help='Continua aguardando novos eventos.')
+        parser.add_argument('--intervalo', type=float, default=1.0, help='Pausa (s) com a fila vazia.')
+
+    def handle(self, *args, **options):
+        total = 0
+        total_falhas = 0
+        try:
+            while True:
+                processados, falhas = processar_lote(options['lote'])
+                total += processados
+                total_falhas += falhas
+                if processados:
+                    continue
+                if not options['continuo']:
+                    break
+                time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f'{total} evento(s) processado(s).'))
+        if total_falhas:
+            self.stdout.write(self.style.WARNING(f'{total_falhas} falha(s) de processamento.'))
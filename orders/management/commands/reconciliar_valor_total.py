@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+
+from orders.models import Pedido
+from orders.services import PedidoService
+
+
+class Command(BaseCommand):
+    """
+    Reconciliação periódica do valor_total dos pedidos.
+
+    Compara o valor e os contadores mantidos por delta (PedidoService) com
+    os itens reais e, com --corrigir, regrava os pedidos divergentes.
+    """
+    help = 'Compara o valor_total dos pedidos com a soma dos itens e corrige divergências.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--status',
+            nargs='*',
+            default=None,
+            help='Limita a verificação aos status informados (ex.: criado pago).'
+        )
+        parser.add_argument(
+            '--corrigir',
+            action='store_true',
+            help='Recalcula o valor_total dos pedidos divergentes.'
+        )
+
+    def handle(self, *args, **options):
+        pedidos = Pedido.objects.all()
+        if options['status']:
+            pedidos = pedidos.filter(status_pedido__in=options['status'])
+
+        divergentes = PedidoService.pedidos_divergentes(pedidos).order_by('id')
+        total = 0
+        for pedido in divergentes.iterator():
+            total += 1
+            self.stdout.write(
+                f"Pedido #{pedido.id}: armazenado={pedido.valor_total} "
+                f"calculado={pedido.valor_calculado} "
+                f"itens={pedido.quantidade_itens}/{pedido.itens_calculado} "
+                f"unidades={pedido.quantidade_unidades}/{pedido.unidades_calculado}"
+            )
+            if options['corrigir']:
+                PedidoService.reconciliar_valor_total(pedido)
+
+        if total == 0:
+            self.stdout.write(self.style.SUCCESS('Nenhuma divergência encontrada.'))
+        elif options['corrigir']:
+            self.stdout.write(self.style.SUCCESS(f'{total} pedido(s) corrigido(s).'))
+        else:
+            self.stdout.write(self.style.WARNING(f'{total} pedido(s) divergente(s).'))
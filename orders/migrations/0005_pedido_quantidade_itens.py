@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:05
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def preencher_contadores(apps, schema_editor):
+    Pedido = apps.get_model('orders', 'Pedido')
+    ItemPedido = apps.get_model('orders', 'ItemPedido')
+    itens = ItemPedido.objects.filter(pedido=OuterRef('pk')).values('pedido')
+    Pedido.objects.update(
+        quantidade_itens=Coalesce(Subquery(itens.annotate(n=Count('id')).values('n')), Value(0)),
+        quantidade_unidades=Coalesce(Subquery(itens.annotate(n=Sum('quantidade')).values('n')), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_alter_itempedido_subtotal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pedido',
+            name='quantidade_itens',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='pedido',
+            name='quantidade_unidades',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(preencher_contadores, migrations.RunPython.noop),
+    ]
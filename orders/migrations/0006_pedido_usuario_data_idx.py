@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artists', '0002_alter_artista_options_and_more'),
+        ('orders', '0005_pedido_quantidade_itens'),
+        ('printing', '0003_alter_impressora_options_filaimpressao'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['usuario', '-data_pedido', '-id'], name='pedido_usuario_data_idx'),
+        ),
+    ]
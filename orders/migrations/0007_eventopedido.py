@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_pedido_usuario_data_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoPedido',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('pedido_id', models.PositiveIntegerField()),
+                ('status_anterior', models.CharField(blank=True, max_length=20)),
+                ('status_novo', models.CharField(max_length=20)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('processado_em', models.DateTimeField(blank=True, null=True)),
+                ('tentativas', models.PositiveSmallIntegerField(default=0)),
+                ('erro', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name': 'Evento do Pedido',
+                'verbose_name_plural': 'Eventos do Pedido',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['pedido_id'], name='orders_even_pedido__e005f6_idx'), models.Index(condition=models.Q(('processado_em__isnull', True)), fields=['id'], name='evento_pedido_pendente_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artists', '0002_alter_artista_options_and_more'),
+        ('creations', '0004_alter_arte_options_alter_colecao_options_and_more'),
+        ('orders', '0007_eventopedido'),
+        ('printing', '0003_alter_impressora_options_filaimpressao'),
+        ('products', '0002_produto_imagem'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PedidoArquivado',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('status_pedido', models.CharField(choices=[('criado', 'Criado'), ('pago', 'Pago'), ('em_producao', 'Em Produção'), ('impresso', 'Impresso'), ('enviado', 'Enviado'), ('concluido', 'Concluído'), ('cancelado', 'Cancelado')], max_length=20)),
+                ('valor_total', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('quantidade_itens', models.PositiveIntegerField(default=0)),
+                ('quantidade_unidades', models.PositiveIntegerField(default=0)),
+                ('data_pedido', models.DateTimeField()),
+                ('data_pagamento', models.DateTimeField(blank=True, null=True)),
+                ('data_producao', models.DateTimeField(blank=True, null=True)),
+                ('data_impressao', models.DateTimeField(blank=True, null=True)),
+                ('data_envio', models.DateTimeField(blank=True, null=True)),
+                ('data_conclusao', models.DateTimeField(blank=True, null=True)),
+                ('forma_pagamento', models.CharField(blank=True, choices=[('cartao_credito', 'Cartão de Crédito'), ('cartao_debito', 'Cartão de Débito'), ('pix', 'PIX'), ('boleto', 'Boleto')], max_length=20, null=True)),
+                ('status_pagamento', models.CharField(blank=True, max_length=20, null=True)),
+                ('pagamento_id', models.IntegerField(blank=True, null=True)),
+                ('arquivado_em', models.DateTimeField(auto_now_add=True)),
+                ('artista', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='artists.artista')),
+                ('impressora', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='printing.impressora')),
+                ('usuario', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Pedido Arquivado',
+                'verbose_name_plural': 'Pedidos Arquivados',
+                'ordering': ['-data_pedido'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ItemPedidoArquivado',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('quantidade', models.PositiveIntegerField()),
+                ('preco_unitario', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('subtotal', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('criado_em', models.DateTimeField(blank=True, null=True)),
+                ('atualizado_em', models.DateTimeField(blank=True, null=True)),
+                ('personalizacao', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='creations.personalizacao')),
+                ('produto', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='products.produto')),
+                ('pedido', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='itens', to='orders.pedidoarquivado')),
+            ],
+            options={
+                'verbose_name': 'Item do Pedido Arquivado',
+                'verbose_name_plural': 'Itens dos Pedidos Arquivados',
+                'ordering': ['criado_em'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='pedidoarquivado',
+            index=models.Index(fields=['usuario', '-data_pedido', '-id'], name='pedido_arq_usuario_data_idx'),
+        ),
+    ]
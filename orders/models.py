@@ -27,6 +27,17 @@ class Pedido(models.Model):
         ('cancelado', 'Cancelado'),
     ]
     
+    # Transições válidas: status atual → próximos status permitidos
+    FLUXO_STATUS = {
+        'criado': ['pago', 'cancelado'],
+        'pago': ['em_producao', 'cancelado'],
+        'em_producao': ['impresso'],
+        'impresso': ['enviado'],
+        'enviado': ['concluido'],
+        'concluido': [],
+        'cancelado': [],
+    }
+    
     FORMA_PAGAMENTO_CHOICES = [
         ('cartao_credito', 'Cartão de Crédito'),
         ('cartao_debito', 'Cartão de Débito'),
@@ -54,6 +65,10 @@ class Pedido(models.Model):
         validators=[MinValueValidator(0)]
     )
     
+    # Contadores mantidos pelo PedidoService (evitam COUNT por pedido nas listagens)
+    quantidade_itens = models.PositiveIntegerField(default=0, editable=False)
+    quantidade_unidades = models.PositiveIntegerField(default=0, editable=False)
+    
     # Datas
     data_pedido = models.DateTimeField(auto_now_add=True)
     data_pagamento = models.DateTimeField(null=True, blank=True)
@@ -73,6 +88,10 @@ class Pedido(models.Model):
         ordering = ['-data_pedido']
         verbose_name = 'Pedido'
         verbose_name_plural = 'Pedidos'
+        indexes = [
+            # Histórico do cliente com paginação por cursor (data_pedido, id)
+            models.Index(fields=['usuario', '-data_pedido', '-id'], name='pedido_usuario_data_idx'),
+        ]
     
     def __str__(self):
         return f"Pedido #{self.id} - {self.usuario.nome} - {self.status_pedido}"
@@ -83,16 +102,12 @@ class Pedido(models.Model):
     
     def pode_mudar_status(self, novo_status):
         """Valida transição de status"""
-        fluxo_valido = {
-            'criado': ['pago', 'cancelado'],
-            'pago': ['em_producao', 'cancelado'],
-            'em_producao': ['impresso'],
-            'impresso': ['enviado'],
-            'enviado': ['concluido'],
-            'concluido': [],
-            'cancelado': [],
-        }
-        return novo_status in fluxo_valido.get(self.status_pedido, [])
+        return novo_status in self.FLUXO_STATUS.get(self.status_pedido, [])
+
+    @classmethod
+    def status_antecessores(cls, novo_status):
+        """Status a partir dos quais é permitido chegar em novo_status"""
+        return [atual for atual, proximos in cls.FLUXO_STATUS.items() if novo_status in proximos]
 
 
 
@@ -131,3 +146,113 @@ class ItemPedido(models.Model):
     
     def __str__(self):
         return f"Item #{self.id} - {self.produto.nome} x{self.quantidade}"
+
+
+
+class EventoPedido(models.Model):
+    """
+    Outbox de eventos do ciclo de vida do pedido.
+
+    Cada transição de status grava uma linha na mesma transação do UPDATE
+    do pedido. O comando `processar_eventos_pedido` consome a tabela em
+    lotes e dispara os efeitos colaterais fora do caminho da requisição.
+    """
+    id = models.BigAutoField(primary_key=True)
+
+    # Sem FK: o evento sobrevive ao arquivamento/remoção do pedido
+    pedido_id = models.PositiveIntegerField()
+    status_anterior = models.CharField(max_length=20, blank=True)
+    status_novo = models.CharField(max_length=20)
+
+    criado_em = models.DateTimeField(auto_now_add=True)
+    processado_em = models.DateTimeField(null=True, blank=True)
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    erro = models.TextField(blank=True)
+
+    class Meta:
+        verbose_name = 'Evento do Pedido'
+        verbose_name_plural = 'Eventos do Pedido'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['pedido_id']),
+            # Fila de pendentes consumida pelo worker
+            models.Index(
+                fields=['id'],
+                name='evento_pedido_pendente_idx',
+                condition=models.Q(processado_em__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"Evento #{self.id} - Pedido #{self.pedido_id}: {self.status_anterior or '-'} → {self.status_novo}"
+
+
+
+class PedidoArquivado(models.Model):
+    """
+    Cópia fria de um Pedido concluído ou cancelado.
+
+    Mantém o mesmo id do pedido original e as mesmas colunas, para que os
+    templates e serializers de detalhe funcionem sobre ela. As FKs não têm
+    constraint no banco: o arquivo não prende produtos, usuários ou artistas.
+    """
+    id = models.IntegerField(primary_key=True)
+
+    usuario = models.ForeignKey('users.user', on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    artista = models.ForeignKey('artists.Artista', on_delete=models.DO_NOTHING, db_constraint=False, related_name='+', null=True, blank=True)
+
+    status_pedido = models.CharField(max_length=20, choices=Pedido.STATUS_CHOICES)
+    valor_total = models.DecimalField(max_digits=10, decimal_places=2)
+    quantidade_itens = models.PositiveIntegerField(default=0)
+    quantidade_unidades = models.PositiveIntegerField(default=0)
+
+    data_pedido = models.DateTimeField()
+    data_pagamento = models.DateTimeField(null=True, blank=True)
+    data_producao = models.DateTimeField(null=True, blank=True)
+    data_impressao = models.DateTimeField(null=True, blank=True)
+    data_envio = models.DateTimeField(null=True, blank=True)
+    data_conclusao = models.DateTimeField(null=True, blank=True)
+
+    forma_pagamento = models.CharField(max_length=20, choices=Pedido.FORMA_PAGAMENTO_CHOICES, null=True, blank=True)
+    status_pagamento = models.CharField(max_length=20, null=True, blank=True)
+    # Pagamento que apontava para o pedido antes do arquivamento
+    pagamento_id = models.IntegerField(null=True, blank=True)
+
+    impressora = models.ForeignKey('printing.Impressora', on_delete=models.DO_NOTHING, db_constraint=False, related_name='+', null=True, blank=True)
+
+    arquivado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-data_pedido']
+        verbose_name = 'Pedido Arquivado'
+        verbose_name_plural = 'Pedidos Arquivados'
+        indexes = [
+            models.Index(fields=['usuario', '-data_pedido', '-id'], name='pedido_arq_usuario_data_idx'),
+        ]
+
+    def __str__(self):
+        return f"Pedido arquivado #{self.id} - {self.status_pedido}"
+
+
+class ItemPedidoArquivado(models.Model):
+    """Cópia fria de um ItemPedido, pertencente a um PedidoArquivado"""
+    id = models.IntegerField(primary_key=True)
+
+    pedido = models.ForeignKey(PedidoArquivado, on_delete=models.CASCADE, related_name='itens')
+    produto = models.ForeignKey('products.Produto', on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    personalizacao = models.ForeignKey('creations.Personalizacao', on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+
+    quantidade = models.PositiveIntegerField()
+    preco_unitario = models.DecimalField(max_digits=10, decimal_places=2)
+    subtotal = models.DecimalField(max_digits=10, decimal_places=2)
+
+    criado_em = models.DateTimeField(null=True, blank=True)
+    atualizado_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Item do Pedido Arquivado'
+        verbose_name_plural = 'Itens dos Pedidos Arquivados'
+        ordering = ['criado_em']
+
+    def __str__(self):
+        return f"Item arquivado #{self.id} - Pedido #{self.pedido_id}"
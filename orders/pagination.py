@@ -0,0 +1,55 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.pagination import CursorPagination
+
+
+class PedidoCursorPagination(CursorPagination):
+    """
+    Paginação por cursor do histórico de pedidos.
+
+    Segue o índice (usuario, -data_pedido, -id): o custo de buscar a
+    página N não depende de N, ao contrário do OFFSET.
+    """
+    ordering = ('-data_pedido', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+def codificar_cursor(pedido):
+    """Gera o cursor opaco (data_pedido, id) a partir do último pedido da página"""
+    valor = f"{pedido.data_pedido.isoformat()}|{pedido.id}"
+    return base64.urlsafe_b64encode(valor.encode()).decode()
+
+
+def decodificar_cursor(cursor):
+    """Converte o cursor de volta em (data_pedido, id). Cursores inválidos viram None"""
+    try:
+        data, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(data), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def paginar_por_cursor(queryset, cursor, tamanho):
+    """
+    Retorna (pedidos, proximo_cursor) de uma página em ordem decrescente.
+
+    Filtra por (data_pedido, id) < cursor em vez de pular linhas com OFFSET.
+    """
+    queryset = queryset.order_by('-data_pedido', '-id')
+    posicao = decodificar_cursor(cursor) if cursor else None
+    if posicao:
+        data, pk = posicao
+        queryset = queryset.filter(
+            Q(data_pedido__lt=data) | Q(data_pedido=data, id__lt=pk)
+        )
+
+    pedidos = list(queryset[:tamanho + 1])
+    proximo_cursor = None
+    if len(pedidos) > tamanho:
+        pedidos = pedidos[:tamanho]
+        proximo_cursor = codificar_cursor(pedidos[-1])
+    return pedidos, proximo_cursor
@@ -0,0 +1,140 @@
+"""
+Tabela de preços em memória para cotações.
+
+preço unitário = Produto.preco_base + Personalizacao.preco_extra
+
+Os preços são carregados sob demanda (um in_bulk por modelo para os ids que
+faltam) e ficam no processo. Saves e deletes dos dois modelos invalidam a
+entrada local (ver orders.signals) e incrementam uma versão no cache do
+Django, que faz os demais processos descartarem suas tabelas quando o cache
+é compartilhado. Um TTL limita a defasagem quando não é.
+"""
+import threading
+import time
+from decimal import Decimal
+
+from core import versoes
+
+CHAVE_VERSAO = 'orders:tabela_precos:versao'
+TTL_SEGUNDOS = 300
+
+
+class TabelaPrecos:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._produtos = {}
+        self._extras = {}
+        self._limpar(versao=None)
+
+    def _limpar(self, versao):
+        self._produtos.clear()
+        self._extras.clear()
+        self._versao = versao
+        self._carregado_em = time.monotonic()
+
+    def _verificar_versao(self):
+        versao = versoes.atual(CHAVE_VERSAO)
+        expirado = time.monotonic() - self._carregado_em > TTL_SEGUNDOS
+        if versao != self._versao or expirado:
+            self._limpar(versao)
+
+    def _buscar(self, tabela, ids, carregar):
+        with self._lock:
+            self._verificar_versao()
+            versao = self._versao
+            faltando = [pk for pk in ids if pk not in tabela]
+            encontrados = {pk: tabela[pk] for pk in ids if pk in tabela}
+        if faltando:
+            novos = carregar(faltando)
+            encontrados.update(novos)
+            with self._lock:
+                # Só guarda se nada foi invalidado durante a consulta
+                if self._versao == versao:
+                    tabela.update(novos)
+                    # ids inexistentes também ficam registrados (como None)
+                    for pk in faltando:
+                        tabela.setdefault(pk, None)
+        return {pk: preco for pk, preco in encontrados.items() if preco is not None}
+
+    def precos_produtos(self, ids):
+        """{produto_id: preco_base} dos produtos ativos entre os ids informados"""
+        from products.models import Produto
+
+        def carregar(faltando):
+            return dict(
+                Produto.objects.filter(pk__in=faltando, ativo=True).values_list('pk', 'preco_base')
+            )
+        return self._buscar(self._produtos, set(ids), carregar)
+
+    def precos_extras(self, ids):
+        """{personalizacao_id: preco_extra} das personalizações informadas"""
+        from creations.models import Personalizacao
+
+        def carregar(faltando):
+            return dict(
+                Personalizacao.objects.filter(pk__in=faltando).values_list('pk', 'preco_extra')
+            )
+        return self._buscar(self._extras, set(ids), carregar)
+
+    def invalidar_produto(self, pk):
+        self.invalidar_produtos([pk])
+
+    def invalidar_produtos(self, pks):
+        with self._lock:
+            for pk in pks:
+                self._produtos.pop(pk, None)
+        self._incrementar_versao()
+
+    def invalidar_personalizacao(self, pk):
+        with self._lock:
+            self._extras.pop(pk, None)
+        self._incrementar_versao()
+
+    def _incrementar_versao(self):
+        versao = versoes.incrementar(CHAVE_VERSAO)
+        # A própria tabela já removeu a entrada; evita descartar o restante
+        with self._lock:
+            if self._versao == versao - 1:
+                self._versao = versao
+
+
+tabela_precos = TabelaPrecos()
+
+
+def preco_unitario(produto, personalizacao):
+    """Preço unitário a partir das instâncias já carregadas (sem consultas)"""
+    return produto.preco_base + (personalizacao.preco_extra or Decimal('0.00'))
+
+
+def cotar(itens):
+    """
+    Calcula os preços de um carrinho sem gravar nada.
+
+    itens: lista de dicts com 'produto', 'personalizacao' (ids) e 'quantidade'.
+    Retorna {'itens': [...], 'valor_total': Decimal}. Levanta ValueError se
+    algum produto não existir/estiver inativo ou a personalização não existir.
+    """
+    precos = tabela_precos.precos_produtos(item['produto'] for item in itens)
+    extras = tabela_precos.precos_extras(item['personalizacao'] for item in itens)
+
+    faltando_produtos = sorted({item['produto'] for item in itens} - precos.keys())
+    if faltando_produtos:
+        raise ValueError(f"Produtos não encontrados ou inativos: {faltando_produtos}")
+    faltando_personalizacoes = sorted({item['personalizacao'] for item in itens} - extras.keys())
+    if faltando_personalizacoes:
+        raise ValueError(f"Personalizações não encontradas: {faltando_personalizacoes}")
+
+    linhas = []
+    valor_total = Decimal('0.00')
+    for item in itens:
+        unitario = precos[item['produto']] + extras[item['personalizacao']]
+        subtotal = unitario * item['quantidade']
+        valor_total += subtotal
+        linhas.append({
+            'produto': item['produto'],
+            'personalizacao': item['personalizacao'],
+            'quantidade': item['quantidade'],
+            'preco_unitario': unitario,
+            'subtotal': subtotal,
+        })
+    return {'itens': linhas, 'valor_total': valor_total}
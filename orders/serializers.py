@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Pedido, ItemPedido
+from .models import Pedido, ItemPedido, PedidoArquivado, ItemPedidoArquivado
 
 
 class ItemPedidoSerializer(serializers.ModelSerializer):
@@ -35,10 +35,14 @@ class ItemPedidoSerializer(serializers.ModelSerializer):
 
 
 class ItemPedidoCreateUpdateSerializer(serializers.ModelSerializer):
-    """Serializer para criar/atualizar itens do pedido"""
+    """
+    Serializer para criar/atualizar itens do pedido.
+    Sem preco_unitario, o preço é calculado pelo servidor.
+    """
     class Meta:
         model = ItemPedido
         fields = ['produto', 'personalizacao', 'quantidade', 'preco_unitario']
+        extra_kwargs = {'preco_unitario': {'required': False}}
 
     def validate(self, data):
         produto = data.get('produto')
@@ -51,12 +55,45 @@ class ItemPedidoCreateUpdateSerializer(serializers.ModelSerializer):
         return data
 
 
+class ItemPedidoBulkSerializer(ItemPedidoCreateUpdateSerializer):
+    """
+    Serializer de um item no envio em lote.
+
+    Recebe produto e personalização como ids: a resolução das FKs é feita
+    de uma vez pelo PedidoService.adicionar_itens (in_bulk), e não uma
+    consulta por item.
+    """
+    produto = serializers.IntegerField(min_value=1)
+    personalizacao = serializers.IntegerField(min_value=1)
+
+    # Limite de itens por requisição no endpoint em lote
+    MAX_ITENS = 100
+
+
+class ItemCotacaoSerializer(serializers.Serializer):
+    """Item de carrinho para cotação de preços (nada é gravado)"""
+    produto = serializers.IntegerField(min_value=1)
+    personalizacao = serializers.IntegerField(min_value=1)
+    quantidade = serializers.IntegerField(min_value=1)
+
+
+class LinhaCotacaoSerializer(ItemCotacaoSerializer):
+    """Linha cotada: item do carrinho com preço unitário e subtotal"""
+    preco_unitario = serializers.DecimalField(max_digits=10, decimal_places=2)
+    subtotal = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+class CotacaoSerializer(serializers.Serializer):
+    """Resultado da cotação de um carrinho"""
+    itens = LinhaCotacaoSerializer(many=True)
+    valor_total = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
 class PedidoListSerializer(serializers.ModelSerializer):
     """Serializer para listagem de pedidos"""
     usuario_nome = serializers.CharField(source='usuario.nome', read_only=True)
     usuario_email = serializers.CharField(source='usuario.email', read_only=True)
     artista_nome = serializers.CharField(source='artista.nome_artistico', read_only=True)
-    quantidade_itens = serializers.SerializerMethodField()
 
     class Meta:
         model = Pedido
@@ -73,11 +110,9 @@ class PedidoListSerializer(serializers.ModelSerializer):
             'forma_pagamento',
             'status_pagamento',
             'quantidade_itens',
+            'quantidade_unidades',
         ]
-        read_only_fields = ['id', 'data_pedido', 'valor_total']
-
-    def get_quantidade_itens(self, obj):
-        return obj.itens.count()
+        read_only_fields = ['id', 'data_pedido', 'valor_total', 'quantidade_itens', 'quantidade_unidades']
 
 
 class PedidoDetailSerializer(serializers.ModelSerializer):
@@ -143,4 +178,74 @@ class PedidoStatusUpdateSerializer(serializers.ModelSerializer):
         STATUS_VALIDOS = ['criado', 'pago', 'em_producao', 'impresso', 'enviado', 'concluido', 'cancelado']
         if value not in STATUS_VALIDOS:
             raise serializers.ValidationError(f"Status inválido. Opções: {STATUS_VALIDOS}")
-        return value
\ No newline at end of file
+        return value
+
+
+class PedidoStatusBulkSerializer(serializers.Serializer):
+    """Serializer para transição de status de vários pedidos de uma vez"""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=500,
+    )
+    status_pedido = serializers.ChoiceField(choices=['em_producao', 'impresso', 'enviado', 'concluido', 'cancelado'])
+
+
+
+class ItemPedidoArquivadoSerializer(serializers.ModelSerializer):
+    """Serializer de item de pedido arquivado (somente leitura)"""
+    produto_nome = serializers.CharField(source='produto.nome', read_only=True)
+
+    class Meta:
+        model = ItemPedidoArquivado
+        fields = [
+            'id',
+            'produto',
+            'produto_nome',
+            'personalizacao',
+            'quantidade',
+            'preco_unitario',
+            'subtotal',
+            'criado_em',
+            'atualizado_em',
+        ]
+        read_only_fields = fields
+
+
+class PedidoArquivadoSerializer(serializers.ModelSerializer):
+    """Detalhe de pedido arquivado, no mesmo formato do PedidoDetailSerializer"""
+    itens = ItemPedidoArquivadoSerializer(many=True, read_only=True)
+    usuario_nome = serializers.CharField(source='usuario.nome', read_only=True)
+    usuario_email = serializers.CharField(source='usuario.email', read_only=True)
+    artista_nome = serializers.CharField(source='artista.nome_artistico', read_only=True)
+    artista_biografia = serializers.CharField(source='artista.biografia', read_only=True)
+    impressora_nome = serializers.CharField(source='impressora.nome', read_only=True, allow_null=True)
+    arquivado = serializers.BooleanField(default=True, read_only=True)
+
+    class Meta:
+        model = PedidoArquivado
+        fields = [
+            'id',
+            'usuario',
+            'usuario_nome',
+            'usuario_email',
+            'artista',
+            'artista_nome',
+            'artista_biografia',
+            'status_pedido',
+            'valor_total',
+            'data_pedido',
+            'data_pagamento',
+            'data_producao',
+            'data_impressao',
+            'data_envio',
+            'data_conclusao',
+            'forma_pagamento',
+            'status_pagamento',
+            'impressora',
+            'impressora_nome',
+            'itens',
+            'arquivado',
+            'arquivado_em',
+        ]
+        read_only_fields = fields
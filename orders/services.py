@@ -1,7 +1,12 @@
 from decimal import Decimal
+from django.conf import settings
 from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from .models import Pedido, ItemPedido
+from .models import Pedido, ItemPedido, EventoPedido
+from .precos import preco_unitario as calcular_preco_unitario
+from products import estoque
 from django.db import models
 
 
@@ -18,6 +23,20 @@ class PedidoService:
     """
 
     @staticmethod
+    def registrar_eventos(pedido_ids, status_anterior, status_novo):
+        """
+        Grava no outbox (EventoPedido) a transição dos pedidos informados.
+
+        Deve ser chamado dentro da transação que alterou os pedidos: o evento
+        só existe se a mudança de status for efetivada.
+        """
+        EventoPedido.objects.bulk_create([
+            EventoPedido(pedido_id=pk, status_anterior=status_anterior, status_novo=status_novo)
+            for pk in pedido_ids
+        ])
+
+    @staticmethod
+    @transaction.atomic
     def criar_pedido(usuario, artista):
         """
         Cria um novo pedido no status 'criado'.
@@ -35,19 +54,26 @@ class PedidoService:
             status_pedido='criado',
             valor_total=Decimal('0.00')
         )
+        PedidoService.registrar_eventos([pedido.pk], '', 'criado')
         return pedido
 
     @staticmethod
     @transaction.atomic
-    def adicionar_item(pedido, produto, personalizacao, quantidade, preco_unitario):
+    def adicionar_item(pedido, produto, personalizacao, quantidade, preco_unitario=None):
         """
         Adiciona um item ao pedido e recalcula o valor total.
         
+        Sem preco_unitario, o preço é calculado no servidor
+        (preco_base do produto + preco_extra da personalização).
+        
         Regra: Apenas pedidos em status 'criado' podem receber itens
         """
         if not pedido.pode_adicionar_itens():
             raise ValueError(f"Pedido não pode ser alterado. Status atual: {pedido.status_pedido}")
 
+        if preco_unitario is None:
+            preco_unitario = calcular_preco_unitario(produto, personalizacao)
+
         subtotal = Decimal(str(quantidade)) * Decimal(str(preco_unitario))
         
         item = ItemPedido.objects.create(
@@ -59,22 +85,158 @@ class PedidoService:
             subtotal=subtotal
         )
         
-        # Recalcula valor total do pedido
-        PedidoService.recalcular_valor_total(pedido)
+        # Atualiza valor total e contadores do pedido
+        PedidoService.aplicar_deltas(pedido, item.subtotal, itens=1, unidades=item.quantidade)
         
         return item
 
+    @staticmethod
+    @transaction.atomic
+    def adicionar_itens(pedido, itens):
+        """
+        Adiciona vários itens ao pedido numa única transação.
+
+        Cada item é um dict com os ids de 'produto' e 'personalizacao',
+        'quantidade' e, opcionalmente, 'preco_unitario' (calculado no
+        servidor quando ausente). Os produtos e personalizações são
+        resolvidos com um in_bulk cada, os itens gravados com bulk_create e
+        o valor total atualizado uma única vez.
+
+        Regra: Apenas pedidos em status 'criado' podem receber itens
+        """
+        from products.models import Produto
+        from creations.models import Personalizacao
+
+        if not pedido.pode_adicionar_itens():
+            raise ValueError(f"Pedido não pode ser alterado. Status atual: {pedido.status_pedido}")
+
+        produtos = Produto.objects.in_bulk({item['produto'] for item in itens})
+        personalizacoes = Personalizacao.objects.in_bulk({item['personalizacao'] for item in itens})
+
+        faltando_produtos = sorted({item['produto'] for item in itens} - produtos.keys())
+        if faltando_produtos:
+            raise ValueError(f"Produtos não encontrados: {faltando_produtos}")
+        faltando_personalizacoes = sorted({item['personalizacao'] for item in itens} - personalizacoes.keys())
+        if faltando_personalizacoes:
+            raise ValueError(f"Personalizações não encontradas: {faltando_personalizacoes}")
+
+        novos_itens = []
+        for item in itens:
+            produto = produtos[item['produto']]
+            personalizacao = personalizacoes[item['personalizacao']]
+            quantidade = item['quantidade']
+            if item.get('preco_unitario') is None:
+                preco_unitario = calcular_preco_unitario(produto, personalizacao)
+            else:
+                preco_unitario = Decimal(str(item['preco_unitario']))
+            novos_itens.append(ItemPedido(
+                pedido=pedido,
+                produto=produto,
+                personalizacao=personalizacao,
+                quantidade=quantidade,
+                preco_unitario=preco_unitario,
+                # bulk_create não chama save(), então o subtotal é calculado aqui
+                subtotal=Decimal(quantidade) * preco_unitario,
+            ))
+
+        criados = ItemPedido.objects.bulk_create(novos_itens)
+
+        PedidoService.aplicar_deltas(
+            pedido,
+            sum((i.subtotal for i in criados), Decimal('0.00')),
+            itens=len(criados),
+            unidades=sum(i.quantidade for i in criados),
+        )
+
+        return criados
+
+    @staticmethod
+    def valor_total_incremental():
+        """
+        Indica se o valor_total é mantido por delta (padrão) ou re-agregado.
+
+        Controlado por settings.PEDIDO_VALOR_TOTAL_INCREMENTAL.
+        """
+        return getattr(settings, 'PEDIDO_VALOR_TOTAL_INCREMENTAL', True)
+
+    @staticmethod
+    def aplicar_deltas(pedido, valor, itens=0, unidades=0):
+        """
+        Aplica as diferenças de subtotal e de contadores ao pedido.
+
+        Usa um UPDATE atômico com F() na mesma transação do item, sem
+        percorrer os demais itens. Com o modo incremental desligado,
+        cai no recálculo completo.
+        """
+        if not PedidoService.valor_total_incremental():
+            return PedidoService.recalcular_valor_total(pedido)
+
+        valor = Decimal(str(valor))
+        campos = {}
+        if valor:
+            campos['valor_total'] = F('valor_total') + valor
+        if itens:
+            campos['quantidade_itens'] = F('quantidade_itens') + itens
+        if unidades:
+            campos['quantidade_unidades'] = F('quantidade_unidades') + unidades
+
+        if campos:
+            Pedido.objects.filter(pk=pedido.pk).update(**campos)
+            pedido.refresh_from_db(fields=list(campos))
+        return pedido
+
     @staticmethod
     def recalcular_valor_total(pedido):
-        """Recalcula o valor_total do pedido somando subtotais dos itens"""
-        valor_total = ItemPedido.objects.filter(pedido=pedido).aggregate(
-            total=models.Sum('subtotal')
-        )['total'] or Decimal('0.00')
+        """Recalcula o valor_total e os contadores do pedido a partir dos itens"""
+        totais = ItemPedido.objects.filter(pedido=pedido).aggregate(
+            total=models.Sum('subtotal'),
+            itens=models.Count('id'),
+            unidades=models.Sum('quantidade'),
+        )
         
-        pedido.valor_total = valor_total
-        pedido.save(update_fields=['valor_total'])
+        pedido.valor_total = totais['total'] or Decimal('0.00')
+        pedido.quantidade_itens = totais['itens']
+        pedido.quantidade_unidades = totais['unidades'] or 0
+        pedido.save(update_fields=['valor_total', 'quantidade_itens', 'quantidade_unidades'])
         return pedido
 
+    @staticmethod
+    def pedidos_divergentes(queryset=None):
+        """
+        Retorna os pedidos cujo valor_total ou contadores diferem dos itens.
+
+        Caminho de reconciliação do modo incremental: uma única consulta
+        agregada compara os valores mantidos por delta com os valores reais.
+        """
+        if queryset is None:
+            queryset = Pedido.objects.all()
+        return queryset.annotate(
+            valor_calculado=Coalesce(
+                models.Sum('itens__subtotal'),
+                Decimal('0.00'),
+                output_field=models.DecimalField(max_digits=10, decimal_places=2),
+            ),
+            itens_calculado=models.Count('itens'),
+            unidades_calculado=Coalesce(models.Sum('itens__quantidade'), 0),
+        ).filter(
+            ~Q(valor_total=F('valor_calculado'))
+            | ~Q(quantidade_itens=F('itens_calculado'))
+            | ~Q(quantidade_unidades=F('unidades_calculado'))
+        )
+
+    @staticmethod
+    @transaction.atomic
+    def reconciliar_valor_total(pedido):
+        """
+        Recalcula o valor_total de um pedido e informa se havia divergência.
+
+        Retorna uma tupla (valor_anterior, valor_calculado).
+        """
+        pedido = Pedido.objects.select_for_update().get(pk=pedido.pk)
+        valor_anterior = pedido.valor_total
+        PedidoService.recalcular_valor_total(pedido)
+        return valor_anterior, pedido.valor_total
+
     @staticmethod
     @transaction.atomic
     def atualizar_item(item, quantidade=None, preco_unitario=None):
@@ -86,6 +248,9 @@ class PedidoService:
         if not item.pedido.pode_adicionar_itens():
             raise ValueError(f"Item não pode ser alterado. Pedido em status: {item.pedido.status_pedido}")
 
+        subtotal_anterior = item.subtotal
+        quantidade_anterior = item.quantidade
+
         if quantidade is not None:
             item.quantidade = quantidade
         if preco_unitario is not None:
@@ -94,8 +259,12 @@ class PedidoService:
         item.subtotal = Decimal(str(item.quantidade)) * Decimal(str(item.preco_unitario))
         item.save()
 
-        # Recalcula valor total do pedido
-        PedidoService.recalcular_valor_total(item.pedido)
+        # Aplica apenas a diferença no valor total do pedido
+        PedidoService.aplicar_deltas(
+            item.pedido,
+            item.subtotal - subtotal_anterior,
+            unidades=item.quantidade - quantidade_anterior,
+        )
 
         return item
 
@@ -111,10 +280,12 @@ class PedidoService:
             raise ValueError(f"Item não pode ser removido. Pedido em status: {item.pedido.status_pedido}")
 
         pedido = item.pedido
+        subtotal = item.subtotal
+        quantidade = item.quantidade
         item.delete()
 
-        # Recalcula valor total
-        PedidoService.recalcular_valor_total(pedido)
+        # Desconta o item removido do valor total e dos contadores
+        PedidoService.aplicar_deltas(pedido, -subtotal, itens=-1, unidades=-quantidade)
 
         return pedido
 
@@ -129,6 +300,110 @@ class PedidoService:
         
         return True
 
+    @staticmethod
+    @transaction.atomic
+    def transicionar_status(pedido, novo_status, **campos):
+        """
+        Aplica uma transição de status com um UPDATE condicional.
+
+        Executa um UPDATE ... WHERE id = ? AND status_pedido = ? por status
+        antecessor (derivados de Pedido.FLUXO_STATUS), como em
+        transicionar_em_lote, gravando apenas o status e os campos
+        informados. O número de linhas afetadas indica se esta chamada venceu
+        a transição: em caso de disputa com outra requisição, só uma delas
+        altera o pedido. A transição vencedora é registrada no outbox
+        (EventoPedido) com o status que o UPDATE realmente substituiu, e não
+        o da instância em memória.
+
+        Retorna True se a transição foi aplicada. Caso contrário, recarrega o
+        status_pedido da instância e retorna False.
+        """
+        for antecessor in Pedido.status_antecessores(novo_status):
+            atualizados = Pedido.objects.filter(
+                pk=pedido.pk,
+                status_pedido=antecessor,
+            ).update(status_pedido=novo_status, **campos)
+            if atualizados:
+                break
+        else:
+            pedido.refresh_from_db(fields=['status_pedido'])
+            return False
+
+        PedidoService.registrar_eventos([pedido.pk], antecessor, novo_status)
+
+        pedido.status_pedido = novo_status
+        for campo, valor in campos.items():
+            setattr(pedido, campo, valor)
+        return True
+
+    # Campo de data preenchido em cada transição
+    CAMPO_DATA_STATUS = {
+        'pago': 'data_pagamento',
+        'em_producao': 'data_producao',
+        'impresso': 'data_impressao',
+        'enviado': 'data_envio',
+        'concluido': 'data_conclusao',
+    }
+
+    # Transições permitidas em lote ('pago' exige dados de pagamento por pedido)
+    STATUS_EM_LOTE = ['em_producao', 'impresso', 'enviado', 'concluido', 'cancelado']
+
+    @staticmethod
+    @transaction.atomic
+    def transicionar_em_lote(pedido_ids, novo_status, queryset=None):
+        """
+        Move vários pedidos para novo_status de uma vez.
+
+        Aplica as regras de Pedido.FLUXO_STATUS por conjunto: um UPDATE por
+        status antecessor, em vez do ciclo carregar/validar/salvar por pedido.
+        queryset restringe os pedidos visíveis (ex.: apenas os do usuário).
+
+        Retorna um dict com as listas de ids 'transicionados' e 'rejeitados'.
+        """
+        if novo_status not in PedidoService.STATUS_EM_LOTE:
+            raise ValueError(f"Status não suportado em lote: {novo_status}")
+
+        if queryset is None:
+            queryset = Pedido.objects.all()
+
+        pedido_ids = set(pedido_ids)
+        campos = {'status_pedido': novo_status}
+        campo_data = PedidoService.CAMPO_DATA_STATUS.get(novo_status)
+        if campo_data:
+            campos[campo_data] = timezone.now()
+
+        transicionados = []
+        for antecessor in Pedido.status_antecessores(novo_status):
+            ids = list(
+                queryset.select_for_update()
+                .filter(pk__in=pedido_ids, status_pedido=antecessor)
+                .values_list('pk', flat=True)
+            )
+            if not ids:
+                continue
+            Pedido.objects.filter(pk__in=ids, status_pedido=antecessor).update(**campos)
+            PedidoService.registrar_eventos(ids, antecessor, novo_status)
+            transicionados.extend(ids)
+
+        if novo_status == 'cancelado' and transicionados:
+            estoque.liberar(transicionados)
+
+        return {
+            'transicionados': sorted(transicionados),
+            'rejeitados': sorted(pedido_ids - set(transicionados)),
+        }
+
+    @staticmethod
+    def reservar_estoque(pedido):
+        """Baixa o estoque de todos os produtos do pedido (ver products.estoque)"""
+        quantidades = dict(
+            ItemPedido.objects.filter(pedido=pedido)
+            .values('produto')
+            .annotate(total=models.Sum('quantidade'))
+            .values_list('produto', 'total')
+        )
+        return estoque.reservar(pedido.pk, quantidades)
+
     @staticmethod
     @transaction.atomic
     def confirmar_pagamento(pedido, forma_pagamento, status_pagamento='confirmado'):
@@ -137,17 +412,25 @@ class PedidoService:
         
         Fluxo: CRIADO → PAGO
         Regra: Apenas pedidos em status 'criado' podem ser pagos
+        Regra: O estoque dos produtos é baixado (reservado) na confirmação
         """
+        erro = "Pedido não pode ser pago. Status atual: {}"
         if not pedido.pode_mudar_status('pago'):
-            raise ValueError(f"Pedido não pode ser pago. Status atual: {pedido.status_pedido}")
+            raise ValueError(erro.format(pedido.status_pedido))
 
         PedidoService.validar_pedido(pedido)
 
-        pedido.forma_pagamento = forma_pagamento
-        pedido.status_pagamento = status_pagamento
-        pedido.status_pedido = 'pago'
-        pedido.data_pagamento = timezone.now()
-        pedido.save()
+        if not PedidoService.transicionar_status(
+            pedido, 'pago',
+            forma_pagamento=forma_pagamento,
+            status_pagamento=status_pagamento,
+            data_pagamento=timezone.now(),
+        ):
+            raise ValueError(erro.format(pedido.status_pedido))
+
+        # Última escrita da transação: o lock nas linhas de produto dura só até o commit.
+        # Sem estoque, EstoqueInsuficiente (ValueError) desfaz também a transição.
+        PedidoService.reservar_estoque(pedido)
 
         return pedido
 
@@ -159,12 +442,12 @@ class PedidoService:
         
         Fluxo: PAGO → EM PRODUÇÃO
         """
+        erro = "Apenas pedidos pagos podem ir para produção. Status: {}"
         if not pedido.pode_mudar_status('em_producao'):
-            raise ValueError(f"Apenas pedidos pagos podem ir para produção. Status: {pedido.status_pedido}")
+            raise ValueError(erro.format(pedido.status_pedido))
 
-        pedido.status_pedido = 'em_producao'
-        pedido.data_producao = timezone.now()
-        pedido.save()
+        if not PedidoService.transicionar_status(pedido, 'em_producao', data_producao=timezone.now()):
+            raise ValueError(erro.format(pedido.status_pedido))
 
         return pedido
 
@@ -176,16 +459,16 @@ class PedidoService:
         
         Fluxo: EM PRODUÇÃO → IMPRESSO
         """
+        erro = "Pedido não está em produção. Status: {}"
         if not pedido.pode_mudar_status('impresso'):
-            raise ValueError(f"Pedido não está em produção. Status: {pedido.status_pedido}")
+            raise ValueError(erro.format(pedido.status_pedido))
 
-        pedido.status_pedido = 'impresso'
-        pedido.data_impressao = timezone.now()
-        
+        campos = {'data_impressao': timezone.now()}
         if impressora:
-            pedido.impressora = impressora
-            
-        pedido.save()
+            campos['impressora'] = impressora
+
+        if not PedidoService.transicionar_status(pedido, 'impresso', **campos):
+            raise ValueError(erro.format(pedido.status_pedido))
 
         return pedido
 
@@ -197,12 +480,12 @@ class PedidoService:
         
         Fluxo: IMPRESSO → ENVIADO
         """
+        erro = "Pedido ainda não foi impresso. Status: {}"
         if not pedido.pode_mudar_status('enviado'):
-            raise ValueError(f"Pedido ainda não foi impresso. Status: {pedido.status_pedido}")
+            raise ValueError(erro.format(pedido.status_pedido))
 
-        pedido.status_pedido = 'enviado'
-        pedido.data_envio = timezone.now()
-        pedido.save()
+        if not PedidoService.transicionar_status(pedido, 'enviado', data_envio=timezone.now()):
+            raise ValueError(erro.format(pedido.status_pedido))
 
         return pedido
 
@@ -214,12 +497,12 @@ class PedidoService:
         
         Fluxo: ENVIADO → CONCLUÍDO
         """
+        erro = "Pedido ainda não foi enviado. Status: {}"
         if not pedido.pode_mudar_status('concluido'):
-            raise ValueError(f"Pedido ainda não foi enviado. Status: {pedido.status_pedido}")
+            raise ValueError(erro.format(pedido.status_pedido))
 
-        pedido.status_pedido = 'concluido'
-        pedido.data_conclusao = timezone.now()
-        pedido.save()
+        if not PedidoService.transicionar_status(pedido, 'concluido', data_conclusao=timezone.now()):
+            raise ValueError(erro.format(pedido.status_pedido))
 
         return pedido
 
@@ -230,12 +513,15 @@ class PedidoService:
         Cancela o pedido.
         
         Regra: Apenas pedidos em 'criado' ou 'pago' podem ser cancelados
+        Regra: O estoque reservado no pagamento volta para os produtos
         """
+        erro = "Pedido não pode ser cancelado. Status: {}"
         if not pedido.pode_mudar_status('cancelado'):
-            raise ValueError(f"Pedido não pode ser cancelado. Status: {pedido.status_pedido}")
+            raise ValueError(erro.format(pedido.status_pedido))
 
-        pedido.status_pedido = 'cancelado'
-        pedido.save()
+        if not PedidoService.transicionar_status(pedido, 'cancelado'):
+            raise ValueError(erro.format(pedido.status_pedido))
 
-        return pedido
+        estoque.liberar([pedido.pk])
 
+        return pedido
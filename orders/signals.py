@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from creations.models import Personalizacao
+from products.models import Produto
+from products.signals import produtos_importados
+
+from .precos import tabela_precos
+
+
+@receiver([post_save, post_delete], sender=Produto)
+def invalidar_preco_produto(sender, instance, **kwargs):
+    tabela_precos.invalidar_produto(instance.pk)
+
+
+@receiver(produtos_importados)
+def invalidar_precos_importados(sender, pks, **kwargs):
+    tabela_precos.invalidar_produtos(pks)
+
+
+@receiver([post_save, post_delete], sender=Personalizacao)
+def invalidar_preco_personalizacao(sender, instance, **kwargs):
+    tabela_precos.invalidar_personalizacao(instance.pk)
@@ -1,3 +1,383 @@
+import csv
+import io
+import json
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from artists.models import Artista
+from payments.models import Payment
+from creations.models import Arte, Personalizacao
+from products.models import Produto
+from users.models import user as User
+
+from . import eventos
+from .arquivamento import arquivar_pedidos
+from .models import EventoPedido, Pedido, PedidoArquivado
+from .precos import tabela_precos
+from .serializers import ItemPedidoBulkSerializer
+from .services import PedidoService
+
+
+class PedidoTestCase(TestCase):
+    """Usuário, artista, produto e personalização para montar pedidos"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('ana@example.com', 'senha', nome='Ana')
+        cls.artista = Artista.objects.create(usuario=cls.usuario, nome_artistico='Ana Art')
+        arte = Arte.objects.create(artista=cls.artista, nome='Rosa', arquivo='artes/rosa.png')
+        cls.produto = Produto.objects.create(nome='Capinha', preco_base=Decimal('50.00'), estoque=10)
+        cls.personalizacao = Personalizacao.objects.create(
+            arte=arte, produto=cls.produto, preco_extra=Decimal('5.00')
+        )
+
+    def criar_pedido(self, itens=1, quantidade=1):
+        pedido = PedidoService.criar_pedido(self.usuario, self.artista)
+        for _ in range(itens):
+            PedidoService.adicionar_item(pedido, self.produto, self.personalizacao, quantidade)
+        return pedido
+
+
+class ValorTotalTests(PedidoTestCase):
+    """valor_total e contadores mantidos por delta conferem com a re-agregação"""
+
+    def assertConfereComItens(self, pedido):
+        pedido.refresh_from_db()
+        mantidos = (pedido.valor_total, pedido.quantidade_itens, pedido.quantidade_unidades)
+        self.assertFalse(PedidoService.pedidos_divergentes(Pedido.objects.filter(pk=pedido.pk)).exists())
+        PedidoService.recalcular_valor_total(pedido)
+        self.assertEqual(mantidos, (pedido.valor_total, pedido.quantidade_itens, pedido.quantidade_unidades))
+
+    def test_adicionar_atualizar_remover(self):
+        pedido = self.criar_pedido(itens=2, quantidade=2)
+        self.assertEqual(pedido.valor_total, Decimal('220.00'))
+        self.assertConfereComItens(pedido)
+
+        item = pedido.itens.first()
+        PedidoService.atualizar_item(item, quantidade=5, preco_unitario=Decimal('10.00'))
+        self.assertConfereComItens(pedido)
+
+        PedidoService.adicionar_itens(pedido, [
+            {'produto': self.produto.pk, 'personalizacao': self.personalizacao.pk, 'quantidade': 3},
+            {'produto': self.produto.pk, 'personalizacao': self.personalizacao.pk, 'quantidade': 1,
+             'preco_unitario': '7.50'},
+        ])
+        self.assertConfereComItens(pedido)
+
+        PedidoService.remover_item(pedido.itens.last())
+        self.assertConfereComItens(pedido)
+
+    def test_reconciliacao_corrige_divergencia(self):
+        pedido = self.criar_pedido(itens=2)
+        Pedido.objects.filter(pk=pedido.pk).update(valor_total=Decimal('1.00'), quantidade_itens=7)
+        self.assertTrue(PedidoService.pedidos_divergentes().filter(pk=pedido.pk).exists())
+
+        anterior, calculado = PedidoService.reconciliar_valor_total(pedido)
+        self.assertEqual((anterior, calculado), (Decimal('1.00'), Decimal('110.00')))
+        self.assertFalse(PedidoService.pedidos_divergentes().exists())
+
+    def test_comando_de_reconciliacao(self):
+        pedido = self.criar_pedido()
+        Pedido.objects.filter(pk=pedido.pk).update(quantidade_unidades=0)
+        saida = io.StringIO()
+        call_command('reconciliar_valor_total', '--corrigir', stdout=saida)
+        self.assertIn(f'Pedido #{pedido.pk}', saida.getvalue())
+        self.assertFalse(PedidoService.pedidos_divergentes().exists())
+
+
+class TransicaoStatusTests(PedidoTestCase):
+    """Transições por UPDATE condicional rejeitam instâncias desatualizadas"""
+
+    def test_instancia_desatualizada_nao_transiciona(self):
+        pedido = self.criar_pedido()
+        desatualizado = Pedido.objects.get(pk=pedido.pk)
+
+        PedidoService.cancelar_pedido(pedido)
+        with self.assertRaises(ValueError):
+            PedidoService.confirmar_pagamento(desatualizado, 'pix')
+
+        # A instância passa a refletir o status real e o pedido não muda
+        self.assertEqual(desatualizado.status_pedido, 'cancelado')
+        pedido.refresh_from_db()
+        self.assertEqual((pedido.status_pedido, pedido.data_pagamento), ('cancelado', None))
+
+    def test_transicionar_status_retorna_false_na_disputa(self):
+        pedido = self.criar_pedido()
+        desatualizado = Pedido.objects.get(pk=pedido.pk)
+        self.assertTrue(PedidoService.transicionar_status(pedido, 'cancelado'))
+        self.assertFalse(PedidoService.transicionar_status(desatualizado, 'pago'))
+        self.assertEqual(desatualizado.status_pedido, 'cancelado')
+
+    def test_transicao_fora_do_fluxo(self):
+        pedido = self.criar_pedido()
+        with self.assertRaises(ValueError):
+            PedidoService.finalizar_pedido(pedido)
+        pedido.refresh_from_db()
+        self.assertEqual(pedido.status_pedido, 'criado')
+
+    def test_em_lote_separa_transicionados_e_rejeitados(self):
+        pago = self.criar_pedido()
+        PedidoService.confirmar_pagamento(pago, 'pix')
+        criado = self.criar_pedido()
+
+        resultado = PedidoService.transicionar_em_lote([pago.pk, criado.pk], 'em_producao')
+        self.assertEqual(resultado, {'transicionados': [pago.pk], 'rejeitados': [criado.pk]})
+        # Repetir não transiciona de novo
+        resultado = PedidoService.transicionar_em_lote([pago.pk], 'em_producao')
+        self.assertEqual(resultado, {'transicionados': [], 'rejeitados': [pago.pk]})
+
+
+class OutboxTests(PedidoTestCase):
+    """Eventos gravados na transação da transição e consumidos por processar_lote"""
+
+    def eventos(self, pedido):
+        return list(
+            EventoPedido.objects.filter(pedido_id=pedido.pk)
+            .values_list('status_anterior', 'status_novo')
+        )
+
+    def test_um_evento_por_transicao_vencedora(self):
+        pedido = self.criar_pedido()
+        desatualizado = Pedido.objects.get(pk=pedido.pk)
+        PedidoService.confirmar_pagamento(pedido, 'pix')
+        # O evento traz o status que o UPDATE substituiu, não o da instância
+        self.assertTrue(PedidoService.transicionar_status(desatualizado, 'cancelado'))
+        # Perdeu a disputa: sem evento
+        self.assertFalse(PedidoService.transicionar_status(pedido, 'em_producao'))
+        self.assertEqual(
+            self.eventos(pedido),
+            [('', 'criado'), ('criado', 'pago'), ('pago', 'cancelado')],
+        )
+
+    def test_transicao_desfeita_nao_deixa_evento(self):
+        pedido = self.criar_pedido(quantidade=11)  # estoque do produto: 10
+        with self.assertRaises(ValueError):
+            PedidoService.confirmar_pagamento(pedido, 'pix')
+        self.assertEqual(self.eventos(pedido), [('', 'criado')])
+
+    def test_processar_lote(self):
+        pedido = self.criar_pedido()
+        recebidos = []
+
+        def falhar(evento):
+            raise RuntimeError('indisponível')
+
+        with mock.patch.dict(eventos._handlers, {'criado': [recebidos.append], 'cancelado': [falhar]}):
+            PedidoService.cancelar_pedido(pedido)
+            with self.assertLogs('orders.eventos', 'ERROR'):
+                self.assertEqual(eventos.processar_lote(), (1, 1))
+                # O processado não volta; o que falhou é tentado de novo
+                self.assertEqual(eventos.processar_lote(), (0, 1))
+
+        self.assertEqual([evento.pedido_id for evento in recebidos], [pedido.pk])
+        falho = EventoPedido.objects.get(pedido_id=pedido.pk, status_novo='cancelado')
+        self.assertEqual((falho.processado_em, falho.tentativas, falho.erro), (None, 2, 'indisponível'))
+
+
+class ItensEmLoteTests(PedidoTestCase):
+    """POST /orders/api/orders/{id}/items/bulk/"""
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.usuario)
+        self.pedido = self.criar_pedido(itens=0)
+        self.url = f'/orders/api/orders/{self.pedido.pk}/items/bulk/'
+
+    def item(self, **dados):
+        return {'produto': self.produto.pk, 'personalizacao': self.personalizacao.pk, 'quantidade': 1, **dados}
+
+    def test_adiciona_todos_os_itens(self):
+        resposta = self.api.post(self.url, [self.item(quantidade=2), self.item(preco_unitario='10.00')], format='json')
+        self.assertEqual(resposta.status_code, 201, resposta.content)
+        self.assertEqual(len(resposta.json()), 2)
+        self.pedido.refresh_from_db()
+        self.assertEqual(
+            (self.pedido.valor_total, self.pedido.quantidade_itens, self.pedido.quantidade_unidades),
+            (Decimal('120.00'), 2, 3),
+        )
+
+    def test_item_invalido_nao_grava_nenhum(self):
+        resposta = self.api.post(self.url, [self.item(), self.item(produto=999999)], format='json')
+        self.assertEqual(resposta.status_code, 400)
+        self.assertFalse(self.pedido.itens.exists())
+
+    def test_limites(self):
+        self.assertEqual(self.api.post(self.url, [], format='json').status_code, 400)
+        excesso = [self.item()] * (ItemPedidoBulkSerializer.MAX_ITENS + 1)
+        self.assertEqual(self.api.post(self.url, excesso, format='json').status_code, 400)
+        self.assertFalse(self.pedido.itens.exists())
+
+    def test_pedido_de_outro_usuario(self):
+        outro = User.objects.create_user('b@example.com', 'senha', nome='B')
+        self.api.force_authenticate(outro)
+        self.assertEqual(self.api.post(self.url, [self.item()], format='json').status_code, 404)
+
+
+class ListagemPedidosTests(PedidoTestCase):
+    """GET /orders/api/orders/: contadores desnormalizados e paginação por cursor"""
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.usuario)
+
+    def listar(self, url='/orders/api/orders/', **params):
+        resposta = self.api.get(url, params, HTTP_ACCEPT='application/json')
+        self.assertEqual(resposta.status_code, 200)
+        return resposta.json()
+
+    def test_contadores_sem_consulta_por_pedido(self):
+        self.criar_pedido(itens=2, quantidade=3)
+        with CaptureQueriesContext(connection) as uma:
+            resultado = self.listar()['results']
+        self.assertEqual((resultado[0]['quantidade_itens'], resultado[0]['quantidade_unidades']), (2, 6))
+
+        for _ in range(5):
+            self.criar_pedido(itens=2)
+        with self.assertNumQueries(len(uma)):
+            self.assertEqual(len(self.listar()['results']), 6)
+
+    def test_cursor_percorre_o_historico(self):
+        pedidos = [self.criar_pedido(itens=0) for _ in range(7)]
+        # Empate em data_pedido: a ordem desempata pelo id
+        Pedido.objects.filter(pk__in=[p.pk for p in pedidos[:4]]).update(data_pedido=pedidos[0].data_pedido)
+
+        ids, pagina = [], self.listar(page_size=3)
+        while True:
+            ids += [pedido['id'] for pedido in pagina['results']]
+            if not pagina['next']:
+                break
+            pagina = self.listar(pagina['next'])
+        esperado = list(Pedido.objects.order_by('-data_pedido', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, esperado)
+
+
+class ExportacaoTests(PedidoTestCase):
+    """GET /orders/api/orders/export/ em streaming"""
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.usuario)
+
+    def exportar(self, **params):
+        resposta = self.api.get('/orders/api/orders/export/', params)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(resposta.streaming)
+        return b''.join(resposta.streaming_content).decode()
+
+    def test_uma_linha_por_item(self):
+        com_itens = self.criar_pedido(itens=2)
+        sem_itens = self.criar_pedido(itens=0)
+        outro = User.objects.create_user('b@example.com', 'senha', nome='B')
+        PedidoService.criar_pedido(outro, self.artista)
+
+        linhas = list(csv.DictReader(io.StringIO(self.exportar(formato='csv'))))
+        self.assertEqual([int(l['pedido_id']) for l in linhas], [com_itens.pk, com_itens.pk, sem_itens.pk])
+        self.assertEqual(linhas[2]['item_id'], '')
+
+        ndjson = [json.loads(l) for l in self.exportar(formato='ndjson').splitlines()]
+        self.assertEqual([l['pedido_id'] for l in ndjson], [com_itens.pk, com_itens.pk, sem_itens.pk])
+        self.assertEqual(Decimal(ndjson[0]['subtotal']), Decimal('55.00'))
+
+    def test_filtros(self):
+        cancelado = self.criar_pedido()
+        PedidoService.cancelar_pedido(cancelado)
+        self.criar_pedido()
+        linhas = list(csv.DictReader(io.StringIO(self.exportar(status='cancelado'))))
+        self.assertEqual([int(l['pedido_id']) for l in linhas], [cancelado.pk])
+
+        amanha = (timezone.localdate() + timedelta(days=1)).isoformat()
+        self.assertEqual(list(csv.DictReader(io.StringIO(self.exportar(inicio=amanha)))), [])
+
+        for params in ({'formato': 'xml'}, {'inicio': '2026-13-40'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.api.get('/orders/api/orders/export/', params).status_code, 400)
+
+
+class ArquivamentoTests(PedidoTestCase):
+    """Pedidos antigos concluídos/cancelados vão para o arquivo frio"""
+
+    def envelhecer(self, pedido, status, dias=400):
+        Pedido.objects.filter(pk=pedido.pk).update(
+            status_pedido=status, data_pedido=timezone.now() - timedelta(days=dias)
+        )
+
+    def test_arquiva_em_lotes_e_detalhe_continua_disponivel(self):
+        concluido = self.criar_pedido(itens=2)
+        self.envelhecer(concluido, 'concluido')
+        pagamento = Payment.objects.create(pedido=concluido, usuario=self.usuario, amount=Decimal('110.00'), method='pix')
+        cancelado = self.criar_pedido()
+        self.envelhecer(cancelado, 'cancelado')
+        recente = self.criar_pedido()
+        self.envelhecer(recente, 'concluido', dias=1)
+        ativo = self.criar_pedido()
+        self.envelhecer(ativo, 'pago')
+
+        self.assertEqual(arquivar_pedidos(dias=180, tamanho_lote=1), 2)
+        self.assertEqual(
+            set(Pedido.objects.values_list('pk', flat=True)), {recente.pk, ativo.pk}
+        )
+        arquivado = PedidoArquivado.objects.get(pk=concluido.pk)
+        self.assertEqual((arquivado.valor_total, arquivado.itens.count()), (Decimal('110.00'), 2))
+        self.assertEqual(arquivado.pagamento_id, pagamento.pk)
+        pagamento.refresh_from_db()
+        self.assertIsNone(pagamento.pedido_id)
+
+        api = APIClient()
+        api.force_authenticate(self.usuario)
+        resposta = api.get(f'/orders/api/orders/{concluido.pk}/', HTTP_ACCEPT='application/json')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(resposta.json()['arquivado'])
+        self.assertEqual(len(resposta.json()['itens']), 2)
+
+        # Repetir não arquiva de novo
+        self.assertEqual(arquivar_pedidos(dias=180), 0)
+
+
+class CotacaoTests(PedidoTestCase):
+    """POST /orders/api/orders/quote/ com a tabela de preços em memória"""
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.usuario)
+        # A tabela é do processo: descarta preços de pks reaproveitados por outros testes
+        tabela_precos.invalidar_produto(self.produto.pk)
+        tabela_precos.invalidar_personalizacao(self.personalizacao.pk)
+
+    def cotar(self, *itens):
+        return self.api.post('/orders/api/orders/quote/', list(itens), format='json')
+
+    def item(self, quantidade=1, **dados):
+        return {'produto': self.produto.pk, 'personalizacao': self.personalizacao.pk, 'quantidade': quantidade, **dados}
+
+    def test_precos_e_invalidacao(self):
+        resposta = self.cotar(self.item(2), self.item(1))
+        self.assertEqual(resposta.status_code, 200, resposta.content)
+        self.assertEqual(Decimal(resposta.json()['valor_total']), Decimal('165.00'))
+        self.assertEqual(Decimal(resposta.json()['itens'][0]['preco_unitario']), Decimal('55.00'))
+
+        # Alterações de preço valem para a próxima cotação
+        produto = Produto.objects.get(pk=self.produto.pk)
+        produto.preco_base = Decimal('60.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            produto.save()
+        self.personalizacao.preco_extra = Decimal('0.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.personalizacao.save()
+        resposta = self.cotar(self.item(2))
+        self.assertEqual(Decimal(resposta.json()['valor_total']), Decimal('120.00'))
+        self.assertFalse(Pedido.objects.exists())
 
-# Create your tests here.
+    def test_produto_inativo_ou_inexistente(self):
+        Produto.objects.filter(pk=self.produto.pk).update(ativo=False)
+        tabela_precos.invalidar_produto(self.produto.pk)
+        self.assertEqual(self.cotar(self.item()).status_code, 400)
+        self.assertEqual(self.cotar(self.item(personalizacao=999999)).status_code, 400)
+        self.assertEqual(self.cotar().status_code, 400)
@@ -1,3 +1,4 @@
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.views.generic import ListView, DetailView
 from rest_framework import viewsets, status, mixins
@@ -8,10 +9,15 @@ from rest_framework.permissions import IsAuthenticated
 from .models import Pedido, ItemPedido
 from .serializers import (
     PedidoListSerializer, PedidoDetailSerializer, PedidoStatusUpdateSerializer,
+    PedidoStatusBulkSerializer, PedidoArquivadoSerializer, ItemCotacaoSerializer, CotacaoSerializer,
     PedidoCreateSerializer,
-    ItemPedidoSerializer, ItemPedidoCreateUpdateSerializer
+    ItemPedidoSerializer, ItemPedidoCreateUpdateSerializer, ItemPedidoBulkSerializer
 )
 from .services import PedidoService
+from .pagination import PedidoCursorPagination, paginar_por_cursor
+from . import exportacao
+from .arquivamento import buscar_pedido_arquivado
+from .precos import cotar
 
 
 class PedidoViewSet(viewsets.ModelViewSet):
@@ -19,20 +25,29 @@ class PedidoViewSet(viewsets.ModelViewSet):
     ViewSet para gerenciar Pedidos.
     
     Endpoints:
-    - GET /orders/ → Lista pedidos do usuário
+    - GET /orders/ → Lista pedidos do usuário (paginação por cursor)
     - POST /orders/ → Cria novo pedido
-    - GET /orders/{id}/ → Detalhes do pedido
+    - GET /orders/{id}/ → Detalhes do pedido (inclui pedidos arquivados)
     - PATCH /orders/{id}/status/ → Atualiza status
+    - POST /orders/status/bulk/ → Atualiza status de vários pedidos
+    - GET /orders/export/ → Exporta pedidos e itens (CSV/NDJSON, streaming)
+    - POST /orders/quote/ → Cota os preços de um carrinho sem gravar nada
     - POST /orders/{id}/items/ → Adiciona item
+    - POST /orders/{id}/items/bulk/ → Adiciona vários itens de uma vez
     - PATCH /orders/{id}/marcar-impresso/ → Marca como impresso
     - PATCH /orders/{id}/marcar-enviado/ → Marca como enviado
     - PATCH /orders/{id}/finalizar/ → Finaliza pedido
     """
     permission_classes = [IsAuthenticated]
     queryset = Pedido.objects.all()
+    pagination_class = PedidoCursorPagination
 
     def get_queryset(self):
-        return Pedido.objects.filter(usuario=self.request.user).order_by('-data_pedido')
+        qs = Pedido.objects.filter(usuario=self.request.user).order_by('-data_pedido', '-id')
+        if self.action == 'list':
+            # PedidoListSerializer lê usuario/artista e os contadores do próprio pedido
+            qs = qs.select_related('usuario', 'artista')
+        return qs
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -50,6 +65,16 @@ class PedidoViewSet(viewsets.ModelViewSet):
         response_serializer = PedidoDetailSerializer(pedido, context={'request': request})
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
 
+    def retrieve(self, request, *args, **kwargs):
+        """Detalhe do pedido, com fallback para o arquivo de pedidos antigos"""
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            arquivado = buscar_pedido_arquivado(kwargs['pk'], usuario=request.user)
+            if arquivado is None:
+                raise
+            return Response(PedidoArquivadoSerializer(arquivado, context={'request': request}).data)
+
     @action(detail=True, methods=['patch'], url_path='status')
     def status(self, request, pk=None):
         """Atualiza o status do pedido com validação de fluxo"""
@@ -91,6 +116,85 @@ class PedidoViewSet(viewsets.ModelViewSet):
 
         return Response(PedidoDetailSerializer(pedido, context={'request': request}).data)
 
+    @action(detail=False, methods=['post'], url_path='status/bulk')
+    def status_bulk(self, request):
+        """
+        Atualiza o status de vários pedidos de uma vez.
+
+        Staff pode mover qualquer pedido; demais usuários, apenas os seus.
+        """
+        serializer = PedidoStatusBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        queryset = Pedido.objects.all()
+        if not request.user.is_staff:
+            queryset = queryset.filter(usuario=request.user)
+
+        try:
+            resultado = PedidoService.transicionar_em_lote(
+                serializer.validated_data['ids'],
+                serializer.validated_data['status_pedido'],
+                queryset=queryset,
+            )
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(resultado)
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def exportar(self, request):
+        """
+        Exporta pedidos com seus itens em streaming.
+
+        Parâmetros: formato (csv|ndjson), inicio/fim (AAAA-MM-DD) e status
+        (repetível). Staff exporta todos os pedidos; demais usuários, os seus.
+        """
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in exportacao.FORMATOS:
+            return Response(
+                {'detail': f'Formato inválido. Opções: {list(exportacao.FORMATOS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = Pedido.objects.all()
+        if not request.user.is_staff:
+            queryset = queryset.filter(usuario=request.user)
+
+        try:
+            queryset = exportacao.filtrar_pedidos(
+                queryset,
+                inicio=request.query_params.get('inicio'),
+                fim=request.query_params.get('fim'),
+                status=request.query_params.getlist('status'),
+            )
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(
+            exportacao.gerar(queryset, formato),
+            content_type=exportacao.FORMATOS[formato],
+        )
+        response['Content-Disposition'] = f'attachment; filename="pedidos.{formato}"'
+        return response
+
+    @action(detail=False, methods=['post'], url_path='quote')
+    def cotacao(self, request):
+        """Calcula os preços de todos os itens de um carrinho numa chamada"""
+        serializer = ItemCotacaoSerializer(
+            data=request.data,
+            many=True,
+            allow_empty=False,
+            max_length=ItemPedidoBulkSerializer.MAX_ITENS,
+        )
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            resultado = cotar(serializer.validated_data)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(CotacaoSerializer(resultado).data)
+
     @action(detail=True, methods=['patch'], url_path='marcar-impresso')
     def marcar_impresso(self, request, pk=None):
         """Marca o pedido como impresso"""
@@ -141,7 +245,7 @@ class PedidoViewSet(viewsets.ModelViewSet):
                 data['produto'],
                 data['personalizacao'],
                 data['quantidade'],
-                data['preco_unitario']
+                data.get('preco_unitario')
             )
         except ValueError as e:
             return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -152,6 +256,28 @@ class PedidoViewSet(viewsets.ModelViewSet):
         )
 
 
+    @action(detail=True, methods=['post'], url_path='items/bulk')
+    def add_items_bulk(self, request, pk=None):
+        """Adiciona vários itens ao pedido numa única transação"""
+        pedido = get_object_or_404(Pedido, pk=pk, usuario=request.user)
+        serializer = ItemPedidoBulkSerializer(
+            data=request.data,
+            many=True,
+            allow_empty=False,
+            max_length=ItemPedidoBulkSerializer.MAX_ITENS,
+        )
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            itens = PedidoService.adicionar_itens(pedido, serializer.validated_data)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            ItemPedidoSerializer(itens, many=True, context={'request': request}).data,
+            status=status.HTTP_201_CREATED
+        )
+
 class ItemPedidoViewSet(mixins.UpdateModelMixin,
                        mixins.DestroyModelMixin,
                        viewsets.GenericViewSet):
@@ -195,17 +321,25 @@ class ItemPedidoViewSet(mixins.UpdateModelMixin,
 # ===== VIEWS BASEADAS EM CLASSE PARA TEMPLATES =====
 
 class PedidoListView(ListView):
-    """Lista todos os pedidos do usuário logado"""
+    """Lista todos os pedidos do usuário logado (paginação por cursor)"""
     model = Pedido
     template_name = 'orders/pedido_list.html'
     context_object_name = 'pedidos'
-    paginate_by = 10
+    tamanho_pagina = 10
 
     def get_queryset(self):
         # Se usuário não está autenticado, retornar queryset vazio
         if not self.request.user.is_authenticated:
             return Pedido.objects.none()
-        return Pedido.objects.filter(usuario=self.request.user).order_by('-data_pedido')
+        return Pedido.objects.filter(usuario=self.request.user).select_related('artista')
+
+    def get_context_data(self, **kwargs):
+        cursor = self.request.GET.get('cursor')
+        pedidos, proximo_cursor = paginar_por_cursor(self.object_list, cursor, self.tamanho_pagina)
+        context = super().get_context_data(object_list=pedidos, **kwargs)
+        context['cursor_atual'] = cursor
+        context['proximo_cursor'] = proximo_cursor
+        return context
 
 
 class PedidoDetailView(DetailView):
@@ -220,6 +354,18 @@ class PedidoDetailView(DetailView):
             return Pedido.objects.none()
         return Pedido.objects.filter(usuario=self.request.user)
 
+    def get_object(self, queryset=None):
+        """Busca o pedido e, se não existir mais, sua cópia arquivada"""
+        try:
+            return super().get_object(queryset)
+        except Http404:
+            if not self.request.user.is_authenticated:
+                raise
+            arquivado = buscar_pedido_arquivado(self.kwargs['pk'], usuario=self.request.user)
+            if arquivado is None:
+                raise
+            return arquivado
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['itens'] = self.object.itens.all()
@@ -1,17 +1,44 @@
-from django.contrib import admin
-from .models import Produto
+import io
+
+from django import forms
+from django.contrib import admin, messages
+from django.shortcuts import redirect, render
+from django.urls import path
+
+from . import importacao
+from .models import Produto, ReservaEstoque
+
+# Linhas com erro exibidas após uma importação pelo admin
+MAX_ERROS_EXIBIDOS = 20
+
+
+class ImportarProdutosForm(forms.Form):
+    arquivo = forms.FileField(help_text='CSV com cabeçalho ou NDJSON (uma linha JSON por produto).')
+    formato = forms.ChoiceField(
+        choices=[('', 'Pela extensão')] + [(f, f.upper()) for f in importacao.FORMATOS],
+        required=False,
+    )
+
+    def clean_arquivo(self):
+        arquivo = self.cleaned_data['arquivo']
+        try:
+            importacao.verificar_utf8(arquivo.file)
+        except ValueError as e:
+            raise forms.ValidationError(str(e))
+        return arquivo
 
 
 @admin.register(Produto)
 class ProdutoAdmin(admin.ModelAdmin):
     list_display = ('nome', 'categoria', 'preco_base', 'estoque', 'disponibilidade', 'ativo', 'data_criacao')
     list_filter = ('categoria', 'ativo', 'data_criacao', 'data_atualizacao')
-    search_fields = ('nome', 'descricao')
+    search_fields = ('nome', 'sku', 'descricao')
     readonly_fields = ('data_criacao', 'data_atualizacao')
+    change_list_template = 'admin/products/produto/change_list.html'
     
     fieldsets = (
         ('Informações Básicas', {
-            'fields': ('nome', 'descricao', 'imagem', 'categoria')
+            'fields': ('nome', 'sku', 'descricao', 'imagem', 'categoria')
         }),
         ('Preço e Estoque', {
             'fields': ('preco_base', 'estoque')
@@ -35,3 +62,70 @@ class ProdutoAdmin(admin.ModelAdmin):
         if obj:  # Edição
             return self.readonly_fields + ('data_criacao',)
         return self.readonly_fields
+
+    def get_urls(self):
+        urls = [
+            path(
+                'importar/',
+                self.admin_site.admin_view(self.importar_view),
+                name='products_produto_importar',
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def importar_view(self, request):
+        """Upload de CSV/NDJSON para criar ou atualizar produtos pelo SKU"""
+        if not self.has_add_permission(request) or not self.has_change_permission(request):
+            return redirect('admin:products_produto_changelist')
+
+        form = ImportarProdutosForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            enviado = form.cleaned_data['arquivo']
+            try:
+                formato = form.cleaned_data['formato'] or importacao.formato_do_arquivo(enviado.name)
+            except ValueError as e:
+                form.add_error('formato', str(e))
+            else:
+                erros = []
+
+                def ao_errar(numero, mensagem):
+                    if len(erros) < MAX_ERROS_EXIBIDOS:
+                        erros.append(f'Linha {numero}: {mensagem}')
+
+                # Lê o upload em streaming, sem carregá-lo inteiro na memória
+                arquivo = io.TextIOWrapper(enviado.file, encoding='utf-8-sig', newline='')
+                resultado = importacao.importar(importacao.ler(arquivo, formato), ao_errar=ao_errar)
+
+                self.message_user(
+                    request,
+                    f"{resultado['criados']} produto(s) criado(s), "
+                    f"{resultado['atualizados']} atualizado(s), {resultado['erros']} linha(s) com erro.",
+                    messages.SUCCESS if not resultado['erros'] else messages.WARNING,
+                )
+                for erro in erros:
+                    self.message_user(request, erro, messages.ERROR)
+                if resultado['erros'] > len(erros):
+                    self.message_user(
+                        request,
+                        f"... e mais {resultado['erros'] - len(erros)} linha(s) com erro.",
+                        messages.ERROR,
+                    )
+                return redirect('admin:products_produto_changelist')
+
+        contexto = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Importar produtos',
+            'form': form,
+            'colunas': ['sku', *importacao.CAMPOS],
+        }
+        return render(request, 'admin/products/produto/importar.html', contexto)
+
+
+
+@admin.register(ReservaEstoque)
+class ReservaEstoqueAdmin(admin.ModelAdmin):
+    list_display = ('id', 'produto', 'pedido_id', 'quantidade', 'status', 'criado_em', 'liberado_em')
+    list_filter = ('status', 'criado_em')
+    search_fields = ('pedido_id', 'produto__nome')
+    readonly_fields = ('produto', 'pedido_id', 'quantidade', 'status', 'criado_em', 'liberado_em')
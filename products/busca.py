@@ -0,0 +1,191 @@
+"""
+Busca textual de produtos.
+
+- SQLite: tabela virtual FTS5 (products_produto_fts) com os produtos ativos,
+  mantida pelos signals de Produto (ver products.signals).
+- PostgreSQL: índice GIN sobre to_tsvector('portuguese', ...), atualizado
+  pelo próprio banco.
+- Outros bancos: cai no filtro icontains.
+
+Os resultados vêm ordenados por relevância (bm25 / ts_rank).
+"""
+import re
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, When
+from rest_framework.filters import BaseFilterBackend
+
+TABELA_FTS = 'products_produto_fts'
+INDICE_PG = 'products_produto_busca_idx'
+
+# Expressão indexada no PostgreSQL (a consulta precisa usar exatamente a mesma)
+VETOR_PG = (
+    "to_tsvector('portuguese', coalesce(nome, '') || ' ' || "
+    "coalesce(descricao, '') || ' ' || categoria)"
+)
+
+# Limite de resultados ranqueados por busca
+LIMITE_RESULTADOS = 500
+
+
+def _termos(busca):
+    return re.findall(r'\w+', busca or '')
+
+
+def disponivel(conn=None):
+    """Indica se o banco atual tem índice textual (SQLite ou PostgreSQL)"""
+    conn = conn or connection
+    return conn.vendor in ('sqlite', 'postgresql')
+
+
+# ----------------------------------------------------------------------------
+# Criação e manutenção do índice
+# ----------------------------------------------------------------------------
+
+def criar_indice(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_FTS} USING fts5("
+            "nome, descricao, categoria, tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {TABELA_FTS} (rowid, nome, descricao, categoria) "
+            "SELECT id, nome, coalesce(descricao, ''), categoria FROM products_produto WHERE ativo"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {INDICE_PG} ON products_produto USING GIN ({VETOR_PG})"
+        )
+
+
+def remover_indice(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {TABELA_FTS}")
+    elif vendor == 'postgresql':
+        schema_editor.execute(f"DROP INDEX IF EXISTS {INDICE_PG}")
+
+
+def indexar(produto):
+    """Atualiza a entrada do produto no FTS5 (produtos inativos saem do índice)"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABELA_FTS} WHERE rowid = %s", [produto.pk])
+        if produto.ativo:
+            cursor.execute(
+                f"INSERT INTO {TABELA_FTS} (rowid, nome, descricao, categoria) VALUES (%s, %s, %s, %s)",
+                [produto.pk, produto.nome, produto.descricao or '', produto.categoria],
+            )
+
+
+def indexar_lote(produtos):
+    """Como indexar(), para vários produtos de uma vez (usado pela importação em massa)"""
+    if connection.vendor != 'sqlite' or not produtos:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {TABELA_FTS} WHERE rowid = %s", [[produto.pk] for produto in produtos]
+        )
+        cursor.executemany(
+            f"INSERT INTO {TABELA_FTS} (rowid, nome, descricao, categoria) VALUES (%s, %s, %s, %s)",
+            [
+                [produto.pk, produto.nome, produto.descricao or '', produto.categoria]
+                for produto in produtos if produto.ativo
+            ],
+        )
+
+
+def desindexar(pk):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABELA_FTS} WHERE rowid = %s", [pk])
+
+
+def reindexar():
+    """Reconstrói o índice FTS5 (necessário após updates em massa, que não disparam signals)"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABELA_FTS}")
+        cursor.execute(
+            f"INSERT INTO {TABELA_FTS} (rowid, nome, descricao, categoria) "
+            "SELECT id, nome, coalesce(descricao, ''), categoria FROM products_produto WHERE ativo"
+        )
+
+
+# ----------------------------------------------------------------------------
+# Consulta
+# ----------------------------------------------------------------------------
+
+def buscar_ids(busca, limite=LIMITE_RESULTADOS):
+    """
+    Retorna os ids dos produtos que casam com a busca, do mais ao menos relevante.
+
+    Cada termo é tratado como prefixo e todos precisam aparecer (AND).
+    """
+    termos = _termos(busca)
+    if not termos:
+        return []
+
+    if connection.vendor == 'sqlite':
+        consulta = ' '.join('"{}"*'.format(t) for t in termos)
+        sql = (
+            f"SELECT rowid FROM {TABELA_FTS} WHERE {TABELA_FTS} MATCH %s "
+            # Pesos: nome > descrição > categoria
+            f"ORDER BY bm25({TABELA_FTS}, 10.0, 2.0, 1.0) LIMIT %s"
+        )
+    else:
+        consulta = ' & '.join(f'{t}:*' for t in termos)
+        sql = (
+            f"SELECT id FROM products_produto "
+            f"WHERE {VETOR_PG} @@ to_tsquery('portuguese', %s) "
+            f"ORDER BY ts_rank({VETOR_PG}, to_tsquery('portuguese', %s)) DESC LIMIT %s"
+        )
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(sql, [consulta, limite])
+        else:
+            cursor.execute(sql, [consulta, consulta, limite])
+        return [linha[0] for linha in cursor.fetchall()]
+
+
+def buscar(queryset, busca, ordenar=True):
+    """
+    Filtra o queryset de produtos pela busca textual.
+
+    Com ordenar=True, o resultado sai na ordem de relevância.
+    """
+    if not busca:
+        return queryset
+
+    if not disponivel():
+        return queryset.filter(Q(nome__icontains=busca) | Q(descricao__icontains=busca))
+
+    ids = buscar_ids(busca)
+    queryset = queryset.filter(pk__in=ids)
+    if ordenar and ids:
+        relevancia = Case(
+            *[When(pk=pk, then=posicao) for posicao, pk in enumerate(ids)],
+            output_field=IntegerField(),
+        )
+        queryset = queryset.order_by(relevancia)
+    return queryset
+
+
+class ProdutoBuscaFilter(BaseFilterBackend):
+    """
+    Substitui o SearchFilter (LIKE '%x%') pela busca textual indexada.
+
+    Usa o mesmo parâmetro ?search=. Sem ?ordering= explícito, ordena por
+    relevância; por isso deve vir depois do OrderingFilter.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        busca = request.query_params.get(self.search_param, '').strip()
+        ordenar = 'ordering' not in request.query_params
+        return buscar(queryset, busca, ordenar=ordenar)
@@ -0,0 +1,77 @@
+"""
+Cache de respostas do catálogo de produtos.
+
+As entradas são os bytes JSON já renderizados, numa chave que inclui a
+versão do catálogo: um acerto não toca no ORM nem no ProdutoSerializer.
+As URLs de imagem saem absolutas, então a chave também inclui o host.
+Qualquer save/delete de Produto (e as baixas/devoluções de estoque)
+incrementa a versão, o que invalida todas as entradas de uma vez.
+
+Em um miss, só um worker reconstrói a entrada (lock via cache.add); os
+demais esperam um pouco pelo resultado antes de desistir e montar a sua.
+"""
+import time
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from core import versoes
+
+CHAVE_VERSAO = 'products:catalogo:versao'
+TTL_ENTRADA = 60 * 60
+TTL_LOCK = 10
+ESPERA_MAXIMA = 2.0
+INTERVALO_ESPERA = 0.05
+
+
+def versao_catalogo():
+    return versoes.atual(CHAVE_VERSAO)
+
+
+def invalidar_catalogo():
+    """Invalida o catálogo após o commit (antes dele, outro worker recachearia o estado antigo)"""
+    versoes.incrementar_apos_commit(CHAVE_VERSAO)
+
+
+def chave(nome, request):
+    """Chave da entrada: versão + host + nome da consulta + parâmetros normalizados"""
+    normalizados = '&'.join(
+        f'{k}={v}' for k, valores in sorted(request.query_params.lists()) for v in sorted(valores)
+    )
+    base = request.build_absolute_uri('/')
+    return f'products:catalogo:{versao_catalogo()}:{base}:{nome}:{normalizados}'
+
+
+def _resposta(conteudo):
+    return HttpResponse(conteudo, content_type='application/json')
+
+
+def resposta_em_cache(nome, request, construir):
+    """
+    Retorna a resposta JSON da consulta, do cache ou construindo-a.
+
+    construir() devolve os dados já serializados (lista/dict).
+    """
+    chave_entrada = chave(nome, request)
+    conteudo = cache.get(chave_entrada)
+    if conteudo is not None:
+        return _resposta(conteudo)
+
+    chave_lock = f'{chave_entrada}:lock'
+    if not cache.add(chave_lock, 1, timeout=TTL_LOCK):
+        # Outro worker está montando esta entrada
+        limite = time.monotonic() + ESPERA_MAXIMA
+        while time.monotonic() < limite:
+            time.sleep(INTERVALO_ESPERA)
+            conteudo = cache.get(chave_entrada)
+            if conteudo is not None:
+                return _resposta(conteudo)
+        return _resposta(JSONRenderer().render(construir()))
+
+    try:
+        conteudo = JSONRenderer().render(construir())
+        cache.set(chave_entrada, conteudo, timeout=TTL_ENTRADA)
+    finally:
+        cache.delete(chave_lock)
+    return _resposta(conteudo)
@@ -0,0 +1,201 @@
+"""
+Reserva atômica de estoque.
+
+O saldo de cada produto fica dividido em ESTOQUE_PARTICOES linhas de
+ParticaoEstoque. Numa promoção, as compras simultâneas do mesmo produto
+caem em partições diferentes (a partição inicial é sorteada) e não ficam
+na fila do lock de uma única linha.
+
+A baixa é um UPDATE condicional na partição (quantidade = quantidade - qtd
+WHERE quantidade >= qtd): sem ler o saldo no Python, duas compras do
+último item não conseguem vender a mesma unidade. Se nenhuma partição
+cobre a quantidade sozinha, as partições do produto são travadas (em
+ordem) e a baixa é repartida entre elas. As baixas são feitas por ordem
+de produto_id para evitar deadlocks entre carrinhos com os mesmos produtos.
+
+Produto.estoque continua sendo o saldo lido pelo catálogo e pelos
+filtros: é a soma das partições, recalculada depois do commit, fora da
+transação da compra. Uma edição de Produto.estoque é aplicada às partições
+como diferença em relação ao valor carregado (ver ajustar), e não como
+saldo novo.
+"""
+import random
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .cache import invalidar_catalogo
+from .models import ParticaoEstoque, Produto, ReservaEstoque
+
+
+class EstoqueInsuficiente(ValueError):
+    """Algum produto não tem estoque suficiente para a reserva"""
+
+
+def _particoes():
+    return max(1, getattr(settings, 'ESTOQUE_PARTICOES', 8))
+
+
+def dividir(total, particoes):
+    """Divide o total em `particoes` partes o mais iguais possível"""
+    base, resto = divmod(total, particoes)
+    return [base + (1 if numero < resto else 0) for numero in range(particoes)]
+
+
+@transaction.atomic
+def distribuir(saldos):
+    """
+    Redivide entre as partições o saldo informado para cada produto
+    ({produto_id: estoque}), quando o estoque é definido no cadastro, no
+    admin ou na importação.
+    """
+    particoes = _particoes()
+    ParticaoEstoque.objects.filter(produto_id__in=saldos).delete()
+    ParticaoEstoque.objects.bulk_create(
+        ParticaoEstoque(produto_id=produto_id, numero=numero, quantidade=quantidade)
+        for produto_id, total in saldos.items()
+        for numero, quantidade in enumerate(dividir(total, particoes))
+    )
+
+
+def total(produto_id):
+    """Soma das partições do produto"""
+    return ParticaoEstoque.objects.filter(produto_id=produto_id).aggregate(
+        total=Coalesce(Sum('quantidade'), 0)
+    )['total']
+
+
+def _sincronizar(produto_ids):
+    soma = (
+        ParticaoEstoque.objects.filter(produto=OuterRef('pk'))
+        .values('produto')
+        .annotate(total=Sum('quantidade'))
+        .values('total')
+    )
+    Produto.objects.filter(pk__in=produto_ids).update(estoque=Coalesce(Subquery(soma), 0))
+
+
+def sincronizar(produto_ids):
+    """Atualiza Produto.estoque com a soma das partições, após o commit"""
+    produto_ids = list(produto_ids)
+    transaction.on_commit(lambda: _sincronizar(produto_ids))
+
+
+def _baixar(produto_id, quantidade):
+    particoes = _particoes()
+    inicio = random.randrange(particoes)
+    for deslocamento in range(particoes):
+        baixados = ParticaoEstoque.objects.filter(
+            produto_id=produto_id,
+            numero=(inicio + deslocamento) % particoes,
+            quantidade__gte=quantidade,
+        ).update(quantidade=F('quantidade') - quantidade)
+        if baixados:
+            return True
+
+    # Nenhuma partição cobre a quantidade sozinha: junta os saldos
+    com_saldo = list(
+        ParticaoEstoque.objects.select_for_update()
+        .filter(produto_id=produto_id, quantidade__gt=0)
+        .order_by('numero')
+    )
+    if sum(particao.quantidade for particao in com_saldo) < quantidade:
+        return False
+    restante = quantidade
+    for particao in com_saldo:
+        retirada = min(particao.quantidade, restante)
+        particao.quantidade -= retirada
+        restante -= retirada
+        if not restante:
+            break
+    ParticaoEstoque.objects.bulk_update(com_saldo, ['quantidade'])
+    return True
+
+
+def _devolver(produto_id, quantidade):
+    devolvidos = ParticaoEstoque.objects.filter(
+        produto_id=produto_id,
+        numero=random.randrange(_particoes()),
+    ).update(quantidade=F('quantidade') + quantidade)
+    if not devolvidos:
+        # Partição inexistente (ex.: ESTOQUE_PARTICOES aumentou)
+        particao, _ = ParticaoEstoque.objects.get_or_create(produto_id=produto_id, numero=0)
+        ParticaoEstoque.objects.filter(pk=particao.pk).update(quantidade=F('quantidade') + quantidade)
+
+
+@transaction.atomic
+def ajustar(produto_id, delta):
+    """
+    Soma `delta` ao saldo do produto, quando o estoque é editado no
+    cadastro, no admin ou na API.
+
+    Aplica só a diferença editada: as reservas feitas depois que o produto
+    foi carregado continuam valendo. Uma retirada maior que o saldo zera o
+    estoque. Produto.estoque (gravado pelo save com o valor da instância)
+    volta a ser a soma das partições após o commit.
+    """
+    if delta > 0:
+        _devolver(produto_id, delta)
+    elif delta < 0 and not _baixar(produto_id, -delta):
+        ParticaoEstoque.objects.filter(produto_id=produto_id).update(quantidade=0)
+    sincronizar([produto_id])
+    invalidar_catalogo()
+
+
+@transaction.atomic
+def reservar(pedido_id, quantidades):
+    """
+    Baixa o estoque dos produtos e registra a reserva do pedido.
+
+    quantidades: {produto_id: quantidade}. Levanta EstoqueInsuficiente (e a
+    transação é desfeita) se algum produto não tiver saldo.
+    """
+    reservas = []
+    for produto_id in sorted(quantidades):
+        quantidade = quantidades[produto_id]
+        if quantidade <= 0:
+            continue
+        if not _baixar(produto_id, quantidade):
+            raise EstoqueInsuficiente(f"Estoque insuficiente para o produto #{produto_id}.")
+        reservas.append(ReservaEstoque(produto_id=produto_id, pedido_id=pedido_id, quantidade=quantidade))
+
+    ReservaEstoque.objects.bulk_create(reservas)
+    if reservas:
+        # Nesta ordem: o catálogo só é invalidado depois de Produto.estoque atualizado
+        sincronizar(reserva.produto_id for reserva in reservas)
+        invalidar_catalogo()
+    return reservas
+
+
+@transaction.atomic
+def liberar(pedido_ids):
+    """
+    Devolve ao estoque as reservas ativas dos pedidos informados.
+
+    Idempotente: reservas já liberadas são ignoradas. Retorna o número de
+    reservas liberadas.
+    """
+    reservas = list(
+        ReservaEstoque.objects.select_for_update()
+        .filter(pedido_id__in=pedido_ids, status='ativa')
+    )
+    if not reservas:
+        return 0
+
+    devolver = {}
+    for reserva in reservas:
+        devolver[reserva.produto_id] = devolver.get(reserva.produto_id, 0) + reserva.quantidade
+
+    for produto_id in sorted(devolver):
+        _devolver(produto_id, devolver[produto_id])
+
+    ReservaEstoque.objects.filter(pk__in=[r.pk for r in reservas]).update(
+        status='liberada',
+        liberado_em=timezone.now(),
+    )
+    sincronizar(devolver)
+    invalidar_catalogo()
+    return len(reservas)
@@ -0,0 +1,113 @@
+"""
+Contagens por faceta do catálogo (barra lateral da loja).
+
+Todas as facetas saem de uma única consulta agrupada por
+(categoria, em_estoque, faixa_preco); os totais de cada faceta são somados
+em Python a partir dessas poucas linhas.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Case, Count, IntegerField, Q, When
+
+from .busca import buscar
+from .models import Produto
+
+# (código, rótulo, mínimo inclusivo, máximo exclusivo)
+FAIXAS_PRECO = [
+    ('ate_50', 'Até R$ 50', None, Decimal('50')),
+    ('50_100', 'R$ 50 a R$ 100', Decimal('50'), Decimal('100')),
+    ('100_200', 'R$ 100 a R$ 200', Decimal('100'), Decimal('200')),
+    ('acima_200', 'Acima de R$ 200', Decimal('200'), None),
+]
+
+
+def _condicao_faixa(minimo, maximo):
+    condicao = Q()
+    if minimo is not None:
+        condicao &= Q(preco_base__gte=minimo)
+    if maximo is not None:
+        condicao &= Q(preco_base__lt=maximo)
+    return condicao
+
+
+def _decimal(valor, nome):
+    try:
+        numero = Decimal(valor)
+    except InvalidOperation:
+        raise ValueError(f"Valor inválido para {nome}: {valor}")
+    # NaN/Infinity passam pelo Decimal mas quebram o filtro do DecimalField
+    if not numero.is_finite():
+        raise ValueError(f"Valor inválido para {nome}: {valor}")
+    return numero
+
+
+def filtrar(queryset, params):
+    """
+    Aplica os filtros da vitrine: search, categoria, disponivel, faixa_preco,
+    preco_min e preco_max. Levanta ValueError para valores inválidos.
+    """
+    queryset = buscar(queryset, params.get('search', '').strip(), ordenar=False)
+
+    categorias = params.getlist('categoria')
+    if categorias:
+        queryset = queryset.filter(categoria__in=categorias)
+    if params.get('disponivel') in ('1', 'true'):
+        queryset = queryset.filter(estoque__gt=0)
+
+    faixas = params.getlist('faixa_preco')
+    if faixas:
+        condicao = Q()
+        for codigo, _, minimo, maximo in FAIXAS_PRECO:
+            if codigo in faixas:
+                condicao |= _condicao_faixa(minimo, maximo)
+        queryset = queryset.filter(condicao) if condicao else queryset.none()
+
+    if params.get('preco_min'):
+        queryset = queryset.filter(preco_base__gte=_decimal(params['preco_min'], 'preco_min'))
+    if params.get('preco_max'):
+        queryset = queryset.filter(preco_base__lte=_decimal(params['preco_max'], 'preco_max'))
+    return queryset
+
+
+def contar(queryset):
+    """Retorna as contagens de todas as facetas do queryset em um único GROUP BY"""
+    faixa = Case(
+        *[
+            When(_condicao_faixa(minimo, maximo), then=posicao)
+            for posicao, (_, _, minimo, maximo) in enumerate(FAIXAS_PRECO)
+        ],
+        output_field=IntegerField(),
+    )
+    em_estoque = Case(When(estoque__gt=0, then=1), default=0, output_field=IntegerField())
+    linhas = (
+        queryset.order_by()
+        .annotate(em_estoque=em_estoque, faixa=faixa)
+        .values('categoria', 'em_estoque', 'faixa')
+        .annotate(total=Count('id'))
+    )
+
+    total = 0
+    por_categoria = dict.fromkeys((codigo for codigo, _ in Produto.CATEGORIA_CHOICES), 0)
+    disponiveis = 0
+    por_faixa = [0] * len(FAIXAS_PRECO)
+    for linha in linhas:
+        total += linha['total']
+        por_categoria[linha['categoria']] = por_categoria.get(linha['categoria'], 0) + linha['total']
+        if linha['em_estoque']:
+            disponiveis += linha['total']
+        if linha['faixa'] is not None:
+            por_faixa[linha['faixa']] += linha['total']
+
+    rotulos = dict(Produto.CATEGORIA_CHOICES)
+    return {
+        'total': total,
+        'categorias': [
+            {'categoria': codigo, 'nome': rotulos.get(codigo, codigo), 'total': quantidade}
+            for codigo, quantidade in por_categoria.items()
+        ],
+        'estoque': {'disponiveis': disponiveis, 'indisponiveis': total - disponiveis},
+        'faixas_preco': [
+            {'faixa': codigo, 'nome': nome, 'total': por_faixa[posicao]}
+            for posicao, (codigo, nome, _, _) in enumerate(FAIXAS_PRECO)
+        ],
+    }
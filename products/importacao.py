@@ -0,0 +1,226 @@
+"""
+Importação em massa de produtos (CSV ou NDJSON), com upsert pelo SKU.
+
+O arquivo é lido linha a linha e gravado em lotes: cada lote busca os
+produtos existentes com um único in_bulk, cria os novos com bulk_create e
+atualiza os demais com bulk_update. A memória fica limitada ao tamanho do
+lote, qualquer que seja o arquivo.
+
+Linhas inválidas são reportadas (número da linha + mensagem) e puladas;
+o restante do lote é gravado normalmente.
+
+Colunas: sku (obrigatória), nome, descricao, categoria, preco_base, estoque
+e ativo. Nas atualizações, só as colunas presentes (e não vazias) são
+alteradas; na criação, nome e preco_base são obrigatórios.
+"""
+import codecs
+import csv
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from . import busca, estoque
+from .cache import invalidar_catalogo
+from .models import Produto
+from .signals import produtos_importados
+
+CAMPOS = ['nome', 'descricao', 'categoria', 'preco_base', 'estoque', 'ativo']
+OBRIGATORIOS_NA_CRIACAO = ['nome', 'preco_base']
+FORMATOS = ['csv', 'ndjson']
+TAMANHO_LOTE = 500
+
+VERDADEIROS = {'1', 'true', 't', 'sim', 's', 'yes', 'y'}
+FALSOS = {'0', 'false', 'f', 'nao', 'não', 'n', 'no'}
+
+
+def formato_do_arquivo(nome):
+    """Deduz o formato pela extensão ('.csv', '.ndjson' ou '.jsonl')"""
+    nome = nome.lower()
+    if nome.endswith('.csv'):
+        return 'csv'
+    if nome.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    raise ValueError(f"Formato não reconhecido para {nome}. Opções: {FORMATOS}")
+
+
+def verificar_utf8(arquivo, tamanho_bloco=64 * 1024):
+    """
+    Confere, em blocos, se o arquivo binário está em UTF-8 e volta ao início.
+
+    Feito antes da importação: um erro de decodificação no meio da leitura
+    deixaria os lotes anteriores gravados. Levanta ValueError.
+    """
+    decodificador = codecs.getincrementaldecoder('utf-8-sig')()
+    posicao = 0
+    try:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b''):
+            decodificador.decode(bloco)
+            posicao += len(bloco)
+        decodificador.decode(b'', final=True)
+    except UnicodeDecodeError as e:
+        raise ValueError(f"O arquivo não está em UTF-8 (byte {posicao + e.start})")
+    finally:
+        arquivo.seek(0)
+
+
+def ler_csv(arquivo):
+    """Gera (número da linha, dict) a partir de um arquivo texto CSV com cabeçalho"""
+    leitor = csv.DictReader(arquivo)
+    for linha in leitor:
+        yield leitor.line_num, linha
+
+
+def ler_ndjson(arquivo):
+    """Gera (número da linha, dict) a partir de um arquivo texto NDJSON"""
+    for numero, texto in enumerate(arquivo, start=1):
+        if not texto.strip():
+            continue
+        try:
+            linha = json.loads(texto)
+        except json.JSONDecodeError as e:
+            yield numero, ValueError(f"JSON inválido: {e.msg}")
+            continue
+        if not isinstance(linha, dict):
+            linha = ValueError("Cada linha deve ser um objeto JSON")
+        yield numero, linha
+
+
+def ler(arquivo, formato):
+    if formato == 'csv':
+        return ler_csv(arquivo)
+    if formato == 'ndjson':
+        return ler_ndjson(arquivo)
+    raise ValueError(f"Formato não suportado: {formato}. Opções: {FORMATOS}")
+
+
+def _mensagem(erro):
+    if isinstance(erro, ValidationError):
+        return '; '.join(erro.messages)
+    return str(erro)
+
+
+def validar_linha(linha):
+    """
+    Converte e valida os valores de uma linha.
+
+    Retorna (sku, {campo: valor}) só com as colunas informadas.
+    Levanta ValueError com a mensagem do primeiro problema encontrado.
+    """
+    sku = str(linha.get('sku') or '').strip()
+    if not sku:
+        raise ValueError("sku é obrigatório")
+    try:
+        sku = Produto._meta.get_field('sku').clean(sku, None)
+    except ValidationError as e:
+        raise ValueError(f"sku: {_mensagem(e)}")
+
+    valores = {}
+    for nome in CAMPOS:
+        valor = linha.get(nome)
+        if isinstance(valor, str):
+            valor = valor.strip()
+        if valor is None or valor == '':
+            continue
+        if nome == 'ativo' and isinstance(valor, str):
+            if valor.lower() in VERDADEIROS:
+                valor = True
+            elif valor.lower() in FALSOS:
+                valor = False
+        campo = Produto._meta.get_field(nome)
+        try:
+            valores[nome] = campo.clean(valor, None)
+        except ValidationError as e:
+            raise ValueError(f"{nome}: {_mensagem(e)}")
+    return sku, valores
+
+
+def _gravar_lote(lote):
+    """
+    Grava um lote {sku: valores}. Retorna (criados, atualizados, erros).
+    """
+    existentes = Produto.objects.in_bulk(list(lote), field_name='sku')
+    novos, alterados, erros = [], [], []
+    campos_alterados = set()
+
+    for sku, (numero, valores) in lote.items():
+        produto = existentes.get(sku)
+        if produto is None:
+            faltando = [nome for nome in OBRIGATORIOS_NA_CRIACAO if nome not in valores]
+            if faltando:
+                erros.append((numero, f"Produto novo sem {', '.join(faltando)}"))
+                continue
+            novos.append(Produto(sku=sku, **valores))
+        else:
+            for nome, valor in valores.items():
+                setattr(produto, nome, valor)
+            campos_alterados.update(valores)
+            alterados.append(produto)
+
+    with transaction.atomic():
+        Produto.objects.bulk_create(novos)
+        if alterados:
+            # auto_now não é aplicado pelo bulk_update
+            agora = timezone.now()
+            for produto in alterados:
+                produto.data_atualizacao = agora
+            Produto.objects.bulk_update(alterados, [*campos_alterados, 'data_atualizacao'])
+
+        gravados = novos + alterados
+        if not all(produto.pk for produto in novos):
+            # Bancos sem RETURNING: recarrega os criados para ter os pks
+            gravados = list(Produto.objects.filter(sku__in=[produto.sku for produto in gravados]))
+        busca.indexar_lote(gravados)
+        # bulk_* não dispara o post_save que redivide o estoque nas partições
+        com_estoque = {sku for sku, (_, valores) in lote.items() if 'estoque' in valores or sku not in existentes}
+        estoque.distribuir({produto.pk: produto.estoque for produto in gravados if produto.sku in com_estoque})
+        invalidar_catalogo()
+
+    produtos_importados.send(sender=Produto, pks=[produto.pk for produto in gravados])
+    return len(novos), len(alterados), erros
+
+
+def importar(linhas, tamanho_lote=TAMANHO_LOTE, ao_errar=None):
+    """
+    Importa as linhas geradas por ler(): (número da linha, dict ou exceção).
+
+    ao_errar(numero, mensagem) é chamado para cada linha rejeitada, assim que
+    ela é detectada. Retorna {'criados', 'atualizados', 'erros'} (contagens).
+    """
+    resultado = {'criados': 0, 'atualizados': 0, 'erros': 0}
+
+    def erro(numero, mensagem):
+        resultado['erros'] += 1
+        if ao_errar:
+            ao_errar(numero, mensagem)
+
+    def gravar(lote):
+        criados, atualizados, erros = _gravar_lote(lote)
+        resultado['criados'] += criados
+        resultado['atualizados'] += atualizados
+        for numero, mensagem in erros:
+            erro(numero, mensagem)
+
+    lote = {}
+    for numero, linha in linhas:
+        if isinstance(linha, Exception):
+            erro(numero, str(linha))
+            continue
+        try:
+            sku, valores = validar_linha(linha)
+        except ValueError as e:
+            erro(numero, str(e))
+            continue
+
+        if sku in lote:
+            # SKU repetido no mesmo lote: as colunas da linha mais recente prevalecem
+            valores = {**lote[sku][1], **valores}
+        lote[sku] = (numero, valores)
+        if len(lote) >= tamanho_lote:
+            gravar(lote)
+            lote = {}
+
+    if lote:
+        gravar(lote)
+    return resultado
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from products import importacao
+
+
+class Command(BaseCommand):
+    """
+    Importa/atualiza produtos a partir de um arquivo CSV ou NDJSON.
+
+    O upsert é feito pelo SKU, em lotes. Linhas inválidas são listadas na
+    saída de erro e não interrompem a importação.
+    """
+    help = 'Importa produtos (CSV/NDJSON) criando ou atualizando pelo SKU.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='Caminho do arquivo.')
+        parser.add_argument(
+            '--formato', choices=importacao.FORMATOS, default=None,
+            help='Formato do arquivo (padrão: deduzido pela extensão).',
+        )
+        parser.add_argument('--lote', type=int, default=importacao.TAMANHO_LOTE)
+
+    def handle(self, *args, **options):
+        try:
+            formato = options['formato'] or importacao.formato_do_arquivo(options['arquivo'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        def ao_errar(numero, mensagem):
+            self.stderr.write(f'Linha {numero}: {mensagem}')
+
+        try:
+            with open(options['arquivo'], 'rb') as binario:
+                importacao.verificar_utf8(binario)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        try:
+            with open(options['arquivo'], encoding='utf-8-sig', newline='') as arquivo:
+                resultado = importacao.importar(
+                    importacao.ler(arquivo, formato),
+                    tamanho_lote=options['lote'],
+                    ao_errar=ao_errar,
+                )
+        except OSError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado['criados']} produto(s) criado(s), "
+            f"{resultado['atualizados']} atualizado(s), {resultado['erros']} linha(s) com erro."
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from products import busca
+
+
+class Command(BaseCommand):
+    """
+    Reconstrói o índice de busca textual dos produtos.
+
+    Necessário depois de alterações em massa (queryset.update, SQL direto),
+    que não passam pelos signals de Produto.
+    """
+    help = 'Reconstrói o índice FTS de produtos.'
+
+    def handle(self, *args, **options):
+        busca.reindexar()
+        self.stdout.write(self.style.SUCCESS('Índice de busca de produtos reconstruído.'))
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def criar_indice(apps, schema_editor):
+    from products.busca import criar_indice
+    criar_indice(schema_editor)
+
+
+def remover_indice(apps, schema_editor):
+    from products.busca import remover_indice
+    remover_indice(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_produto_imagem'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indice, remover_indice),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_produto_busca'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservaEstoque',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pedido_id', models.PositiveIntegerField()),
+                ('quantidade', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('ativa', 'Ativa'), ('liberada', 'Liberada')], default='ativa', max_length=10)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('liberado_em', models.DateTimeField(blank=True, null=True)),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='reservas', to='products.produto')),
+            ],
+            options={
+                'verbose_name': 'Reserva de Estoque',
+                'verbose_name_plural': 'Reservas de Estoque',
+                'indexes': [models.Index(fields=['pedido_id', 'status'], name='products_re_pedido__d15f8b_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_reservaestoque'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='produto',
+            name='sku',
+            field=models.CharField(blank=True, help_text='Código do produto', max_length=50, null=True, unique=True),
+        ),
+    ]
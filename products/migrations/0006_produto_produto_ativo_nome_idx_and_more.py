@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_produto_sku'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['nome'], name='produto_ativo_nome_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['categoria', 'nome'], name='produto_ativo_categoria_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def dividir(total, particoes):
+    # Cópia de products.estoque.dividir: a migração não depende do código atual
+    base, resto = divmod(total, particoes)
+    return [base + (1 if numero < resto else 0) for numero in range(particoes)]
+
+
+def dividir_estoque(apps, schema_editor):
+    Produto = apps.get_model('products', 'Produto')
+    ParticaoEstoque = apps.get_model('products', 'ParticaoEstoque')
+    particoes = getattr(settings, 'ESTOQUE_PARTICOES', 8)
+    for produto_id, estoque in Produto.objects.values_list('pk', 'estoque').iterator():
+        ParticaoEstoque.objects.bulk_create(
+            ParticaoEstoque(produto_id=produto_id, numero=numero, quantidade=quantidade)
+            for numero, quantidade in enumerate(dividir(estoque, particoes))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_produto_produto_ativo_nome_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParticaoEstoque',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero', models.PositiveSmallIntegerField()),
+                ('quantidade', models.PositiveIntegerField(default=0)),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='particoes_estoque', to='products.produto')),
+            ],
+            options={
+                'verbose_name': 'Partição de Estoque',
+                'verbose_name_plural': 'Partições de Estoque',
+                'constraints': [models.UniqueConstraint(fields=('produto', 'numero'), name='particao_estoque_uniq')],
+            },
+        ),
+        migrations.RunPython(dividir_estoque, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 
 
 class Produto(models.Model):
@@ -9,6 +10,8 @@ class Produto(models.Model):
         ('acessorio', 'Acessório'),
     ]
     
+    # Chave natural usada na importação em massa (ver products.importacao)
+    sku = models.CharField(max_length=50, unique=True, blank=True, null=True, help_text='Código do produto')
     nome = models.CharField(max_length=200)
     descricao = models.TextField(blank=True, null=True)
     imagem = models.ImageField(upload_to='produtos/', blank=True, null=True, help_text='Foto do produto')
@@ -23,6 +26,74 @@ class Produto(models.Model):
         verbose_name = 'Produto'
         verbose_name_plural = 'Produtos'
         ordering = ['nome']
+        indexes = [
+            # Índices parciais: o catálogo só lê produtos ativos
+            models.Index(fields=['nome'], condition=Q(ativo=True), name='produto_ativo_nome_idx'),
+            models.Index(fields=['categoria', 'nome'], condition=Q(ativo=True), name='produto_ativo_categoria_idx'),
+        ]
     
     def __str__(self):
         return self.nome
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        # Base para a diferença aplicada às partições (ver products.signals)
+        if fields is None or 'estoque' in fields:
+            self._estoque_carregado = self.estoque
+
+
+
+class ParticaoEstoque(models.Model):
+    """
+    Parte do saldo de estoque de um produto (ver products.estoque).
+
+    O saldo é dividido em ESTOQUE_PARTICOES linhas para que reservas
+    simultâneas do mesmo produto disputem linhas diferentes, e não a linha
+    do Produto. Produto.estoque é a soma das partições, atualizada após o
+    commit de cada reserva/devolução.
+    """
+    produto = models.ForeignKey(Produto, on_delete=models.CASCADE, related_name='particoes_estoque')
+    numero = models.PositiveSmallIntegerField()
+    quantidade = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Partição de Estoque'
+        verbose_name_plural = 'Partições de Estoque'
+        constraints = [
+            models.UniqueConstraint(fields=['produto', 'numero'], name='particao_estoque_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Produto #{self.produto_id} [{self.numero}]: {self.quantidade}"
+
+
+class ReservaEstoque(models.Model):
+    """
+    Registro do estoque baixado para um pedido.
+
+    Criada quando o pagamento é confirmado (a baixa em Produto.estoque é
+    feita na mesma transação) e liberada quando o pedido é cancelado,
+    devolvendo exatamente a quantidade reservada.
+    """
+    STATUS_CHOICES = [
+        ('ativa', 'Ativa'),
+        ('liberada', 'Liberada'),
+    ]
+
+    produto = models.ForeignKey(Produto, on_delete=models.PROTECT, related_name='reservas')
+    # Sem FK: a reserva sobrevive ao arquivamento do pedido
+    pedido_id = models.PositiveIntegerField()
+    quantidade = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='ativa')
+    criado_em = models.DateTimeField(auto_now_add=True)
+    liberado_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Reserva de Estoque'
+        verbose_name_plural = 'Reservas de Estoque'
+        indexes = [
+            models.Index(fields=['pedido_id', 'status']),
+        ]
+
+    def __str__(self):
+        return f"Reserva #{self.id} - {self.produto_id} x{self.quantidade} (pedido #{self.pedido_id})"
@@ -1,18 +1,26 @@
 from rest_framework import serializers
+
+from core.derivadas import DerivadasField
+
 from .models import Produto
 
 
 class ProdutoSerializer(serializers.ModelSerializer):
     categoria_display = serializers.CharField(source='get_categoria_display', read_only=True)
     disponivel = serializers.SerializerMethodField()
+    imagens = DerivadasField(source='imagem')
 
     class Meta:
         model = Produto
         fields = [
-            'id', 'nome', 'descricao', 'categoria', 'categoria_display',
-            'preco_base', 'estoque', 'disponivel', 'ativo', 'data_criacao', 'data_atualizacao'
+            'id', 'sku', 'nome', 'descricao', 'categoria', 'categoria_display',
+            'imagem', 'imagens', 'preco_base', 'estoque', 'disponivel', 'ativo', 'data_criacao', 'data_atualizacao'
         ]
         read_only_fields = ['data_criacao', 'data_atualizacao']
 
+    def validate_sku(self, valor):
+        # Vazio vira NULL para não colidir no índice único
+        return valor or None
+
     def get_disponivel(self, obj):
         return obj.estoque > 0
\ No newline at end of file
@@ -0,0 +1,45 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import Signal, receiver
+
+from core import derivadas
+
+from . import busca, estoque
+from .cache import invalidar_catalogo
+from .models import Produto
+
+# Enviado pela importação em massa (bulk_create/bulk_update não disparam
+# post_save) com os pks dos produtos criados ou alterados em cada lote.
+produtos_importados = Signal()
+
+
+@receiver(post_save, sender=Produto)
+def indexar_produto(sender, instance, **kwargs):
+    busca.indexar(instance)
+    invalidar_catalogo()
+    # Quando as miniaturas ficam prontas, o catálogo em cache passa a apontar para elas
+    derivadas.agendar(instance.imagem, ao_concluir=invalidar_catalogo)
+
+
+@receiver(post_init, sender=Produto)
+def guardar_estoque_carregado(sender, instance, **kwargs):
+    # Valor de estoque com que a instância foi carregada (ou criada)
+    instance._estoque_carregado = instance.estoque
+
+
+@receiver(post_save, sender=Produto)
+def distribuir_estoque(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and 'estoque' not in update_fields):
+        return
+    if created:
+        estoque.distribuir({instance.pk: instance.estoque})
+    else:
+        # Só a edição do próprio estoque mexe nas partições, e como diferença:
+        # uma instância carregada antes de uma reserva não devolve o que foi vendido
+        estoque.ajustar(instance.pk, instance.estoque - instance._estoque_carregado)
+    instance._estoque_carregado = instance.estoque
+
+
+@receiver(post_delete, sender=Produto)
+def desindexar_produto(sender, instance, **kwargs):
+    busca.desindexar(instance.pk)
+    invalidar_catalogo()
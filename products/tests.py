@@ -1,3 +1,214 @@
-from django.test import TestCase
+import io
+import tempfile
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from . import busca, estoque, importacao
+from .models import ParticaoEstoque, Produto, ReservaEstoque
+
+
+class EstoqueTests(TestCase):
+    """Reserva/devolução nas partições de estoque (products.estoque)"""
+
+    def setUp(self):
+        self.produto = Produto.objects.create(nome='Capinha', preco_base=Decimal('50.00'), estoque=10)
+
+    def saldo(self):
+        self.produto.refresh_from_db()
+        return estoque.total(self.produto.pk), self.produto.estoque
+
+    def test_criacao_divide_o_estoque(self):
+        self.assertEqual(ParticaoEstoque.objects.filter(produto=self.produto).count(), estoque._particoes())
+        self.assertEqual(self.saldo(), (10, 10))
+
+    def test_reserva_e_liberacao(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            estoque.reservar(1, {self.produto.pk: 7})
+        self.assertEqual(self.saldo(), (3, 3))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(estoque.liberar([1]), 1)
+        self.assertEqual(self.saldo(), (10, 10))
+        self.assertEqual(ReservaEstoque.objects.get(pedido_id=1).status, 'liberada')
+        # Idempotente
+        self.assertEqual(estoque.liberar([1]), 0)
+        self.assertEqual(self.saldo(), (10, 10))
+
+    def test_estoque_insuficiente(self):
+        with self.assertRaises(estoque.EstoqueInsuficiente):
+            estoque.reservar(1, {self.produto.pk: 11})
+        self.assertEqual(self.saldo(), (10, 10))
+        self.assertFalse(ReservaEstoque.objects.exists())
+
+    def test_save_de_instancia_antiga_nao_devolve_o_reservado(self):
+        antigo = Produto.objects.get(pk=self.produto.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            estoque.reservar(1, {self.produto.pk: 3})
+
+        # Ex.: formulário do admin aberto antes da venda, alterando só o nome
+        antigo.nome = 'Capinha nova'
+        with self.captureOnCommitCallbacks(execute=True):
+            antigo.save()
+        self.assertEqual(self.saldo(), (7, 7))
+
+    def test_edicao_do_estoque_aplica_a_diferenca(self):
+        antigo = Produto.objects.get(pk=self.produto.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            estoque.reservar(1, {self.produto.pk: 3})
+
+        antigo.estoque = 15  # +5 sobre os 10 carregados
+        with self.captureOnCommitCallbacks(execute=True):
+            antigo.save()
+        self.assertEqual(self.saldo(), (12, 12))
+
+        antigo.estoque = 0  # retirada maior que o saldo: zera
+        with self.captureOnCommitCallbacks(execute=True):
+            antigo.save()
+        self.assertEqual(self.saldo(), (0, 0))
+
+
+class FacetasTests(TestCase):
+    def setUp(self):
+        Produto.objects.create(nome='Capinha', preco_base=Decimal('50.00'), estoque=10)
+
+    def test_faixa_de_preco(self):
+        resposta = self.client.get('/products/api/produtos/facetas/', {'preco_min': '10', 'preco_max': '60'})
+        self.assertEqual(resposta.status_code, 200)
+
+    def test_preco_invalido(self):
+        for valor in ('abc', 'NaN', 'Infinity', '-inf'):
+            with self.subTest(valor=valor):
+                resposta = self.client.get('/products/api/produtos/facetas/', {'preco_min': valor})
+                self.assertEqual(resposta.status_code, 400)
+
+
+@override_settings(ALLOWED_HOSTS=['testserver', 'loja.example', 'outra.example'])
+class CatalogoCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Produto.objects.create(nome='Capinha', preco_base=Decimal('50.00'), estoque=10, imagem='produtos/capinha.png')
+
+    def listar(self, url='/products/api/produtos/', **params):
+        return self.client.get(url, params, HTTP_ACCEPT='application/json').json()
+
+    def test_acerto_sem_consultas_e_invalidacao_apos_commit(self):
+        self.assertEqual(len(self.listar()), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.listar()), 1)
+
+        produto = Produto.objects.get()
+        produto.nome = 'Capinha nova'
+        with self.captureOnCommitCallbacks(execute=True):
+            produto.save()
+        self.assertEqual(self.listar()[0]['nome'], 'Capinha nova')
+
+        # Parâmetros fazem parte da chave
+        self.assertEqual(self.listar('/products/api/produtos/por_categoria/', categoria='case'), [])
+        self.assertEqual(len(self.listar('/products/api/produtos/por_categoria/', categoria='capinha')), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            estoque.reservar(1, {produto.pk: 10})
+        self.assertEqual(self.listar('/products/api/produtos/disponiveis/'), [])
+
+    def test_urls_absolutas_por_host(self):
+        for host in ('loja.example', 'outra.example', 'loja.example'):
+            with self.subTest(host=host):
+                produto = self.client.get('/products/api/produtos/', HTTP_HOST=host, HTTP_ACCEPT='application/json').json()[0]
+                self.assertTrue(produto['imagem'].startswith(f'http://{host}/'))
+                for formatos in produto['imagens'].values():
+                    for endereco in formatos.values():
+                        self.assertTrue(endereco.startswith(f'http://{host}/'))
+
+
+class ImportacaoTests(TestCase):
+    """Importação CSV/NDJSON com upsert pelo SKU"""
+
+    def importar(self, conteudo, formato, tamanho_lote=2):
+        erros = []
+        resultado = importacao.importar(
+            importacao.ler(io.StringIO(conteudo), formato),
+            tamanho_lote=tamanho_lote,
+            ao_errar=lambda numero, mensagem: erros.append(numero),
+        )
+        return resultado, erros
+
+    def test_csv_cria_e_atualiza_pelo_sku(self):
+        Produto.objects.create(sku='CAP-1', nome='Capinha', preco_base=Decimal('50.00'), estoque=10)
+        conteudo = (
+            'sku,nome,preco_base,estoque,ativo\n'
+            'CAP-1,,55.00,,\n'          # atualiza só o preço
+            'CAP-2,Case,70.00,4,sim\n'
+            'CAP-3,Sem preço,,1,\n'     # novo sem preco_base
+            'CAP-4,Errado,abc,1,\n'     # preço inválido
+            f'{"X" * 300},Longo,1.00,1,\n'
+            'CAP-5,Película,20.00,3,nao\n'
+        )
+        resultado, erros = self.importar(conteudo, 'csv')
+        self.assertEqual(resultado, {'criados': 2, 'atualizados': 1, 'erros': 3})
+        self.assertEqual(sorted(erros), [4, 5, 6])
+
+        capinha = Produto.objects.get(sku='CAP-1')
+        self.assertEqual((capinha.nome, capinha.preco_base, capinha.estoque), ('Capinha', Decimal('55.00'), 10))
+        self.assertFalse(Produto.objects.get(sku='CAP-5').ativo)
+        for produto in Produto.objects.all():
+            self.assertEqual(estoque.total(produto.pk), produto.estoque)
+
+    def test_ndjson(self):
+        conteudo = (
+            '{"sku": "A", "nome": "A", "preco_base": "1.00", "estoque": 2}\n'
+            '\n'
+            '{"sku": "B", "nome": \n'
+            '[1, 2]\n'
+            '{"sku": "A", "estoque": 5}\n'
+        )
+        resultado, erros = self.importar(conteudo, 'ndjson', tamanho_lote=10)
+        self.assertEqual(resultado, {'criados': 1, 'atualizados': 0, 'erros': 2})
+        self.assertEqual(erros, [3, 4])
+        # SKU repetido no lote: a linha mais recente prevalece
+        produto = Produto.objects.get(sku='A')
+        self.assertEqual((produto.estoque, estoque.total(produto.pk)), (5, 5))
+
+    def test_comando_rejeita_arquivo_fora_do_utf8(self):
+        with tempfile.NamedTemporaryFile(suffix='.csv') as arquivo:
+            arquivo.write('sku,nome,preco_base\nA,Ação,1.00\n'.encode('latin-1'))
+            arquivo.flush()
+            with self.assertRaisesMessage(CommandError, 'UTF-8'):
+                call_command('importar_produtos', arquivo.name, stdout=io.StringIO())
+        self.assertFalse(Produto.objects.exists())
+
+
+class BuscaTests(TestCase):
+    """?search= pelo índice textual, em ordem de relevância"""
+
+    def setUp(self):
+        cache.clear()
+        self.capinha = Produto.objects.create(nome='Capinha Floral', descricao='Silicone', preco_base=Decimal('50.00'))
+        self.case = Produto.objects.create(nome='Case Galaxy', descricao='Estampa floral', preco_base=Decimal('70.00'))
+        self.pelicula = Produto.objects.create(nome='Película', descricao='Vidro', preco_base=Decimal('20.00'))
+
+    def buscar(self, termo, **params):
+        resposta = self.client.get('/products/api/produtos/', {'search': termo, **params}, HTTP_ACCEPT='application/json')
+        self.assertEqual(resposta.status_code, 200)
+        return [produto['id'] for produto in resposta.json()]
+
+    def test_prefixo_acentos_e_relevancia(self):
+        # Nome pesa mais que a descrição
+        self.assertEqual(self.buscar('flor'), [self.capinha.pk, self.case.pk])
+        self.assertEqual(self.buscar('pelicula'), [self.pelicula.pk])
+        self.assertEqual(self.buscar('capinha silicone'), [self.capinha.pk])
+        self.assertEqual(self.buscar('flor', ordering='-preco_base'), [self.case.pk, self.capinha.pk])
+
+    def test_indice_acompanha_as_alteracoes(self):
+        self.pelicula.nome = 'Película Floral'
+        self.pelicula.save()
+        self.case.ativo = False
+        self.case.save()
+        self.capinha.delete()
+        self.assertEqual(self.buscar('floral'), [self.pelicula.pk])
+        self.assertEqual(busca.buscar_ids('galaxy'), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            importacao.importar([(1, {'sku': 'N-1', 'nome': 'Capa Floral', 'preco_base': '9.90'})])
+        self.assertEqual(len(self.buscar('floral')), 2)
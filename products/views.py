@@ -2,33 +2,63 @@ from django.shortcuts import render
 from rest_framework import viewsets, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q
 from .models import Produto
 from .serializers import ProdutoSerializer
+from . import facetas
+from .busca import ProdutoBuscaFilter, buscar
+from .cache import resposta_em_cache
 
 
 class ProdutoViewSet(viewsets.ModelViewSet):
     queryset = Produto.objects.filter(ativo=True)
     serializer_class = ProdutoSerializer
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['nome', 'descricao', 'categoria']
+    # A busca vem depois da ordenação para poder ordenar por relevância
+    filter_backends = [filters.OrderingFilter, ProdutoBuscaFilter]
     ordering_fields = ['nome', 'preco_base', 'data_criacao']
     ordering = ['nome']
 
+    def _em_cache(self, request, construir):
+        """
+        Serve a consulta do cache versionado do catálogo (apenas respostas JSON).
+        Na API navegável, segue o caminho normal.
+        """
+        if request.accepted_renderer.format != 'json':
+            return Response(construir())
+        return resposta_em_cache(self.action, request, construir)
+
+    def list(self, request, *args, **kwargs):
+        def construir():
+            produtos = self.filter_queryset(self.get_queryset())
+            return self.get_serializer(produtos, many=True).data
+        return self._em_cache(request, construir)
+
     @action(detail=False, methods=['get'])
     def por_categoria(self, request):
         categoria = request.query_params.get('categoria')
         if categoria:
-            produtos = self.queryset.filter(categoria=categoria)
-            serializer = self.get_serializer(produtos, many=True)
-            return Response(serializer.data)
+            def construir():
+                produtos = self.queryset.filter(categoria=categoria)
+                return self.get_serializer(produtos, many=True).data
+            return self._em_cache(request, construir)
         return Response({'error': 'Categoria não especificada'}, status=400)
 
     @action(detail=False, methods=['get'])
     def disponiveis(self, request):
-        produtos = self.queryset.filter(estoque__gt=0)
-        serializer = self.get_serializer(produtos, many=True)
-        return Response(serializer.data)
+        def construir():
+            produtos = self.queryset.filter(estoque__gt=0)
+            return self.get_serializer(produtos, many=True).data
+        return self._em_cache(request, construir)
+
+    @action(detail=False, methods=['get'])
+    def facetas(self, request):
+        """Contagens por categoria, estoque e faixa de preço para a busca/filtros atuais"""
+        def construir():
+            # Filtra (inclusive a busca FTS) só quando a entrada não está em cache
+            return facetas.contar(facetas.filtrar(self.get_queryset(), request.query_params))
+        try:
+            return self._em_cache(request, construir)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
 
 
 # Views HTML para templates
@@ -40,7 +70,7 @@ def produto_list_view(request):
     if categoria:
         produtos = produtos.filter(categoria=categoria)
     if busca:
-        produtos = produtos.filter(Q(nome__icontains=busca) | Q(descricao__icontains=busca))
+        produtos = buscar(produtos, busca)
 
     categorias = Produto.CATEGORIA_CHOICES
 